@@ -5,8 +5,19 @@ Version: 3.0 - LUX Brand
 """
 import streamlit as st
 import database_supabase as db
-from datetime import datetime
-from PIL import Image
+import asset_pipeline
+import availability
+import bulk_import
+import card_grid
+import crew_optimizer
+import exporter
+import geo
+import matching
+import search_index
+import theme
+import io
+from datetime import datetime, timedelta
+from typing import Optional
 
 # Page config
 st.set_page_config(
@@ -16,371 +27,60 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Professional CSS - LUX Brand Colors
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    /* Global Reset */
-    * {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif !important;
-    }
-    
-    /* Hide defaults */
-    #MainMenu, footer, header {visibility: hidden;}
-    
-    /* LUX Brand Background - Dark gradient to show white logo */
-    .stApp {
-        background: linear-gradient(135deg, #1a1a2e 0%, #0f0f1e 100%) !important;
-    }
-    
-    /* Container */
-    .block-container {
-        padding: 1.5rem 1rem !important;
-        max-width: 1400px !important;
-        margin: 0 auto !important;
-    }
-    
-    /* Logo Header */
-    .logo-container {
-        display: flex;
-        align-items: center;
-        gap: 1rem;
-        margin-bottom: 2rem;
-        padding: 1rem;
-        background: rgba(255,255,255,0.05);
-        border-radius: 12px;
-        backdrop-filter: blur(10px);
-    }
-    
-    .logo-container img {
-        height: 50px;
-        width: auto;
-    }
-    
-    /* Typography - Light colors for dark background */
-    h1 {
-        font-size: 2rem !important;
-        font-weight: 700 !important;
-        color: #ffffff !important;
-        letter-spacing: -0.02em !important;
-        margin-bottom: 0.5rem !important;
-    }
-    
-    h2 {
-        font-size: 1.5rem !important;
-        font-weight: 600 !important;
-        color: #e2e8f0 !important;
-        margin-bottom: 0.75rem !important;
-    }
-    
-    h3 {
-        font-size: 1.125rem !important;
-        font-weight: 600 !important;
-        color: #cbd5e1 !important;
-    }
-    
-    p, div, span, label {
-        color: #94a3b8 !important;
-        font-size: 0.9375rem !important;
-        line-height: 1.6 !important;
-    }
-    
-    .stCaption {
-        color: #64748b !important;
-        font-size: 0.8125rem !important;
-    }
-    
-    /* Primary Buttons - LUX Orange/Amber */
-    .stButton > button {
-        background: linear-gradient(135deg, #f97316 0%, #ea580c 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 0.625rem 1.25rem !important;
-        font-weight: 500 !important;
-        font-size: 0.9375rem !important;
-        transition: all 0.2s ease !important;
-        box-shadow: 0 2px 8px rgba(249,115,22,0.3) !important;
-    }
-    
-    .stButton > button * {
-        color: white !important;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #ea580c 0%, #c2410c 100%) !important;
-        box-shadow: 0 4px 16px rgba(249,115,22,0.5) !important;
-        transform: translateY(-1px) !important;
-    }
-    
-    /* Inputs - Dark theme */
-    .stTextInput > div > div > input,
-    .stSelectbox > div > div > select,
-    .stNumberInput > div > div > input {
-        border: 1px solid #334155 !important;
-        border-radius: 8px !important;
-        padding: 0.625rem !important;
-        background: rgba(255,255,255,0.05) !important;
-        color: #e2e8f0 !important;
-        font-size: 0.9375rem !important;
-        transition: all 0.2s ease !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stSelectbox > div > div > select:focus {
-        border-color: #f97316 !important;
-        box-shadow: 0 0 0 3px rgba(249,115,22,0.2) !important;
-        background: rgba(255,255,255,0.08) !important;
-    }
-    
-    /* Info/Success Boxes - Dark theme */
-    .stInfo, .stSuccess {
-        background: rgba(249,115,22,0.1) !important;
-        border: 1px solid rgba(249,115,22,0.3) !important;
-        border-left: 4px solid #f97316 !important;
-        border-radius: 8px !important;
-        padding: 1rem !important;
-        color: #e2e8f0 !important;
-    }
-    
-    .stInfo p, .stSuccess p, .stInfo div, .stSuccess div {
-        color: #e2e8f0 !important;
-    }
-    
-    /* Expander Fix - Dark theme */
-    [data-testid="stExpander"] {
-        background: rgba(255,255,255,0.05) !important;
-        border: 1px solid #334155 !important;
-        border-radius: 8px !important;
-    }
-    
-    [data-testid="stExpander"] summary {
-        padding: 0.75rem 1rem !important;
-        color: #e2e8f0 !important;
-    }
-    
-    [data-testid="stExpander"] summary p {
-        display: inline-block !important;
-        margin-left: 0.5rem !important;
-        color: #e2e8f0 !important;
-    }
-    
-    /* Hide broken Material icon text */
-    [data-testid="stExpander"] [data-testid="stIconMaterial"] {
-        font-size: 0 !important;
-        width: 20px !important;
-        height: 20px !important;
-        color: #f97316 !important;
-    }
-    
-    [data-testid="stExpander"] [data-testid="stIconMaterial"]::before {
-        content: "▼" !important;
-        font-size: 12px !important;
-        display: inline-block !important;
-        color: #f97316 !important;
-    }
-    
-    [data-testid="stExpander"][open] [data-testid="stIconMaterial"]::before {
-        content: "▲" !important;
-    }
-    
-    /* Divider */
-    hr {
-        margin: 1.5rem 0 !important;
-        border: none !important;
-        border-top: 1px solid #e5e7eb !important;
-    }
-    
-    /* Mobile Responsive */
-    @media (max-width: 768px) {
-        .block-container {
-            padding: 1rem 0.75rem !important;
-        }
-        h1 {
-            font-size: 1.5rem !important;
-        }
-        h2 {
-            font-size: 1.25rem !important;
-        }
-        .stButton > button {
-            padding: 0.75rem 1rem !important;
-            font-size: 0.875rem !important;
-            color: white !important;
-        }
-    }
-    
-    @media (max-width: 480px) {
-        h1 {
-            font-size: 1.375rem !important;
-        }
-        h2 {
-            font-size: 1.125rem !important;
-        }
-    }
-    
-    .card-name {
-        font-size: 15px;
-        font-weight: 600;
-        color: #1f2937;
-        margin-bottom: 4px;
-    }
-    
-    .card-rating {
-        font-size: 14px;
-        color: #f59e0b;
-        font-weight: 500;
-    }
-    
-    .card-detail {
-        font-size: 12px;
-        color: #6b7280;
-        margin: 2px 0;
-        display: flex;
-        align-items: center;
-        gap: 4px;
-    }
-    
-    .card-skills {
-        font-size: 11px;
-        color: #2563eb;
-        margin: 4px 0;
-        background: #eff6ff;
-        padding: 4px 8px;
-        border-radius: 4px;
-        display: inline-block;
-    }
-    
-    .card-compact-row {
-        display: flex;
-        justify-content: space-between;
-        align-items: center;
-        margin-top: 8px;
-    }
-    
-    /* Action buttons */
-    .action-buttons {
-        display: flex;
-        gap: 8px;
-        margin-top: 12px;
-    }
-    
-    .btn-call {
-        background: #16a34a;
-        color: white;
-        padding: 8px 16px;
-        border-radius: 6px;
-        text-decoration: none;
-        font-size: 14px;
-        flex: 1;
-        text-align: center;
-    }
-    
-    .btn-whatsapp {
-        background: #25d366;
-        color: white;
-        padding: 8px 16px;
-        border-radius: 6px;
-        text-decoration: none;
-        font-size: 14px;
-        flex: 1;
-        text-align: center;
-    }
-    
-    /* Stats cards */
-    .stat-card {
-        background: linear-gradient(135deg, #2563eb 0%, #1d4ed8 100%);
-        color: white;
-        border-radius: 12px;
-        padding: 16px;
-        text-align: center;
-        margin-bottom: 12px;
-    }
-    
-    .stat-value {
-        font-size: 32px;
-        font-weight: bold;
-    }
-    
-    .stat-label {
-        font-size: 14px;
-        opacity: 0.9;
-    }
-    
-    /* Status badges - Compact */
-    .badge-disponible {
-        background: #dcfce7;
-        color: #16a34a;
-        padding: 3px 10px;
-        border-radius: 10px;
-        font-size: 11px;
-        font-weight: 500;
-        display: inline-block;
-    }
-    
-    .badge-ocupado {
-        background: #fee2e2;
-        color: #dc2626;
-        padding: 3px 10px;
-        border-radius: 10px;
-        font-size: 11px;
-        font-weight: 500;
-        display: inline-block;
-    }
-    
-    /* Filter section */
-    .filter-container {
-        background: #f9fafb;
-        border-radius: 8px;
-        padding: 12px;
-        margin: 12px 0;
-        border: 1px solid #e5e7eb;
-    }
-    
-    .stSelectbox > div > div {
-        font-size: 14px !important;
-    }
-    
-    /* Search box */
-    .stTextInput > div > div > input {
-        font-size: 16px !important;
-        padding: 12px !important;
-        border-radius: 8px !important;
-    }
-    
-    /* Large touch targets for mobile */
-    .stButton > button {
-        min-height: 48px !important;
-        font-size: 16px !important;
-        border-radius: 8px !important;
-        color: white !important;
-    }
-    
-    /* Emoji icons bigger */
-    .icon {
-        font-size: 24px;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-# Test Supabase connection
+# LUX Brand theme (assets/css), minified and cached by theme.py
+theme.apply('admin')
+
+# Test Supabase connection (the client is built once per process and reused)
 try:
     db.get_supabase_client()
 except Exception as e:
     st.error(f"⚠️ Supabase connection error: {e}")
     st.stop()
 
-# Load LUX Logo
-try:
-    logo = Image.open("assets/logo.png")
-except Exception as e:
-    logo = None
+# LUX Logo, pre-rendered at the widths the views show it at (once per process)
+logo = asset_pipeline.load(asset_pipeline.LOGO_PATH, widths=(120, 100))
 
 # Initialize session state
 if 'view' not in st.session_state:
     st.session_state.view = 'home'
 if 'selected_freelancer' not in st.session_state:
     st.session_state.selected_freelancer = None
+if 'list_cursors' not in st.session_state:
+    # Cursors of the loaded grid pages (None = first page) and the filters they belong to
+    st.session_state.list_cursors = [None]
+    st.session_state.list_filters = None
+if 'near_shown' not in st.session_state:
+    # Rows shown of the proximity list, which pages by count instead of cursor
+    st.session_state.near_shown = db.PAGE_SIZE
+
+# Seconds between refreshes of the dashboard stats cards (the stats cache TTL)
+STATS_REFRESH_SECONDS = 60
+
+def go_to(view: str, freelancer_id: Optional[int] = None):
+    """Switch view; used as on_click so the next run already draws the new view"""
+    st.session_state.view = view
+    if freelancer_id is not None:
+        st.session_state.selected_freelancer = freelancer_id
+
+def load_more(cursor: tuple):
+    """Load the grid page after cursor (on_click, so only the grid fragment reruns)"""
+    st.session_state.list_cursors.append(cursor)
+
+def show_more_nearby():
+    """Show one more page of the proximity list (on_click, so only the grid fragment reruns)"""
+    st.session_state.near_shown += db.PAGE_SIZE
+
+def open_profile(freelancer_id: int):
+    """Open a profile from inside a fragment (leaving the view needs a full-app rerun)"""
+    go_to('profile', freelancer_id)
+    st.rerun()
+
+# Cards in the HTML grid open ?perfil=<id> in a new tab
+if 'perfil' in st.query_params:
+    perfil = st.query_params['perfil']
+    del st.query_params['perfil']
+    if perfil.isdigit():
+        go_to('profile', int(perfil))
 
 def show_home():
     """Home / Dashboard view"""
@@ -389,7 +89,7 @@ def show_home():
     if logo:
         col_logo, col_title = st.columns([1, 4])
         with col_logo:
-            st.image(logo, width=120)
+            asset_pipeline.image(logo, width=120)
         with col_title:
             st.markdown("<h1 style='margin-top:1.5rem;'>LuxPro</h1>", unsafe_allow_html=True)
             st.caption("Plataforma de Gestión de Aplicadores Especializados")
@@ -397,7 +97,171 @@ def show_home():
         st.markdown("<h1>LuxPro</h1>", unsafe_allow_html=True)
         st.caption("Plataforma de Gestión de Aplicadores Especializados")
     
-    # Get stats
+    stats_cards()
+    
+    st.markdown("<br>", unsafe_allow_html=True)
+    
+    # Quick actions
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("Ver Aplicadores", use_container_width=True, on_click=go_to, args=('list',))
+    
+    with col2:
+        st.button("Agregar Nuevo", use_container_width=True, on_click=go_to, args=('add',))
+    
+    candidates_panel()
+    crew_panel()
+    export_panel()
+
+@st.fragment
+def candidates_panel():
+    """Best candidates for a project from the matching snapshot; its interactions rerun only this fragment"""
+    with st.expander("🎯 Candidatos para un proyecto"):
+        with st.form("candidates_form", border=False):
+            col1, col2 = st.columns(2)
+            with col1:
+                producto = st.selectbox("Producto", [skill['nombre'] for skill in db.get_skills()])
+            with col2:
+                distrito = st.selectbox("Distrito", [""] + geo.NAMES, format_func=lambda d: d or "Cualquiera")
+            ubicacion = st.text_input("Ubicación", "", placeholder="Dirección o coordenadas (lat, lon)",
+                                      help="Se usa cuando no se elige distrito")
+            # The calendar only knows the days up to its horizon, so later dates can't be picked
+            first_day, last_day = availability.get_calendar(db).horizon()
+            fechas = st.date_input("Fechas del proyecto", value=(), min_value=first_day, max_value=last_day,
+                                   help=f"Sin fechas, cuenta la disponibilidad de hoy. El calendario llega "
+                                        f"hasta el {last_day:%d/%m/%Y}")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                k = st.slider("Candidatos", 3, 10, matching.DEFAULT_K)
+            with col2:
+                min_rating = st.slider("Rating mínimo", 0.0, 5.0, 0.0, 0.5)
+            only_available = st.checkbox("Solo disponibles", value=True)
+            
+            # Kept in session state so the "Ver" buttons still exist on the rerun they trigger
+            if st.form_submit_button("Buscar candidatos", use_container_width=True):
+                st.session_state.candidate_query = {
+                    'project': {
+                        'producto': producto, 'distrito': distrito, 'ubicacion': ubicacion,
+                        'fecha_inicio': fechas[0].isoformat() if fechas else None,
+                        'fecha_fin': fechas[-1].isoformat() if fechas else None
+                    },
+                    'k': k,
+                    'min_rating': min_rating or None,
+                    'only_available': only_available
+                }
+        
+        query = st.session_state.get('candidate_query')
+        if not query:
+            return
+        
+        candidates = matching.get_snapshot(db).match(
+            query['project'], k=query['k'], min_rating=query['min_rating'], only_available=query['only_available']
+        )
+        if not candidates:
+            st.info("Sin candidatos para estos criterios")
+        
+        for candidate in candidates:
+            col_info, col_button = st.columns([4, 1])
+            with col_info:
+                st.markdown(f"**{candidate['nombre']}** · {candidate['distrito'] or '—'} · "
+                            f"⭐ {candidate['rating_promedio'] or 0:.1f} · {candidate['assignments_count']} proyectos")
+                st.caption(f"Puntaje {candidate['score']:.2f} · {candidate['skills'] or ''}")
+            with col_button:
+                if st.button("Ver", key=f"candidate_{candidate['id']}", use_container_width=True):
+                    open_profile(candidate['id'])
+
+def assign_crews():
+    """Record the optimized crews (on_click, so the panel is redrawn without the plan)"""
+    plan = st.session_state.pop('crew_plan', None)
+    if plan:
+        st.session_state.crew_assigned = crew_optimizer.assign(db, plan)
+
+@st.fragment
+def crew_panel():
+    """Crews for several projects at once (crew_optimizer); its interactions rerun only this fragment"""
+    with st.expander("👷 Planificar cuadrillas"):
+        projects = {project['id']: project for project in db.get_all_projects()}
+        selected = st.multiselect(
+            "Proyectos", list(projects),
+            format_func=lambda i: f"{projects[i]['nombre']} · {projects[i].get('fecha_inicio') or 'sin fecha'}"
+        )
+        crews = {}
+        if selected:
+            st.caption(f"Cuadrilla sugerida: un aplicador por cada {crew_optimizer.M2_PER_APPLICATOR} m²")
+            last_day = availability.get_calendar(db).horizon()[1]
+            for project_id in selected:
+                project = projects[project_id]
+                col_name, col_crew = st.columns([3, 1])
+                with col_name:
+                    st.markdown(f"**{project['nombre']}** · {project.get('producto') or '—'} · "
+                                f"{project.get('metros_cuadrados') or 0} m² · {project.get('ubicacion') or '—'}")
+                    # Bookings past the horizon aren't in the calendar; assign_crew still rejects them
+                    if crew_optimizer.project_dates(project)[1] > last_day.isoformat():
+                        st.caption(f"⚠️ Las fechas después del {last_day:%d/%m/%Y} no se revisan al planificar, "
+                                   "solo al asignar")
+                with col_crew:
+                    crews[project_id] = st.number_input("Cuadrilla", 1, 50, crew_optimizer.crew_size(project),
+                                                        key=f"crew_{project_id}", label_visibility="collapsed")
+        
+        if st.button("Optimizar cuadrillas", use_container_width=True, disabled=not selected):
+            batch = [{**projects[project_id], 'cuadrilla': crews[project_id]} for project_id in selected]
+            st.session_state.crew_plan = crew_optimizer.optimize(matching.get_snapshot(db), batch)
+            st.session_state.pop('crew_assigned', None)
+        
+        assigned = st.session_state.get('crew_assigned')
+        if assigned is not None:
+            made, rejected = assigned
+            st.success(f"✅ {made} asignaciones registradas")
+            for message in rejected:
+                st.error(f"❌ Cuadrilla no asignada, {message}")
+        
+        plan = st.session_state.get('crew_plan')
+        if not plan:
+            return
+        for entry in plan['proyectos']:
+            project, crew = entry['proyecto'], entry['cuadrilla']
+            st.markdown(f"**{project['nombre']}** · {len(crew)} de {len(crew) + entry['faltantes']} aplicadores")
+            for member in crew:
+                minutes = f"{member['minutos']} min" if member['minutos'] is not None else "distancia desconocida"
+                st.caption(f"{member['nombre']} · {member['distrito'] or '—'} · {minutes} · "
+                           f"⭐ {member['rating_promedio'] or 0:.1f} · costo {member['costo']:.2f}")
+            if entry['faltantes']:
+                st.warning(f"Faltan {entry['faltantes']} aplicadores libres con {project.get('producto') or 'el producto'}")
+        st.caption(f"Costo total {plan['costo_total']:.2f}")
+        st.button("Asignar cuadrillas", use_container_width=True, on_click=assign_crews)
+
+@st.fragment
+def export_panel():
+    """Reports as Excel or CSV, written page by page; its interactions rerun only this fragment"""
+    with st.expander("📤 Exportar reportes"):
+        reports = st.multiselect("Reportes", list(exporter.REPORTS), default=list(exporter.REPORTS),
+                                 format_func=lambda report: exporter.REPORTS[report][0])
+        fmt = st.radio("Formato", ['xlsx', 'csv'], horizontal=True, format_func={'xlsx': "Excel", 'csv': "CSV"}.get)
+        
+        if st.button("Generar archivo", use_container_width=True, disabled=not reports):
+            status = st.empty()
+            buffer = io.BytesIO()
+            try:
+                kind = exporter.export(
+                    db, reports, fmt, buffer,
+                    lambda report, count: status.caption(f"{exporter.REPORTS[report][0]}: {count} filas...")
+                )
+                st.session_state.export_file = (exporter.filename(reports, kind), exporter.FORMATS[kind],
+                                                buffer.getvalue())
+            except Exception as e:
+                st.error(f"❌ Error al exportar: {e}")
+            status.empty()
+        
+        # Kept in session state so the button survives the rerun a download triggers
+        export_file = st.session_state.get('export_file')
+        if export_file:
+            name, mime, data = export_file
+            st.download_button(f"⬇️ Descargar {name}", data, file_name=name, mime=mime, use_container_width=True)
+
+@st.fragment(run_every=STATS_REFRESH_SECONDS)
+def stats_cards():
+    """Dashboard stat cards; refreshed on their own timer without rerunning the page"""
     stats = db.get_stats()
     
     # Professional stat cards - Dark theme with LUX colors
@@ -434,20 +298,6 @@ def show_home():
             <div style="font-size:0.875rem;color:#cbd5e1;margin-top:0.5rem;">Rating ★</div>
         </div>
         """, unsafe_allow_html=True)
-    
-    st.markdown("<br>", unsafe_allow_html=True)
-    
-    # Quick actions
-    col1, col2 = st.columns(2)
-    with col1:
-        if st.button("Ver Aplicadores", use_container_width=True):
-            st.session_state.view = 'list'
-            st.rerun()
-    
-    with col2:
-        if st.button("Agregar Nuevo", use_container_width=True):
-            st.session_state.view = 'add'
-            st.rerun()
 
 def show_freelancer_list():
     """Aplicadores list view"""
@@ -456,7 +306,7 @@ def show_freelancer_list():
     if logo:
         col_logo, col_title = st.columns([1, 4])
         with col_logo:
-            st.image(logo, width=100)
+            asset_pipeline.image(logo, width=100)
         with col_title:
             st.markdown("<h2 style='margin-top:1rem;'>Aplicadores</h2>", unsafe_allow_html=True)
     else:
@@ -465,110 +315,148 @@ def show_freelancer_list():
     # Header actions
     col1, col2 = st.columns([1, 1])
     with col1:
-        if st.button("← Inicio", key="back_home"):
-            st.session_state.view = 'home'
-            st.rerun()
+        st.button("← Inicio", key="back_home", on_click=go_to, args=('home',))
     with col2:
-        if st.button("Agregar Nuevo", use_container_width=True):
-            st.session_state.view = 'add'
-            st.rerun()
+        st.button("Agregar Nuevo", use_container_width=True, on_click=go_to, args=('add',))
     
     st.markdown("<br>", unsafe_allow_html=True)
     
+    freelancer_grid()
+
+@st.fragment
+def freelancer_grid():
+    """Search, filters and paged grid; their interactions rerun only this fragment"""
+    
     # Search bar
     search_term = st.text_input("", "", key="search", placeholder="🔍 Buscar por nombre...")
     
     # Filters in expander
     with st.expander("Filtros", expanded=False):
-        all_freelancers = db.get_all_freelancers()
+        # Counts for the current filters (widget values from the last rerun).
+        # Options change with the counts, so each widget is seeded with its
+        # current value to keep the selection.
+        selected_distrito = st.session_state.get('filtro_distrito', "")
+        selected_disp = st.session_state.get('filtro_disponible')
+        selected_skills = st.session_state.get('filtro_skills', [])
+        # Instant search answers from memory, so the counts skip the search term
+        facet_search = "" if st.session_state.get('instant_search', True) else search_term
+        facets = db.get_facets(facet_search, ", ".join(selected_skills), selected_distrito, selected_disp)
         
         col1, col2, col3 = st.columns(3)
         
         with col1:
-            distritos = ["Todos"] + sorted(set([f['distrito'] for f in all_freelancers if f.get('distrito')]))
-            distrito_filter = st.selectbox("Distrito", distritos, index=0)
-            distrito_filter = "" if distrito_filter == "Todos" else distrito_filter
+            distrito_counts = {f['value']: f['count'] for f in facets['distritos']}
+            distritos = [""] + sorted(set(distrito_counts) | ({selected_distrito} - {""}))
+            distrito_filter = st.selectbox(
+                "Distrito", distritos, index=distritos.index(selected_distrito), key='filtro_distrito',
+                format_func=lambda d: f"{d} ({distrito_counts.get(d, 0)})" if d else "Todos"
+            )
         
         with col2:
-            disponibilidad_options = ["Todos", "Disponible", "Ocupado"]
-            disponibilidad = st.selectbox("Estado", disponibilidad_options, index=0)
-            
-            disp_filter = None
-            if disponibilidad == "Disponible":
-                disp_filter = True
-            elif disponibilidad == "Ocupado":
-                disp_filter = False
+            disp_counts = {f['value']: f['count'] for f in facets['disponibilidad']}
+            disp_labels = {None: "Todos", True: "Disponible", False: "Ocupado"}
+            disp_options = [None, True, False]
+            disp_filter = st.selectbox(
+                "Estado", disp_options, index=disp_options.index(selected_disp), key='filtro_disponible',
+                format_func=lambda d: disp_labels[d] if d is None else f"{disp_labels[d]} ({disp_counts.get(d, 0)})"
+            )
         
         with col3:
-            sort_options = ["Nombre", "Rating (Mayor)", "Rating (Menor)"]
-            sort_by = st.selectbox("Ordenar por", sort_options, index=0)
+            sort_options = {"Nombre": 'nombre', "Rating (Mayor)": 'rating_desc', "Rating (Menor)": 'rating_asc',
+                            "Cercanía": 'cercania'}
+            sort_by = sort_options[st.selectbox("Ordenar por", list(sort_options), index=0)]
+            origin = st.selectbox("Cerca de", geo.NAMES, key='filtro_cerca') if sort_by == 'cercania' else ""
         
-        skill_filter = st.text_input("Skill", "", placeholder="Ej: Epóxico, Poliaspártico...")
-    
-    # Get and filter freelancers
-    freelancers = db.get_all_freelancers(search_term, skill_filter, distrito_filter)
+        skill_counts = {f['value']: f['count'] for f in facets['skills']}
+        skill_options = list(skill_counts) + [s for s in selected_skills if s not in skill_counts]
+        skills = st.multiselect(
+            "Skills", skill_options, default=selected_skills, key='filtro_skills',
+            format_func=lambda s: f"{s} ({skill_counts.get(s, 0)})", placeholder="Ej: Epóxico, Poliaspártico..."
+        )
+        skill_filter = ", ".join(skills)
+        
+        # One HTML block per page, or the original card + button per freelancer
+        grid_modes = list(card_grid.GRID_MODES)
+        grid_mode = st.radio("Vista", grid_modes, index=grid_modes.index(card_grid.DEFAULT_GRID_MODE),
+                             format_func=card_grid.GRID_MODES.get, horizontal=True, key='grid_mode',
+                             help="La vista compacta abre cada perfil en una pestaña nueva")
+        
+        # Answer searches from the in-process index instead of the database
+        instant = st.toggle("Búsqueda instantánea", value=True, key='instant_search',
+                            help="Resultados por relevancia desde memoria, sin consultar la base de datos")
+    
+    # Sorting by distance needs the in-process structures, so it searches the index even when instant is off
+    if (instant or origin) and search_term.strip():
+        results = search_index.get_index(db).search(search_term, distrito=distrito_filter,
+                                                    disponible=disp_filter, skills=skills)
+        items = results['items']
+        if origin:
+            items = geo.sort_by_proximity(items, origin)
+            st.caption(f"{results['total']} resultados (los más relevantes, por cercanía a {origin})")
+        else:
+            st.caption(f"{results['total']} resultados (por relevancia)")
+        st.markdown("<br>", unsafe_allow_html=True)
+        pages = [items[i:i + db.PAGE_SIZE] for i in range(0, len(items), db.PAGE_SIZE)]
+        if grid_mode == 'html':
+            card_grid.render_html_grid(pages)
+        else:
+            card_grid.render_widget_grid(pages, on_select=open_profile)
+        return
     
-    if disp_filter is not None:
-        freelancers = [f for f in freelancers if f['disponible'] == disp_filter]
+    # New filters start again from the first page
+    filters = (search_term, skill_filter, distrito_filter, disp_filter, sort_by, origin)
+    if st.session_state.list_filters != filters:
+        st.session_state.list_filters = filters
+        st.session_state.list_cursors = [None]
+        st.session_state.near_shown = db.PAGE_SIZE
+    
+    if origin:
+        # Closest first from the matching snapshot; each "Cargar más" asks for one more page
+        shown = st.session_state.near_shown
+        items = matching.get_snapshot(db).nearest(origin, k=shown + 1, skills=skills, disponible=disp_filter,
+                                                  distrito=distrito_filter, include_unlocated=True)
+        st.caption(f"Por cercanía a {origin} (tiempo de viaje estimado)")
+        st.markdown("<br>", unsafe_allow_html=True)
+        pages = [items[i:i + db.PAGE_SIZE] for i in range(0, min(len(items), shown), db.PAGE_SIZE)]
+        if grid_mode == 'html':
+            card_grid.render_html_grid(pages)
+        else:
+            card_grid.render_widget_grid(pages, on_select=open_profile)
+        if len(items) > shown:
+            st.markdown("<br>", unsafe_allow_html=True)
+            st.button("Cargar más", key="load_more", use_container_width=True, on_click=show_more_nearby)
+        return
     
-    # Apply sorting
-    if sort_by == "Nombre":
-        freelancers = sorted(freelancers, key=lambda x: x['nombre'])
-    elif sort_by == "Rating (Mayor)":
-        freelancers = sorted(freelancers, key=lambda x: x['rating_promedio'], reverse=True)
-    elif sort_by == "Rating (Menor)":
-        freelancers = sorted(freelancers, key=lambda x: x['rating_promedio'])
+    # Get the loaded pages, filtered and sorted by the query (each one is cached)
+    pages = []
+    next_cursor = None
+    for cursor in st.session_state.list_cursors:
+        page = db.query_freelancers(search_term, skill_filter, distrito_filter, disp_filter,
+                                    sort=sort_by, cursor=cursor, columns=db.LIST_COLUMNS)
+        pages.append(page['items'])
+        next_cursor = page['next_cursor']
     
-    st.caption(f"{len(freelancers)} resultados")
+    st.caption(f"{facets['total']} resultados")
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Professional Grid - 4 columns
-    cols_per_row = 4
-    for i in range(0, len(freelancers), cols_per_row):
-        cols = st.columns(cols_per_row)
-        for j, col in enumerate(cols):
-            if i + j < len(freelancers):
-                freelancer = freelancers[i + j]
-                with col:
-                    # Status
-                    status_color = "#22c55e" if freelancer['disponible'] else "#ef4444"
-                    status_text = "Disponible" if freelancer['disponible'] else "Ocupado"
-                    
-                    # Truncate name for display - get first and last name only
-                    name_parts = freelancer['nombre'].split()
-                    if len(name_parts) > 2:
-                        display_name = f"{name_parts[0]} {name_parts[-1]}"
-                    else:
-                        display_name = freelancer['nombre']
-                    
-                    # Clean professional card - Dark theme with LUX colors
-                    st.markdown(f"""
-                    <div style="background:rgba(255,255,255,0.05);border:1px solid rgba(249,115,22,0.3);border-radius:12px;padding:1.25rem;height:160px;display:flex;flex-direction:column;justify-content:space-between;transition:all 0.2s;cursor:pointer;overflow:hidden;backdrop-filter:blur(10px);" onmouseover="this.style.borderColor='#f97316';this.style.boxShadow='0 4px 12px rgba(249,115,22,0.3)';this.style.background='rgba(249,115,22,0.1)'" onmouseout="this.style.borderColor='rgba(249,115,22,0.3)';this.style.boxShadow='none';this.style.background='rgba(255,255,255,0.05)'">
-                        <div>
-                            <div style="font-size:1rem;font-weight:600;color:#e2e8f0;margin-bottom:0.25rem;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">{display_name}</div>
-                            <div style="font-size:0.8125rem;color:#94a3b8;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">{freelancer['distrito'] or 'Sin ubicación'}</div>
-                        </div>
-                        <div>
-                            <div style="display:flex;align-items:center;justify-content:space-between;margin-top:0.75rem;">
-                                <div style="font-size:1.75rem;font-weight:700;color:#eab308;line-height:1;">{freelancer['rating_promedio']}<span style="font-size:1rem;">★</span></div>
-                                <div style="font-size:0.75rem;font-weight:600;color:{status_color};background:{status_color}20;padding:0.25rem 0.625rem;border-radius:6px;white-space:nowrap;">{status_text}</div>
-                            </div>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    if st.button("Ver Perfil", key=f"view_{freelancer['id']}", use_container_width=True):
-                        st.session_state.selected_freelancer = freelancer['id']
-                        st.session_state.view = 'profile'
-                        st.rerun()
+    if grid_mode == 'html':
+        card_grid.render_html_grid(pages)
+    else:
+        card_grid.render_widget_grid(pages, on_select=open_profile)
+    
+    # Next page
+    if next_cursor:
+        st.markdown("<br>", unsafe_allow_html=True)
+        st.button("Cargar más", key="load_more", use_container_width=True, on_click=load_more, args=(next_cursor,))
 
 def show_add_freelancer():
     """Add new freelancer form"""
     st.title("➕ Nuevo Freelancer")
     
-    if st.button("← Atrás"):
-        st.session_state.view = 'list'
-        st.rerun()
+    st.button("← Atrás", on_click=go_to, args=('list',))
+    
+    bulk_import_panel()
     
     with st.form("add_freelancer_form"):
         st.subheader("Información Básica")
@@ -589,11 +477,8 @@ def show_add_freelancer():
                              placeholder="Ej: JP01Y, Epóxico, Rodillo, Preparación")
         
         st.subheader("Estado")
-        col1, col2 = st.columns(2)
-        with col1:
-            rating = st.slider("Rating Inicial", 0.0, 5.0, 3.0, 0.5)
-        with col2:
-            disponible = st.checkbox("Disponible", value=True)
+        rating = st.slider("Rating Inicial", 0.0, 5.0, 3.0, 0.5)
+        st.caption("La disponibilidad sale del calendario: las ausencias se registran en el perfil")
         
         notas = st.text_area("Notas", placeholder="Información adicional sobre el freelancer")
         
@@ -612,7 +497,6 @@ def show_add_freelancer():
                         'distrito': distrito if distrito else None,
                         'skills': skills if skills else None,
                         'rating_promedio': rating,
-                        'disponible': 1 if disponible else 0,
                         'notas': notas if notas else None
                     }
                     
@@ -629,36 +513,64 @@ def show_add_freelancer():
                 except Exception as e:
                     st.error(f"❌ Error al guardar: {e}")
 
+def bulk_import_panel():
+    """Import a crew list (CSV / Excel) in batches, with progress and per-row errors"""
+    with st.expander("📥 Importar lista (CSV / Excel)"):
+        st.caption("Columnas obligatorias: Nombre y Teléfono. Opcionales: DNI, Email, Distrito, "
+                   "Skills y Notas. La disponibilidad sale del calendario de asignaciones.")
+        uploaded = st.file_uploader("Archivo", type=['csv', 'xlsx'], key='import_file')
+        on_existing = st.radio(
+            "DNI ya registrados", ['update', 'skip'], horizontal=True,
+            format_func={'update': "Actualizar datos", 'skip': "Omitir"}.get
+        )
+        
+        if uploaded is None or not st.button("📥 Importar", use_container_width=True):
+            return
+        
+        bar = st.progress(0.0, text="Importando...")
+        
+        def progress(fraction: float, report: dict):
+            saved = report['inserted'] + report['updated']
+            bar.progress(min(fraction, 1.0), text=f"Importando... {saved} guardados, {len(report['errors'])} con error")
+        
+        try:
+            report = bulk_import.import_freelancers(uploaded, uploaded.name, db, on_existing=on_existing,
+                                                    progress=progress)
+        except Exception as e:
+            bar.empty()
+            st.error(f"❌ Error al importar: {e}")
+            return
+        
+        st.success(f"✅ {report['rows']} filas: {report['inserted']} nuevos, {report['updated']} actualizados, "
+                   f"{report['skipped']} omitidos")
+        if report['errors']:
+            st.warning(f"⚠️ {len(report['errors'])} filas no importadas")
+            st.dataframe([{'Fila': number, 'Motivo': reason} for number, reason in report['errors']],
+                         hide_index=True, use_container_width=True)
+
 def show_profile():
     """Freelancer profile detail view - Professional & Clean"""
     freelancer_id = st.session_state.selected_freelancer
-    freelancer = db.get_freelancer_by_id(freelancer_id)
-    
-    if not freelancer:
-        st.error("Freelancer no encontrado")
-        st.session_state.view = 'list'
-        st.rerun()
-        return
     
     # Back button
-    if st.button("← Regresar"):
-        st.session_state.view = 'list'
-        st.rerun()
+    st.button("← Regresar", on_click=go_to, args=('list',))
     
     st.markdown("<br>", unsafe_allow_html=True)
     
-    # Professional profile card
-    phone = freelancer['telefono'].replace(' ', '').replace('-', '')
+    profile_panel(freelancer_id)
+
+def profile_header(freelancer: dict):
+    """Name, rating and availability card; works from a list row or the full profile"""
     status_color = "#10b981" if freelancer['disponible'] else "#ef4444"
     status_text = "Disponible" if freelancer['disponible'] else "Ocupado"
+    registrado = f" • Registrado: {freelancer['created_at'][:10]}" if freelancer.get('created_at') else ""
     
-    # Header with name and rating
     st.markdown(f"""
     <div style="background:white;border:1px solid #e5e7eb;border-radius:12px;padding:1.5rem;margin-bottom:1rem;">
         <div style="display:flex;justify-content:space-between;align-items:start;margin-bottom:1rem;">
             <div>
                 <h2 style="margin:0;font-size:1.75rem;color:#1a1a1a;">{freelancer['nombre']}</h2>
-                <p style="margin:0.25rem 0 0 0;font-size:0.875rem;color:#6b7280;">ID: {freelancer['id']} • Registrado: {freelancer['created_at'][:10]}</p>
+                <p style="margin:0.25rem 0 0 0;font-size:0.875rem;color:#6b7280;">ID: {freelancer['id']}{registrado}</p>
             </div>
             <div style="text-align:right;">
                 <div style="font-size:2.5rem;font-weight:700;color:#f59e0b;line-height:1;">{freelancer['rating_promedio']}<span style="font-size:1.5rem;">★</span></div>
@@ -667,6 +579,30 @@ def show_profile():
         </div>
     </div>
     """, unsafe_allow_html=True)
+
+@st.fragment
+def profile_panel(freelancer_id: int):
+    """Profile detail panel; its interactions rerun only this fragment"""
+    # The header goes out first from the list row already in cache, while
+    # the profile (row, contacts, projects and ratings) loads in one request
+    header = st.empty()
+    list_row = db.peek_list_row(freelancer_id)
+    if list_row:
+        with header.container():
+            profile_header(list_row)
+    
+    freelancer = db.get_freelancer_profile(freelancer_id)
+    
+    if not freelancer:
+        st.error("Freelancer no encontrado")
+        go_to('list')
+        st.rerun()
+        return
+    
+    with header.container():
+        profile_header(freelancer)
+    
+    phone = freelancer['telefono'].replace(' ', '').replace('-', '')
     
     # Info section
     st.markdown("""
@@ -722,20 +658,93 @@ def show_profile():
         st.info(freelancer['notas'])
         st.markdown("</div>", unsafe_allow_html=True)
     
+    # History
+    availability_section(freelancer_id)
+    
+    with st.expander(f"Proyectos ({len(freelancer['projects'])})"):
+        for assignment in freelancer['projects']:
+            project = assignment.get('projects') or {}
+            st.markdown(f"**{project.get('nombre', 'Proyecto')}** • {assignment['fecha_inicio'] or 'Sin fecha'} • Pago: {assignment['estado_pago']}")
+        if not freelancer['projects']:
+            st.caption("Sin proyectos asignados")
+    
+    with st.expander(f"Calificaciones ({len(freelancer['ratings'])})"):
+        for rating in freelancer['ratings']:
+            st.markdown(f"**{rating['rating_general']}★** {rating['proyecto']} • {rating['fecha']}")
+            if rating['comentarios']:
+                st.caption(rating['comentarios'])
+        if not freelancer['ratings']:
+            st.caption("Sin calificaciones")
+    
+    with st.expander(f"Historial de contacto ({len(freelancer['contact_history'])})"):
+        for contact in freelancer['contact_history']:
+            st.markdown(f"**{contact['tipo']}** • {contact['fecha']}" + (f" — {contact['notas']}" if contact['notas'] else ""))
+        if not freelancer['contact_history']:
+            st.caption("Sin contactos registrados")
+    
     st.markdown("---")
     
     # Actions
     col1, col2 = st.columns(2)
+    # Leaving the profile needs a full-app rerun
     with col1:
         if st.button("✏️ Editar", use_container_width=True):
-            st.session_state.view = 'edit'
+            go_to('edit')
             st.rerun()
     
     with col2:
         if st.button("🗑️ Eliminar", use_container_width=True, type="secondary"):
-            st.session_state.view = 'delete_confirm'
+            go_to('delete_confirm')
             st.rerun()
 
+def declare_unavailability(freelancer_id: int):
+    """Save the unavailability form (on_click, so the calendar above is redrawn with it)"""
+    fechas = st.session_state.unavailability_dates
+    if fechas:
+        db.add_unavailability(freelancer_id, fechas[0].isoformat(), fechas[-1].isoformat(),
+                              st.session_state.unavailability_motivo)
+        availability.get_calendar(db).reload([freelancer_id])
+
+def remove_unavailability(freelancer_id: int, unavailability_id: int):
+    db.delete_unavailability(unavailability_id)
+    availability.get_calendar(db).reload([freelancer_id])
+
+def availability_section(freelancer_id: int):
+    """Busy days over the next 30/60/90 days and the declared unavailability, inside the profile fragment"""
+    calendar = availability.get_calendar(db)
+    with st.expander("Disponibilidad"):
+        days = st.radio("Próximos", availability.CALENDAR_VIEWS, horizontal=True, key='calendar_days',
+                        format_func=lambda n: f"{n} días")
+        busy = calendar.busy_days(freelancer_id, days)
+        first_day = calendar.horizon()[0]
+        # Weeks start on Monday: pad the first row up to today's weekday
+        cells = ['<div></div>'] * first_day.weekday()
+        for offset, is_busy in enumerate(busy):
+            day = first_day + timedelta(days=offset)
+            color = "#ef4444" if is_busy else "#10b981"
+            cells.append(f'<div title="{day.isoformat()}" style="background:{color}20;color:{color};border-radius:6px;'
+                         f'padding:0.25rem 0;text-align:center;font-size:0.75rem;font-weight:600;">{day.day}</div>')
+        st.markdown('<div style="display:grid;grid-template-columns:repeat(7,1fr);gap:4px;">'
+                    f'{"".join(cells)}</div>', unsafe_allow_html=True)
+        st.caption(f"{sum(busy)} de {days} días ocupados (proyectos y no disponibilidad declarada)")
+        
+        for period in db.get_unavailability(freelancer_id):
+            col_info, col_button = st.columns([4, 1])
+            with col_info:
+                st.markdown(f"**{period['fecha_inicio']} → {period['fecha_fin']}**" +
+                            (f" — {period['motivo']}" if period['motivo'] else ""))
+            with col_button:
+                st.button("Quitar", key=f"unavailability_{period['id']}", use_container_width=True,
+                          on_click=remove_unavailability, args=(freelancer_id, period['id']))
+        
+        with st.form("unavailability_form", clear_on_submit=True, border=False):
+            first, last = calendar.horizon()
+            st.date_input("No disponible", value=(), min_value=first, max_value=last, key='unavailability_dates')
+            st.text_input("Motivo", "", max_chars=100, placeholder="Ej: viaje, salud, otra obra",
+                          key='unavailability_motivo')
+            st.form_submit_button("Registrar", use_container_width=True,
+                                  on_click=declare_unavailability, args=(freelancer_id,))
+
 # Main navigation
 if st.session_state.view == 'home':
     show_home()
@@ -753,21 +762,13 @@ st.markdown("---")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    if st.button("🏠", key="nav_home", help="Inicio", use_container_width=True):
-        st.session_state.view = 'home'
-        st.rerun()
+    st.button("🏠", key="nav_home", help="Inicio", use_container_width=True, on_click=go_to, args=('home',))
 
 with col2:
-    if st.button("👥", key="nav_list", help="Freelancers", use_container_width=True):
-        st.session_state.view = 'list'
-        st.rerun()
+    st.button("👥", key="nav_list", help="Freelancers", use_container_width=True, on_click=go_to, args=('list',))
 
 with col3:
-    if st.button("➕", key="nav_add", help="Agregar", use_container_width=True):
-        st.session_state.view = 'add'
-        st.rerun()
+    st.button("➕", key="nav_add", help="Agregar", use_container_width=True, on_click=go_to, args=('add',))
 
 with col4:
-    if st.button("📊", key="nav_stats", help="Estadísticas", use_container_width=True):
-        st.session_state.view = 'home'
-        st.rerun()
+    st.button("📊", key="nav_stats", help="Estadísticas", use_container_width=True, on_click=go_to, args=('home',))
@@ -4,9 +4,10 @@ Plataforma para aplicadores de pisos poliméricos
 Version: 2.0 - Public Access
 """
 import streamlit as st
+import asset_pipeline
 import database_supabase as db
+import theme
 from datetime import datetime
-from PIL import Image
 
 # Page config
 st.set_page_config(
@@ -16,160 +17,11 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Professional CSS - LUX Brand Colors (Mobile-First)
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    * {
-        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', sans-serif !important;
-    }
-    
-    #MainMenu, footer, header {visibility: hidden;}
-    
-    .stApp {
-        background: linear-gradient(135deg, #1a1a2e 0%, #0f0f1e 100%) !important;
-    }
-    
-    .block-container {
-        padding: 1rem !important;
-        max-width: 100% !important;
-    }
-    
-    h1, h2, h3 {
-        color: #ffffff !important;
-    }
-    
-    p, div, span, label {
-        color: #94a3b8 !important;
-    }
-    
-    .stButton > button {
-        background: linear-gradient(135deg, #f97316 0%, #ea580c 100%) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 8px !important;
-        padding: 0.875rem 1.5rem !important;
-        font-weight: 600 !important;
-        font-size: 1rem !important;
-        box-shadow: 0 4px 12px rgba(249,115,22,0.4) !important;
-        width: 100% !important;
-    }
-    
-    .stButton > button * {
-        color: white !important;
-    }
-    
-    .stButton > button:hover {
-        background: linear-gradient(135deg, #ea580c 0%, #c2410c 100%) !important;
-        box-shadow: 0 6px 20px rgba(249,115,22,0.6) !important;
-        transform: translateY(-2px) !important;
-    }
-    
-    .stTextInput > div > div > input,
-    .stSelectbox > div > div > select {
-        background: rgba(255,255,255,0.08) !important;
-        border: 1px solid rgba(249,115,22,0.3) !important;
-        color: #e2e8f0 !important;
-        border-radius: 8px !important;
-        padding: 0.75rem !important;
-        font-size: 1rem !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stSelectbox > div > div > select:focus {
-        border-color: #f97316 !important;
-        box-shadow: 0 0 0 3px rgba(249,115,22,0.2) !important;
-    }
-    
-    .job-card {
-        background: rgba(255,255,255,0.05);
-        border: 1px solid rgba(249,115,22,0.3);
-        border-radius: 12px;
-        padding: 1.5rem;
-        margin-bottom: 1rem;
-        backdrop-filter: blur(10px);
-    }
-    
-    .job-card:hover {
-        border-color: #f97316;
-        background: rgba(249,115,22,0.1);
-    }
-    
-    .badge {
-        display: inline-block;
-        padding: 0.375rem 0.75rem;
-        border-radius: 6px;
-        font-size: 0.875rem;
-        font-weight: 600;
-        margin-right: 0.5rem;
-    }
-    
-    .badge-available {
-        background: rgba(34,197,94,0.2);
-        color: #22c55e;
-        border: 1px solid rgba(34,197,94,0.4);
-    }
-    
-    .badge-urgent {
-        background: rgba(239,68,68,0.2);
-        color: #ef4444;
-        border: 1px solid rgba(239,68,68,0.4);
-    }
-    
-    /* Form submit button specific */
-    .stForm button[type="submit"] {
-        background: linear-gradient(135deg, #22c55e 0%, #16a34a 100%) !important;
-    }
-    
-    .stForm button[type="submit"]:hover {
-        background: linear-gradient(135deg, #16a34a 0%, #15803d 100%) !important;
-    }
-    
-    /* Animated Registration CTA */
-    .register-cta {
-        background: linear-gradient(135deg, rgba(249,115,22,0.2) 0%, rgba(234,88,12,0.15) 100%);
-        border: 2px solid #f97316;
-        border-radius: 16px;
-        padding: 2rem;
-        text-align: center;
-        backdrop-filter: blur(10px);
-        margin-bottom: 2rem;
-        animation: glow 2s ease-in-out infinite;
-        box-shadow: 0 8px 32px rgba(249,115,22,0.4), 0 0 20px rgba(249,115,22,0.3);
-    }
-    
-    @keyframes glow {
-        0%, 100% {
-            box-shadow: 0 8px 32px rgba(249,115,22,0.4), 0 0 20px rgba(249,115,22,0.3);
-            border-color: #f97316;
-        }
-        50% {
-            box-shadow: 0 12px 48px rgba(249,115,22,0.6), 0 0 40px rgba(249,115,22,0.5);
-            border-color: #fb923c;
-        }
-    }
-    
-    .register-cta h3 {
-        font-size: 1.75rem !important;
-        margin-bottom: 0.75rem !important;
-        background: linear-gradient(135deg, #f97316 0%, #fb923c 100%);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-        background-clip: text;
-    }
-    
-    .register-cta-button {
-        margin-top: 1rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# LUX Brand theme (assets/css), minified and cached by theme.py
+theme.apply('aplicador')
 
-# Load LUX Logo
-try:
-    logo = Image.open("assets/logo.png")
-except:
-    logo = None
+# LUX Logo, pre-rendered at the width the header shows it at (once per process)
+logo = asset_pipeline.load(asset_pipeline.LOGO_PATH, widths=(80,))
 
 # Initialize session state
 if 'view' not in st.session_state:
@@ -180,7 +32,7 @@ def show_header():
     if logo:
         col1, col2 = st.columns([1, 4])
         with col1:
-            st.image(logo, width=80)
+            asset_pipeline.image(logo, width=80)
         with col2:
             st.markdown("<h2 style='margin-top:0.5rem;'>Portal de Oportunidades</h2>", unsafe_allow_html=True)
             st.caption("Encuentra trabajos de aplicación de pisos")
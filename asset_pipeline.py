@@ -0,0 +1,82 @@
+"""
+Image assets for app.py and app_aplicador.py, decoded once per process
+
+A source image is decoded on first use and kept in memory. Each rendition
+(source, width, format) is resized and encoded once and cached as bytes:
+PNG for st.image, WebP data URIs for HTML markup. st.image gets PNG bytes at
+the exact display width, so Streamlit serves them as they are instead of
+re-encoding the full-size image on every rerun.
+
+Freelancer photos go through the same functions by path. Sources are keyed
+by path and modification time, so a replaced file is picked up.
+"""
+import base64
+import io
+import os
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import streamlit as st
+from PIL import Image, ImageOps
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+LOGO_PATH = os.path.join(ASSETS_DIR, 'logo.png')
+
+# Encoder settings per output format
+ENCODERS = {
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85, 'method': 6},
+}
+MIME_TYPES = {'PNG': 'image/png', 'WEBP': 'image/webp'}
+
+@lru_cache(maxsize=64)
+def _decoded(path: str, mtime: float) -> Image.Image:
+    """The source image, decoded and upright (EXIF orientation applied)"""
+    with Image.open(path) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+    return image
+
+@lru_cache(maxsize=512)
+def _rendition(path: str, mtime: float, width: int, fmt: str) -> bytes:
+    """One resized, encoded copy of a source image"""
+    image = _decoded(path, mtime)
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    if fmt == 'PNG' and image.mode == 'RGBA':
+        # Logos and other graphics: a 256-colour palette (alpha kept) about halves the PNG
+        image = image.quantize(256, method=Image.FASTOCTREE)
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt, **ENCODERS[fmt])
+    return buffer.getvalue()
+
+def rendition(path: str, width: int, fmt: str = 'PNG') -> bytes:
+    """Image bytes at the given display width (never upscaled)"""
+    return _rendition(path, os.path.getmtime(path), width, fmt.upper())
+
+@lru_cache(maxsize=512)
+def _data_uri(path: str, mtime: float, width: int, fmt: str) -> str:
+    encoded = base64.b64encode(_rendition(path, mtime, width, fmt)).decode('ascii')
+    return f"data:{MIME_TYPES[fmt]};base64,{encoded}"
+
+def data_uri(path: str, width: int, fmt: str = 'WEBP') -> str:
+    """Rendition as a data: URI for <img> tags in st.markdown"""
+    return _data_uri(path, os.path.getmtime(path), width, fmt.upper())
+
+def load(path: str, widths: Iterable[int] = (), formats: Iterable[str] = ('PNG',)) -> Optional[str]:
+    """Pre-render an image at the widths it is shown at; its path, or None if it can't be read"""
+    try:
+        _decoded(path, os.path.getmtime(path))
+        for width in widths:
+            for fmt in formats:
+                rendition(path, width, fmt)
+    except (OSError, ValueError):
+        return None
+    return path
+
+def image(path: str, width: int):
+    """st.image of a cached PNG rendition at the exact display width"""
+    st.image(rendition(path, width, 'PNG'), width=width, output_format='PNG')
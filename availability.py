@@ -0,0 +1,173 @@
+"""
+Availability calendar: which freelancers are free on which days
+
+Busy time is a set of intervals per freelancer: assignments (fecha_inicio to
+fecha_fin, with the project's dates as fallback) and declared unavailability
+(the unavailability table). The calendar turns them into one bitset per
+freelancer over HORIZON_DAYS days from today, one bit per day packed in
+WORDS 64-bit words, so "who is free for all of Jan 18-25" is a bitwise AND
+of every row with the range's mask, vectorized over the whole directory
+instead of a date check per row. Freelancers without any interval are not
+stored: they are free every day.
+
+The calendar is built from backend.get_busy_intervals() and kept current as
+a live_structure.LiveStructure, like the matching snapshot but on writes
+tagged 'availability': those naming freelancer:<id> re-read those
+freelancers, other changes and an old calendar rebuild it in the
+background, and a new day rebuilds it before answering.
+
+freelancers.disponible is now derived: sync_disponible() sets it to
+"free today" for everyone, from a nightly job:
+
+    python availability.py --backend local
+"""
+import argparse
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import live_structure
+
+HORIZON_DAYS = 128          # two words per freelancer; covers the 30/60/90-day views
+WORDS = HORIZON_DAYS // 64
+CALENDAR_VIEWS = (30, 60, 90)
+
+def as_date(value) -> date:
+    """A date from a date or an ISO string (a timestamp's time is ignored)"""
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+def day_bits(rows: List[Dict], origin: date) -> Tuple[np.ndarray, np.ndarray]:
+    """(sorted freelancer ids, busy bitsets) of interval rows, day 0 being origin"""
+    ids = np.unique(np.array([row['freelancer_id'] for row in rows], dtype=np.int64))
+    positions = np.searchsorted(ids, [row['freelancer_id'] for row in rows])
+    starts = np.array([(as_date(row['fecha_inicio']) - origin).days for row in rows], dtype=np.int64)
+    ends = np.array([(as_date(row['fecha_fin']) - origin).days + 1 for row in rows], dtype=np.int64)
+    starts, ends = np.clip(starts, 0, HORIZON_DAYS), np.clip(ends, 0, HORIZON_DAYS)
+    
+    # +1 where an interval starts and -1 after it ends; a running sum > 0 is a busy day
+    delta = np.zeros((len(ids), HORIZON_DAYS + 1), dtype=np.int32)
+    inside = starts < ends
+    np.add.at(delta, (positions[inside], starts[inside]), 1)
+    np.add.at(delta, (positions[inside], ends[inside]), -1)
+    busy = np.cumsum(delta[:, :HORIZON_DAYS], axis=1) > 0
+    return ids, np.packbits(busy, axis=1, bitorder='little').view(np.uint64)
+
+class AvailabilityCalendar(live_structure.LiveStructure):
+    """Per-day busy bitsets over the next HORIZON_DAYS; safe to share between sessions"""
+    
+    tag = 'availability'
+    
+    def __init__(self, load_intervals: Callable[[str, Optional[List[int]]], List[Dict]]):
+        super().__init__()
+        self._load_intervals = load_intervals   # get_busy_intervals(start, ids), all when ids is None
+        self.origin = date.today()              # day 0 of the bitsets
+        self._ids = np.zeros(0, dtype=np.int64)  # freelancers with busy time, sorted
+        self._bits = np.zeros((0, WORDS), dtype=np.uint64)
+    
+    # Building
+    
+    def _load(self) -> tuple:
+        origin = date.today()
+        return (origin, *day_bits(self._load_intervals(origin.isoformat(), None), origin))
+    
+    def _install(self, loaded: tuple):
+        self.origin, self._ids, self._bits = loaded
+    
+    def _outdated(self) -> bool:
+        # A new day moves day 0: every bit is a day off until rebuilt from today
+        return self.built_at is None or self.origin != date.today()
+    
+    def reload(self, freelancer_ids: List[int]):
+        """Re-read the intervals of some freelancers now (after a write this process made)"""
+        if self.built_at is None:
+            return
+        rows = self._load_intervals(self.origin.isoformat(), list(freelancer_ids))
+        ids, bits = day_bits(rows, self.origin)
+        with self._lock:
+            keep = ~np.isin(self._ids, list(freelancer_ids))
+            merged = np.concatenate([self._ids[keep], ids])
+            order = np.argsort(merged, kind='stable')
+            self._ids = merged[order]
+            self._bits = np.concatenate([self._bits[keep], bits])[order]
+    
+    # Queries
+    
+    def horizon(self) -> Tuple[date, date]:
+        """First and last day the calendar answers for"""
+        return self.origin, self.origin + timedelta(days=HORIZON_DAYS - 1)
+    
+    def _range_mask(self, start, end) -> Optional[np.ndarray]:
+        """Bits of the days from start to end (inclusive) within the horizon; None if none are"""
+        first = max((as_date(start) - self.origin).days, 0)
+        last = min((as_date(end) - self.origin).days, HORIZON_DAYS - 1)
+        if first > last:
+            return None
+        days = np.zeros(HORIZON_DAYS, dtype=bool)
+        days[first:last + 1] = True
+        return np.packbits(days, bitorder='little').view(np.uint64)
+    
+    def busy_ids(self, start, end) -> np.ndarray:
+        """Freelancers busy on at least one day from start to end (inclusive)"""
+        self._ensure_fresh()
+        with self._lock:
+            mask = self._range_mask(start, end)
+            if mask is None:
+                return np.zeros(0, dtype=np.int64)
+            return self._ids[(self._bits & mask).any(axis=1)]
+    
+    def free_mask(self, ids: np.ndarray, start, end) -> Optional[np.ndarray]:
+        """Which of ids are free for every day from start to end (inclusive)
+        
+        Days outside the horizon are not checked; None when none of the
+        range is inside it.
+        """
+        self._ensure_fresh()
+        with self._lock:
+            mask = self._range_mask(start, end)
+            if mask is None:
+                return None
+            busy = self._ids[(self._bits & mask).any(axis=1)]
+        return ~np.isin(ids, busy)
+    
+    def is_free(self, freelancer_id: int, start, end) -> bool:
+        free = self.free_mask(np.array([freelancer_id]), start, end)
+        return True if free is None else bool(free[0])
+    
+    def busy_days(self, freelancer_id: int, days: int = CALENDAR_VIEWS[0]) -> List[bool]:
+        """Whether the freelancer is busy on each of the next days, today first"""
+        self._ensure_fresh()
+        days = min(days, HORIZON_DAYS)
+        with self._lock:
+            position = np.searchsorted(self._ids, freelancer_id)
+            if position == len(self._ids) or self._ids[position] != freelancer_id:
+                return [False] * days
+            row = np.unpackbits(self._bits[position].view(np.uint8), bitorder='little')
+        return row[:days].astype(bool).tolist()
+
+def get_calendar(backend) -> AvailabilityCalendar:
+    """The process-wide availability calendar over a backend's intervals (database or database_supabase)"""
+    return live_structure.shared(AvailabilityCalendar, backend,
+                                 lambda: AvailabilityCalendar(backend.get_busy_intervals))
+
+def sync_disponible(backend) -> int:
+    """Set every freelancer's disponible to whether they are free today; returns the rows changed"""
+    calendar = AvailabilityCalendar(backend.get_busy_intervals)
+    today = date.today()
+    return backend.sync_disponible(calendar.busy_ids(today, today).tolist())
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync freelancers.disponible with the availability calendar")
+    parser.add_argument('--backend', choices=['supabase', 'local'], default='supabase',
+                        help="supabase reads .streamlit/secrets.toml; local is the SQLite database")
+    args = parser.parse_args()
+    
+    if args.backend == 'local':
+        import database as backend
+    else:
+        import database_supabase as backend
+    
+    print(f"✅ {sync_disponible(backend)} aplicadores actualizados")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Query plan auditor for the local SQLite backend (database.py)
+
+Runs every query function in database.py against a scratch database, captures
+the SQL it actually issues, and checks EXPLAIN QUERY PLAN for each statement.
+Exits with status 1 if any statement falls back to a full table scan.
+
+Usage:
+    python benchmarks/audit_query_plans.py [--verbose]
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+# "SCAN freelancers" (or "SCAN TABLE freelancers" on older SQLite) with no index
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\S+)$')
+
+# "MATERIALIZE base" for a CTE computed once and then scanned, and
+# "CO-ROUTINE (subquery-1)" for a subquery whose rows are read as produced
+MATERIALIZED = re.compile(r'^(?:MATERIALIZE|CO-ROUTINE) (\S+)$')
+
+# Scans that are fine by design: constant rows and the small skills
+# dictionary, which get_skills() lists in full
+ALLOWED_SCANS = {'CONSTANT', 'skills'}
+
+# Statement kinds worth planning; PRAGMA/BEGIN/COMMIT and DDL are skipped
+PLANNED = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+def workload() -> List[Tuple[str, Callable]]:
+    """Every query shape database.py can issue"""
+    sample = {'nombre': 'Audit', 'telefono': '900000000', 'distrito': 'Ate', 'skills': 'Epóxico'}
+    return [
+        ('get_all_freelancers()', lambda: db.get_all_freelancers()),
+        ('get_all_freelancers(search)', lambda: db.get_all_freelancers(search_term='Pérez')),
+        ('get_all_freelancers(skill)', lambda: db.get_all_freelancers(skill_filter='Epóxico')),
+        ('get_all_freelancers(distrito)', lambda: db.get_all_freelancers(distrito_filter='Ate')),
+        ('get_all_freelancers(all filters)', lambda: db.get_all_freelancers('Carlos', 'Epóxico', 'Ate')),
+        ('get_all_freelancers(skills AND)', lambda: db.get_all_freelancers(skill_filter='Epóxico, Rodillo')),
+        ('get_freelancers_page(first)', lambda: db.get_freelancers_page(limit=3)),
+        ('get_freelancers_page(cursor)', lambda: db.get_freelancers_page(cursor=(4.5, 'Juan Carlos Pérez', 1), limit=3)),
+        ('get_freelancers_page(distrito, cursor)', lambda: db.get_freelancers_page(distrito_filter='Ate', cursor=(4.5, 'Juan', 1))),
+        ('query_freelancers(rating_asc, cursor)', lambda: db.query_freelancers(sort='rating_asc', cursor=(4.0, 'Juan', 1))),
+        ('query_freelancers(nombre, cursor)', lambda: db.query_freelancers(sort='nombre', cursor=('Juan', 1))),
+        ('query_freelancers(distrito, nombre)', lambda: db.query_freelancers(distrito_filter='Ate', sort='nombre', cursor=('Juan', 1))),
+        ('query_freelancers(disponible, estado, rating range)',
+         lambda: db.query_freelancers(disponible=True, estado='Activo', rating_min=4.0, rating_max=4.8)),
+        ('get_facets()', lambda: db.get_facets()),
+        ('get_facets(all filters)', lambda: db.get_facets('Carlos', 'Epóxico', 'Ate', True, 'Activo', 4.0, 5.0)),
+        ('search_freelancers', lambda: db.search_freelancers('perez epox')),
+        ('find_freelancers_by_skills(all)', lambda: db.find_freelancers_by_skills(['Epóxico', 'Spray'], distrito='Callao')),
+        ('find_freelancers_by_skills(any)', lambda: db.find_freelancers_by_skills(['Poliurea', 'JP01Y'], match_all=False)),
+        ('get_skills', lambda: db.get_skills()),
+        ('get_freelancer_by_id', lambda: db.get_freelancer_by_id(1)),
+        ('get_freelancer_profile', lambda: db.get_freelancer_profile(1)),
+        ('get_stats', lambda: db.get_stats()),
+        # The matching snapshot's full load (no ids) reads every freelancer by design
+        ('get_match_rows(ids)', lambda: db.get_match_rows([1, 2])),
+        ('export_page(freelancers)', lambda: db.export_page('freelancers', 5)),
+        ('export_page(assignments)', lambda: db.export_page('assignments')),
+        ('export_page(ratings)', lambda: db.export_page('ratings')),
+        ('get_busy_intervals', lambda: db.get_busy_intervals('2025-01-01')),
+        ('get_busy_intervals(ids)', lambda: db.get_busy_intervals('2025-01-01', [1, 2])),
+        ('add_unavailability', lambda: db.add_unavailability(1, '2025-01-10', '2025-01-12', 'Audit')),
+        ('get_unavailability', lambda: db.get_unavailability(1)),
+        ('delete_unavailability', lambda: db.delete_unavailability(1)),
+        # The nightly sync_disponible job updates every freelancer by design
+        ('assign_crew', lambda: db.assign_crew(1, [2, 3], {'fecha_inicio': '2030-01-01', 'fecha_fin': '2030-01-05'})),
+        ('get_stats(by_distrito)', lambda: db.get_stats(by_distrito=True)),
+        ('add_freelancer', lambda: db.add_freelancer(sample)),
+        ('update_freelancer', lambda: db.update_freelancer(1, {**sample, 'nombre': 'Audit 2'})),
+        ('find_existing_dnis', lambda: db.find_existing_dnis(['12345678', '99999999'])),
+        ('upsert_freelancers', lambda: db.upsert_freelancers([{**sample, 'dni': '12345678'}, {**sample, 'dni': '99999999'}])),
+        ('log_contact', lambda: db.log_contact(1, 'llamada')),
+        ('add_project', lambda: db.add_project({'nombre': 'Audit', 'producto': 'Epóxico', 'fecha_inicio': '2030-02-01'})),
+        ('get_all_projects', lambda: db.get_all_projects()),
+        ('add_rating', lambda: db.add_rating(1, {'calidad': 5, 'puntualidad': 4, 'instrucciones': 5, 'seguridad': 4, 'profesionalismo': 5})),
+        ('get_rating_summary', lambda: db.get_rating_summary(1)),
+        # The full repair (no freelancer_id) reads every rating by design
+        ('rebuild_rating_stats(freelancer)', lambda: db.rebuild_rating_stats(1)),
+        ('delete_freelancer', lambda: db.delete_freelancer(2))
+    ]
+
+def seed_assignments():
+    """One project with an assignment, so rating queries have rows to join"""
+    conn = db.get_connection()
+    with conn:
+        conn.execute("INSERT INTO projects (nombre, producto) VALUES ('Audit', 'Epóxico')")
+        conn.execute("INSERT INTO assignments (project_id, freelancer_id) VALUES (1, 1)")
+
+def capture(fn: Callable) -> List[str]:
+    """Run fn and return the expanded SQL statements it executed"""
+    conn = db.get_connection()
+    statements = []
+    conn.set_trace_callback(statements.append)
+    try:
+        fn()
+    finally:
+        conn.set_trace_callback(None)
+    return [s for s in statements if s.lstrip().upper().startswith(PLANNED)]
+
+def explain(sql: str) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for one statement"""
+    conn = db.get_connection()
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+def full_scans(plan: List[str]) -> List[str]:
+    """Plan lines that read a whole table without an index"""
+    # Scanning a materialized CTE or a co-routine reads rows the statement computes itself
+    materialized = {match.group(1) for match in map(MATERIALIZED.match, (line.strip() for line in plan)) if match}
+    scans = []
+    for line in plan:
+        match = FULL_SCAN.match(line.strip())
+        if match and match.group(1) not in ALLOWED_SCANS | materialized:
+            scans.append(line.strip())
+    return scans
+
+def audit(verbose: bool = False) -> Dict[str, List[str]]:
+    """Audit every workload query and return {statement: offending plan lines}"""
+    failures = {}
+    for label, fn in workload():
+        for sql in capture(fn):
+            plan = explain(sql)
+            scans = full_scans(plan)
+            if verbose or scans:
+                status = "FULL SCAN" if scans else "ok"
+                print(f"[{status}] {label}: {' '.join(sql.split())[:120]}")
+                for line in plan:
+                    print(f"    {line}")
+            if scans:
+                failures[sql] = scans
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--verbose', action='store_true', help='print every plan, not only failures')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'audit.db')
+        db.init_database()
+        db.insert_sample_data()
+        seed_assignments()
+        failures = audit(args.verbose)
+        db.close_connection()
+    
+    if failures:
+        print(f"❌ {len(failures)} statement(s) fall back to a full table scan")
+        sys.exit(1)
+    print("✅ No full table scans")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: rerun cost of interactions in the Aplicadores list view (app.py)
+
+Drives app.py with Streamlit's AppTest against a scratch SQLite database
+(database.py stands in for database_supabase) and reports, per interaction:
+
+    full run   wall time of one whole-script run, i.e. what the interaction
+               costs when it reruns the entire app
+    fragment   time spent inside st.fragment bodies during that run; when the
+               interaction happens inside a fragment, Streamlit reruns only
+               that fragment, so this is its cost in the browser
+
+AppTest always reruns the whole script, so fragment time is measured by
+wrapping st.fragment. Buttons that call st.rerun() cost two full runs.
+Each session starts in the widget grid, picked on the Vista radio, since
+"Ver Perfil" buttons only exist there (compact cards open ?perfil=<id> in
+a new tab, i.e. a new session, which no rerun of this one measures).
+
+Usage:
+    python benchmarks/bench_app_reruns.py [--rows 5000] [--repeat 10]
+"""
+import argparse
+import functools
+import os
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import database as db
+from bench_list_projection import seed
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+# Time spent in each fragment body, by function name
+fragment_times = defaultdict(float)
+
+def timed_fragment(func=None, *, run_every=None):
+    """st.fragment that also records how long each run of its body takes"""
+    if func is None:
+        return lambda f: timed_fragment(f, run_every=run_every)
+    
+    @functools.wraps(func)
+    def body(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            fragment_times[func.__name__] += time.perf_counter() - start
+    
+    return real_fragment(body, run_every=run_every)
+
+real_fragment = getattr(st, 'fragment', None)
+if real_fragment is not None:
+    st.fragment = timed_fragment
+
+def timed_run(at: AppTest, interact=None) -> tuple:
+    """Apply interact to the app, rerun it and return (full run ms, {fragment: ms})"""
+    fragment_times.clear()
+    start = time.perf_counter()
+    if interact:
+        interact(at)
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return elapsed, {name: seconds * 1000 for name, seconds in fragment_times.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        
+        # The local backend answers the app's queries
+        db.get_supabase_client = lambda: None
+        sys.modules['database_supabase'] = db
+        
+        interactions = [
+            ("rerun, no change", None),
+            ("type in search", lambda at: at.text_input(key='search').input('perez')),
+            ("change sort", lambda at: [s for s in at.selectbox if s.label == "Ordenar por"][0].set_value("Rating (Mayor)")),
+            ("cargar más", lambda at: at.button(key='load_more').click()),
+            ("ver perfil", lambda at: [b for b in at.button if b.label == "Ver Perfil"][0].click()),
+            ("nav: inicio", lambda at: at.button(key='nav_home').click()),
+            ("vista compacta", lambda at: at.radio(key='grid_mode').set_value('html')),
+        ]
+        
+        print(f"{args.rows} freelancers, Streamlit {st.__version__}, median of {args.repeat}")
+        print(f"{'interaction':<20}{'full run ms':>14}{'fragment ms':>14}  fragments")
+        for label, interact in interactions:
+            full, fragments = [], defaultdict(list)
+            for _ in range(args.repeat):
+                at = AppTest.from_file(APP_PATH, default_timeout=60)
+                at.session_state['view'] = 'list'
+                at.run()
+                at.radio(key='grid_mode').set_value('widgets').run()
+                # A fresh session per repetition, so each one does the same work
+                elapsed, times = timed_run(at, interact)
+                full.append(elapsed)
+                for name, ms in times.items():
+                    fragments[name].append(ms)
+            fragment_ms = sum(statistics.median(ms) for ms in fragments.values())
+            names = ", ".join(sorted(fragments)) or "-"
+            print(f"{label:<20}{statistics.median(full):>14.1f}{fragment_ms:>14.1f}  {names}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: per-rerun cost of the logo, PIL image vs asset_pipeline renditions
+
+Renders the logo at the widths the apps show it at (120, 100 and 80 px) and
+reports, per rerun:
+
+    decodes   pixel decodes (ImageFile.load calls) while the script runs
+    image KB  bytes handed to Streamlit's media file manager
+    run ms    script run time
+
+"before" opens assets/logo.png with PIL at module level, as both apps did,
+and passes the Image to st.image, which re-encodes the full-size image and
+resizes it on every rerun. "after" passes asset_pipeline's cached PNG bytes.
+
+Usage:
+    python benchmarks/bench_assets.py [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from PIL import ImageFile
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+WIDTHS = (120, 100, 80)
+
+counters = {'decodes': 0, 'bytes': 0}
+
+image_load = ImageFile.ImageFile.load
+media_add = MediaFileManager.add
+
+def counting_load(self, *args, **kwargs):
+    counters['decodes'] += 1
+    return image_load(self, *args, **kwargs)
+
+def counting_add(self, path_or_data, *args, **kwargs):
+    if isinstance(path_or_data, bytes):
+        counters['bytes'] += len(path_or_data)
+    return media_add(self, path_or_data, *args, **kwargs)
+
+ImageFile.ImageFile.load = counting_load
+MediaFileManager.add = counting_add
+
+def logo_page(mode: str, widths: tuple):
+    """The script AppTest runs: the logo at each width"""
+    import streamlit as st
+    import asset_pipeline
+    from PIL import Image
+    
+    if mode == 'before':
+        logo = Image.open(asset_pipeline.LOGO_PATH)
+        for width in widths:
+            st.image(logo, width=width)
+    else:
+        logo = asset_pipeline.load(asset_pipeline.LOGO_PATH, widths=widths)
+        for width in widths:
+            asset_pipeline.image(logo, width=width)
+
+def measure(mode: str, repeat: int) -> tuple:
+    """(decodes, image KB, median run ms) of a rerun, after a first run"""
+    at = AppTest.from_function(logo_page, args=(mode, WIDTHS))
+    at.run()
+    times = []
+    for _ in range(repeat):
+        counters.update(decodes=0, bytes=0)
+        start = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return counters['decodes'], counters['bytes'] / 1024, statistics.median(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    print(f"logo at {', '.join(map(str, WIDTHS))} px, median of {args.repeat} reruns")
+    print(f"{'mode':<8}{'decodes':>9}{'image KB':>10}{'run ms':>9}")
+    for mode in ('before', 'after'):
+        decodes, kb, ms = measure(mode, args.repeat)
+        print(f"{mode:<8}{decodes:>9}{kb:>10.1f}{ms:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: "who is free for all of these days", date checks vs calendar bitsets
+
+Seeds a scratch SQLite directory with assignments spread over the next months
+for a third of the freelancers (with start and end dates) and declared
+unavailability for a tenth, then answers "free for every day from start to
+end" for a few ranges:
+
+    sql        NOT EXISTS over assignments and unavailability, per freelancer
+    per-row    get_busy_intervals() once, then a date check per interval in Python
+    calendar   availability.AvailabilityCalendar.free_mask(): one bitwise AND
+               of every freelancer's day bitset with the range's mask
+
+Usage:
+    python benchmarks/bench_availability.py [--rows 50000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+
+import availability
+import database as db
+from bench_list_projection import seed
+
+RANGES = [(0, 0), (7, 14), (30, 60), (100, 127)]
+
+def seed_calendar(rows: int, today: date):
+    """Assignments of 1-20 days for a third of the freelancers, unavailability for a tenth"""
+    rnd = random.Random(7)
+    day = lambda offset: (today + timedelta(days=offset)).isoformat()
+    conn = db.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO projects (nombre, producto) VALUES (?, ?)",
+                         [(f"Obra {i}", 'Epóxico') for i in range(500)])
+        assignments = []
+        for _ in range(rows // 3):
+            start = rnd.randint(-30, 120)
+            assignments.append((rnd.randint(1, 500), rnd.randint(1, rows), day(start), day(start + rnd.randint(0, 20))))
+        conn.executemany("INSERT INTO assignments (project_id, freelancer_id, fecha_inicio, fecha_fin) VALUES (?, ?, ?, ?)",
+                         assignments)
+        periods = []
+        for _ in range(rows // 10):
+            start = rnd.randint(0, 120)
+            periods.append((rnd.randint(1, rows), day(start), day(start + rnd.randint(0, 10)), 'Viaje'))
+        conn.executemany("INSERT INTO unavailability (freelancer_id, fecha_inicio, fecha_fin, motivo) VALUES (?, ?, ?, ?)",
+                         periods)
+
+def free_sql(start: str, end: str) -> int:
+    return db.get_connection().execute('''
+        SELECT COUNT(*) FROM freelancers f
+        WHERE NOT EXISTS (SELECT 1 FROM assignments a
+                          WHERE a.freelancer_id = f.id AND a.fecha_inicio <= ? AND a.fecha_fin >= ?)
+          AND NOT EXISTS (SELECT 1 FROM unavailability u
+                          WHERE u.freelancer_id = f.id AND u.fecha_inicio <= ? AND u.fecha_fin >= ?)
+    ''', (end, start, end, start)).fetchone()[0]
+
+def free_per_row(ids: list, start: str, end: str) -> int:
+    busy = {row['freelancer_id'] for row in db.get_busy_intervals(start)
+            if row['fecha_inicio'] <= end and row['fecha_fin'] >= start}
+    return sum(1 for i in ids if i not in busy)
+
+def timed(fn, repeat: int) -> tuple:
+    """(median ms, last result)"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        seed_calendar(args.rows, today)
+        
+        ids = [row['id'] for row in db.query_freelancers(limit=None, columns=('id',))['items']]
+        id_array = np.array(ids, dtype=np.int64)
+        calendar = availability.AvailabilityCalendar(db.get_busy_intervals)
+        build_ms, _ = timed(calendar.build, 1)
+        print(f"{args.rows} freelancers, {len(calendar._ids)} with busy days; calendar build {build_ms:.0f} ms")
+        print(f"{'days':<10}{'free':>8}{'sql ms':>9}{'per-row ms':>12}{'calendar ms':>13}")
+        
+        for first, last in RANGES:
+            start, end = (today + timedelta(days=first)).isoformat(), (today + timedelta(days=last)).isoformat()
+            sql_ms, free = timed(lambda: free_sql(start, end), max(1, args.repeat // 10))
+            row_ms, free_rows = timed(lambda: free_per_row(ids, start, end), max(1, args.repeat // 10))
+            bits_ms, mask = timed(lambda: calendar.free_mask(id_array, start, end), args.repeat)
+            assert free == free_rows == int(mask.sum())
+            print(f"{f'+{first}..+{last}':<10}{free:>8}{sql_ms:>9.1f}{row_ms:>12.1f}{bits_ms:>13.2f}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Benchmark: onboarding a crew list, add_freelancer per row vs bulk_import
+
+Generates a synthetic crew list (phones as "+51 9xx xxx xxx", DNIs without
+their leading zero on every tenth row, ';'-separated skills, a few duplicate
+and invalid rows) and loads it into a scratch SQLite database:
+
+    add_freelancer   one insert and commit per row, as the form does
+    import csv       bulk_import from a ';'-delimited CSV (Excel, Spanish locale)
+    import xlsx      bulk_import from an .xlsx workbook
+    re-import csv    the same CSV again: every DNI exists, so every row is an update
+
+Usage:
+    python benchmarks/bench_bulk_import.py [--rows 50000] [--chunk-size 500]
+"""
+import argparse
+import csv
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+import bulk_import
+from bench_list_projection import NOMBRES, APELLIDOS, SKILLS, DISTRITOS
+
+HEADER = ['DNI', 'Apellidos y nombres', 'Celular', 'Correo', 'Distrito', 'Habilidades', 'Disponible']
+
+def crew_list(rows: int) -> list:
+    """Header plus rows as a partner would send them, ending in one duplicate and one invalid row"""
+    rnd = random.Random(42)
+    table = [HEADER]
+    for i in range(rows):
+        dni = 10_000_000 + i if i % 10 else 1_000_000 + i
+        table.append([
+            str(dni),
+            f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+            f"+51 9{i // 10**6 % 100:02d} {i // 1000 % 1000:03d} {i % 1000:03d}",
+            f"aplicador{i}@example.com",
+            rnd.choice(DISTRITOS).upper(),
+            "; ".join(rnd.sample(SKILLS, 3)),
+            rnd.choice(['Sí', 'No', ''])
+        ])
+    table.append(table[1][:1] + ['Duplicado', '987654321', '', '', '', ''])
+    table.append(['12', 'Inválido', '123', '', '', '', ''])
+    return table
+
+def csv_file(table: list) -> io.BytesIO:
+    text = io.StringIO()
+    csv.writer(text, delimiter=';').writerows(table)
+    return io.BytesIO(text.getvalue().encode('utf-8-sig'))
+
+def xlsx_file(table: list) -> io.BytesIO:
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    for row in table:
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+def fresh_database(path: str):
+    db.close_connection()
+    if os.path.exists(path):
+        os.remove(path)
+    db.DB_PATH = path
+    db.init_database()
+
+def per_row(table: list):
+    """The form's path: normalize as the import would, then add_freelancer one by one"""
+    positions = bulk_import.map_header(table[0])
+    for cells in table[1:]:
+        try:
+            row = bulk_import.normalize_row(cells, positions, {})
+            db.add_freelancer(row)
+        except Exception:
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--chunk-size', type=int, default=bulk_import.CHUNK_SIZE)
+    args = parser.parse_args()
+    
+    table = crew_list(args.rows)
+    files = {'csv': csv_file(table), 'xlsx': xlsx_file(table)}
+    print(f"{args.rows} rows (+2 rejected), chunks of {args.chunk_size}, "
+          f"csv {files['csv'].getbuffer().nbytes / 1e6:.1f} MB, xlsx {files['xlsx'].getbuffer().nbytes / 1e6:.1f} MB")
+    print(f"{'path':<18}{'seconds':>9}{'rows/s':>10}{'inserted':>10}{'updated':>9}{'errors':>8}")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        
+        fresh_database(path)
+        start = time.perf_counter()
+        per_row(table)
+        seconds = time.perf_counter() - start
+        print(f"{'add_freelancer':<18}{seconds:>9.2f}{args.rows / seconds:>10.0f}{'':>10}{'':>9}{'':>8}")
+        
+        cases = [('import csv', 'csv', True), ('import xlsx', 'xlsx', True), ('re-import csv', 'csv', False)]
+        for label, fmt, fresh in cases:
+            if fresh:
+                fresh_database(path)
+            files[fmt].seek(0)
+            start = time.perf_counter()
+            report = bulk_import.import_freelancers(files[fmt], f"crew.{fmt}", db, chunk_size=args.chunk_size)
+            seconds = time.perf_counter() - start
+            print(f"{label:<18}{seconds:>9.2f}{args.rows / seconds:>10.0f}{report['inserted']:>10}"
+                  f"{report['updated']:>9}{len(report['errors']):>8}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
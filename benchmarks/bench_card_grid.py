@@ -0,0 +1,73 @@
+"""
+Benchmark: Streamlit elements and delta size per rerun for the Aplicadores grid
+
+Renders N synthetic cards (in PAGE_SIZE pages, as the list view loads them)
+with card_grid's HTML mode and the original widget mode, and reports the
+number of frontend elements (elements + layout blocks), the size of the
+websocket deltas and the script run time.
+
+Usage:
+    python benchmarks/bench_card_grid.py [--cards 200 1000 5000] [--repeat 3]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as local_script_runner
+
+# ForwardMsgs of the last run, captured on their way to the element tree
+captured = []
+parse_tree_from_messages = local_script_runner.parse_tree_from_messages
+
+def capturing_parse(messages):
+    captured[:] = messages
+    return parse_tree_from_messages(messages)
+
+local_script_runner.parse_tree_from_messages = capturing_parse
+
+def grid_page(mode: str, cards: int):
+    """The script AppTest runs: one grid of synthetic cards"""
+    import card_grid
+    import database as db
+    
+    freelancers = [
+        {'id': i, 'nombre': f"Aplicador {i} Pérez Quispe", 'distrito': 'San Juan de Lurigancho',
+         'rating_promedio': 4.5, 'disponible': i % 3 != 0}
+        for i in range(cards)
+    ]
+    pages = [freelancers[i:i + db.PAGE_SIZE] for i in range(0, cards, db.PAGE_SIZE)]
+    if mode == 'html':
+        card_grid.render_html_grid(pages)
+    else:
+        card_grid.render_widget_grid(pages, on_select=lambda freelancer_id: None)
+
+def measure(mode: str, cards: int) -> tuple:
+    """(elements, delta KB, run ms) for one rerun of the grid"""
+    at = AppTest.from_function(grid_page, args=(mode, cards), default_timeout=600)
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    deltas = [msg for msg in captured if msg.WhichOneof('type') == 'delta']
+    elements = sum(1 for msg in deltas if msg.delta.WhichOneof('type') in ('new_element', 'add_block'))
+    return elements, sum(msg.ByteSize() for msg in deltas) / 1024, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cards', type=int, nargs='+', default=[200, 1000, 5000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f"{'cards':>6}{'mode':>9}{'elements':>10}{'delta KB':>11}{'run ms':>10}")
+    for cards in args.cards:
+        for mode in ('widgets', 'html'):
+            runs = [measure(mode, cards) for _ in range(args.repeat)]
+            elements, kb = runs[0][0], runs[0][1]
+            ms = statistics.median(run[2] for run in runs)
+            print(f"{cards:>6}{mode:>9}{elements:>10}{kb:>11.1f}{ms:>10.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: staffing many concurrent projects, optimizer vs one project at a time
+
+Seeds a scratch SQLite directory with freelancers, past assignments with
+varied tarifas (so the tarifa cost varies) and some bookings in the coming
+weeks, then staffs batches of projects that all start within the next three
+weeks:
+
+    greedy     projects in start order, each taking its cheapest candidates
+               not already on an overlapping project (staffing by hand)
+    optimizer  crew_optimizer.optimize(): one assignment problem per group of
+               overlapping projects
+
+Both use the same costs; the snapshot is built before timing.
+
+Usage:
+    python benchmarks/bench_crew_optimizer.py [--rows 5000] [--projects 300]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import availability
+import crew_optimizer
+import database as db
+import geo
+import matching
+from bench_list_projection import SKILLS, seed
+
+def seed_history(rows: int, today: date):
+    """Past assignments with tarifas for half the freelancers, bookings in the next weeks for a tenth"""
+    rnd = random.Random(7)
+    day = lambda offset: (today + timedelta(days=offset)).isoformat()
+    conn = db.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO projects (nombre, producto) VALUES (?, ?)",
+                         [(f"Obra {i}", 'Epóxico') for i in range(200)])
+        past = [(rnd.randint(1, 200), i, day(-rnd.randint(30, 300)), round(rnd.uniform(8, 20), 2))
+                for i in rnd.sample(range(1, rows + 1), rows // 2)]
+        conn.executemany("INSERT INTO assignments (project_id, freelancer_id, fecha_inicio, tarifa_m2) VALUES (?, ?, ?, ?)",
+                         past)
+        booked = []
+        for i in rnd.sample(range(1, rows + 1), rows // 10):
+            start = rnd.randint(0, 20)
+            booked.append((rnd.randint(1, 200), i, day(start), day(start + rnd.randint(2, 10))))
+        conn.executemany("INSERT INTO assignments (project_id, freelancer_id, fecha_inicio, fecha_fin) VALUES (?, ?, ?, ?)",
+                         booked)
+
+def make_projects(count: int, today: date) -> list:
+    """Projects starting within three weeks, 2-10 days long, 100-2000 m² in located distritos"""
+    rnd = random.Random(count)
+    projects = []
+    for i in range(count):
+        start = today + timedelta(days=rnd.randint(1, 21))
+        projects.append({
+            'id': i + 1,
+            'producto': rnd.choice(SKILLS),
+            'ubicacion': rnd.choice(geo.NAMES),
+            'metros_cuadrados': rnd.randint(100, 2000),
+            'fecha_inicio': start.isoformat(),
+            'fecha_fin': (start + timedelta(days=rnd.randint(2, 10))).isoformat()
+        })
+    return projects
+
+def greedy(snapshot, projects: list) -> tuple:
+    """(total cost, unfilled slots) staffing projects one at a time in start order"""
+    crews, pools, _, costs = crew_optimizer.project_costs(snapshot, projects)
+    total, unfilled = 0.0, 0
+    for group in crew_optimizer.overlapping_groups(projects):
+        taken = set()
+        for p in group:
+            filled = 0
+            for k in costs[p].argsort():
+                if filled == crews[p]:
+                    break
+                freelancer_id = int(pools[p]['ids'][k])
+                if freelancer_id not in taken:
+                    taken.add(freelancer_id)
+                    total += float(costs[p][k])
+                    filled += 1
+            unfilled += crews[p] - filled
+    return total, unfilled
+
+def timed(fn) -> tuple:
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--projects', type=int, default=300)
+    args = parser.parse_args()
+    
+    today = date.today()
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        seed_history(args.rows, today)
+        
+        snapshot = matching.MatchingSnapshot(db.get_match_rows, availability.AvailabilityCalendar(db.get_busy_intervals))
+        snapshot.build()
+        print(f"{args.rows} freelancers")
+        print(f"{'projects':>9}{'slots':>7}{'groups':>8}{'largest':>9}"
+              f"{'greedy ms':>11}{'cost':>9}{'unfilled':>10}{'optimizer ms':>14}{'cost':>9}{'unfilled':>10}")
+        
+        for count in sorted({max(1, args.projects // 6), max(1, args.projects // 3), args.projects}):
+            projects = make_projects(count, today)
+            crews = [crew_optimizer.crew_size(project) for project in projects]
+            groups = crew_optimizer.overlapping_groups(projects)
+            largest = max(sum(crews[p] for p in group) for group in groups)
+            
+            greedy_ms, (greedy_cost, greedy_unfilled) = timed(lambda: greedy(snapshot, projects))
+            optimizer_ms, plan = timed(lambda: crew_optimizer.optimize(snapshot, projects))
+            unfilled = sum(entry['faltantes'] for entry in plan['proyectos'])
+            print(f"{count:>9}{sum(crews):>7}{len(groups):>8}{largest:>9}"
+                  f"{greedy_ms:>11.0f}{greedy_cost:>9.1f}{greedy_unfilled:>10}"
+                  f"{optimizer_ms:>14.0f}{plan['costo_total']:>9.1f}{unfilled:>10}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
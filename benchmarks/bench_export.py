@@ -0,0 +1,70 @@
+"""
+Benchmark: report export memory, get_all_freelancers + pandas vs exporter
+
+Exports the freelancers report of a scratch SQLite directory to a temporary
+file and reports time and peak Python memory (tracemalloc) for:
+
+    pandas     get_all_freelancers() into a DataFrame, then to_csv / to_excel
+    exporter   exporter.export(): keyset pages of EXPORT_PAGE_SIZE rows,
+               written as they arrive (csv.writer / openpyxl write-only)
+
+The pandas peak grows with the directory; the exporter's stays near one page.
+
+Usage:
+    python benchmarks/bench_export.py [--rows 10000 50000]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pandas as pd
+
+import database as db
+import exporter
+from bench_list_projection import seed
+
+def with_pandas(fmt: str, stream):
+    frame = pd.DataFrame(db.get_all_freelancers())
+    if fmt == 'csv':
+        frame.to_csv(stream, index=False, encoding='utf-8-sig')
+    else:
+        frame.to_excel(stream, index=False, engine='openpyxl')
+
+def with_exporter(fmt: str, stream):
+    exporter.export(db, ['freelancers'], fmt, stream)
+
+def measure(fn, fmt: str) -> tuple:
+    """(seconds, peak MB) of one export to a temporary file"""
+    with tempfile.TemporaryFile() as stream:
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn(fmt, stream)
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return seconds, peak / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 50000])
+    args = parser.parse_args()
+    
+    print("freelancers report; time includes tracemalloc overhead")
+    print(f"{'rows':>7}  {'fmt':<6}{'pandas s':>10}{'pandas MB':>11}{'exporter s':>12}{'exporter MB':>13}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = os.path.join(tmp, 'bench.db')
+            db.init_database()
+            seed(rows)
+            for fmt in ('csv', 'xlsx'):
+                naive_s, naive_mb = measure(with_pandas, fmt)
+                stream_s, stream_mb = measure(with_exporter, fmt)
+                print(f"{rows:>7}  {fmt:<6}{naive_s:>10.2f}{naive_mb:>11.1f}{stream_s:>12.2f}{stream_mb:>13.1f}")
+            db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: LIKE '%term%' filtering vs the freelancers_fts full-text index
+
+Usage:
+    python benchmarks/bench_fts_search.py [--rows 100000] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Roberto', 'Patricia', 'Luis', 'Rosa', 'Miguel', 'Sandra', 'José', 'Lucía']
+APELLIDOS = ['Pérez', 'López', 'Ramírez', 'Torres', 'Silva', 'Vargas', 'Mendoza', 'Fernández', 'Castro', 'Ruiz', 'Quispe', 'Huamán']
+SKILLS = ['JP01Y', 'JP02R', 'JS02Y', 'Epóxico', 'Poliurea', 'Poliaspártico', 'Rodillo', 'Spray', 'Lijado', 'Brocha', 'Microcemento']
+DISTRITOS = ['Ate', 'Callao', 'Surco', 'Breña', 'Los Olivos', 'Chorrillos', 'Independencia', 'Villa El Salvador']
+
+QUERIES = [('perez', 'Epóxico'), ('Pérez', 'Epóxico'), ('Ramír', ''), ('quispe huaman', ''), ('Quispe', 'JP01Y'), ('', 'Microcemento')]
+# Accent-free and multi-word terms the LIKE baseline cannot match; the index finds a superset for these
+FOLDED = {'perez', 'quispe huaman'}
+
+def seed(rows: int):
+    """Fill the benchmark database with synthetic freelancers"""
+    rnd = random.Random(42)
+    conn = db.get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO freelancers (dni, nombre, telefono, distrito, skills, rating_promedio, notas) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    f"{i:08d}",
+                    f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+                    f"9{i:08d}",
+                    rnd.choice(DISTRITOS),
+                    ", ".join(rnd.sample(SKILLS, 3)),
+                    round(rnd.uniform(3, 5), 1),
+                    'Registrado para benchmark'
+                )
+                for i in range(rows)
+            ]
+        )
+        # The skill filter reads the skills index, which a raw INSERT leaves empty
+        db._backfill_freelancer_skills(conn)
+
+def like_query(search_term: str, skill_filter: str):
+    """The previous LIKE-based filter, for comparison"""
+    query = "SELECT * FROM freelancers WHERE 1=1"
+    params = []
+    if search_term:
+        query += " AND nombre LIKE ?"
+        params.append(f"%{search_term}%")
+    if skill_filter:
+        query += " AND skills LIKE ?"
+        params.append(f"%{skill_filter}%")
+    query += " ORDER BY rating_promedio DESC, nombre"
+    return db.get_connection().execute(query, params).fetchall()
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, len(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        
+        print(f"{args.rows} freelancers, SQLite {sqlite3.sqlite_version}")
+        print(f"{'query':<32}{'LIKE ms':>10}{'rows':>8}{'FTS ms':>10}{'rows':>8}")
+        for search_term, skill_filter in QUERIES:
+            like_ms, like_rows = timed(lambda: like_query(search_term, skill_filter), args.repeat)
+            fts_ms, fts_rows = timed(lambda: db.get_all_freelancers(search_term, skill_filter), args.repeat)
+            label = f"{search_term!r} / {skill_filter!r}"
+            print(f"{label:<32}{like_ms:>10.1f}{like_rows:>8}{fts_ms:>10.1f}{fts_rows:>8}")
+            if search_term in FOLDED:
+                assert fts_rows >= like_rows, f"{label}: the index lost rows LIKE finds"
+            else:
+                assert fts_rows == like_rows, f"{label}: LIKE found {like_rows} rows, the index {fts_rows}"
+        
+        ranked_ms, ranked_rows = timed(lambda: db.search_freelancers('perez epox', limit=20), args.repeat)
+        print(f"search_freelancers('perez epox', limit=20): {ranked_ms:.1f} ms, {ranked_rows} rows")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
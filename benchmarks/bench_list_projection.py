@@ -0,0 +1,93 @@
+"""
+Benchmark: full rows (SELECT *) vs the LIST_COLUMNS projection for list views
+
+Payload is the JSON size of the rows, i.e. roughly what PostgREST sends for
+the same select and what each cached copy holds in memory.
+
+Usage:
+    python benchmarks/bench_list_projection.py [--rows 10000] [--repeat 20]
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Roberto', 'Patricia', 'Luis', 'Rosa', 'Miguel', 'Sandra', 'José', 'Lucía']
+APELLIDOS = ['Pérez', 'López', 'Ramírez', 'Torres', 'Silva', 'Vargas', 'Mendoza', 'Fernández', 'Castro', 'Ruiz', 'Quispe', 'Huamán']
+SKILLS = ['JP01Y', 'JP02R', 'JS02Y', 'Epóxico', 'Poliurea', 'Poliaspártico', 'Rodillo', 'Spray', 'Lijado', 'Brocha', 'Microcemento']
+DISTRITOS = ['Ate', 'Callao', 'Surco', 'Breña', 'Los Olivos', 'Chorrillos', 'Independencia', 'Villa El Salvador']
+NOTAS = ("Experiencia en pisos industriales y sistemas epóxicos autonivelantes. "
+         "Disponible fines de semana. Referencias de obras anteriores en Lima norte. ")
+
+def seed(rows: int):
+    """Fill the benchmark database with synthetic freelancers (realistic notas and photo paths)"""
+    rnd = random.Random(42)
+    conn = db.get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO freelancers (dni, nombre, telefono, email, distrito, foto_path, skills, rating_promedio, notas) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    f"{i:08d}",
+                    f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {rnd.choice(APELLIDOS)}",
+                    f"9{i:08d}",
+                    f"aplicador{i}@example.com",
+                    rnd.choice(DISTRITOS),
+                    f"fotos/aplicadores/{i:08d}.jpg",
+                    ", ".join(rnd.sample(SKILLS, 3)),
+                    round(rnd.uniform(3, 5), 1),
+                    NOTAS * rnd.randint(1, 4)
+                )
+                for i in range(rows)
+            ]
+        )
+        # The skill filter reads the skills index, which a raw INSERT leaves empty
+        db._backfill_freelancer_skills(conn)
+
+def timed(fn, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+def payload(rows) -> int:
+    return len(json.dumps(rows, default=str).encode('utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        
+        cases = [
+            ("get_all_freelancers()", lambda columns: db.get_all_freelancers(columns=columns)),
+            ("get_all_freelancers(distrito)", lambda columns: db.get_all_freelancers(distrito_filter='Ate', columns=columns)),
+            ("get_freelancers_page()", lambda columns: db.get_freelancers_page(columns=columns)['items']),
+        ]
+        
+        print(f"{args.rows} freelancers, SQLite {sqlite3.sqlite_version}")
+        print(f"{'query':<32}{'* ms':>9}{'* KB':>10}{'list ms':>10}{'list KB':>10}{'ms saved':>10}{'KB saved':>10}")
+        for label, fn in cases:
+            full_ms, full_rows = timed(lambda: fn(None), args.repeat)
+            slim_ms, slim_rows = timed(lambda: fn(db.LIST_COLUMNS), args.repeat)
+            full_kb, slim_kb = payload(full_rows) / 1024, payload(slim_rows) / 1024
+            print(f"{label:<32}{full_ms:>9.2f}{full_kb:>10.1f}{slim_ms:>10.2f}{slim_kb:>10.1f}"
+                  f"{1 - slim_ms / full_ms:>10.0%}{1 - slim_kb / full_kb:>10.0%}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark: candidate matching latency on the columnar snapshot
+
+Seeds a scratch SQLite directory (plus projects, assignments and ratings so
+experience and rating dimensions vary), builds matching's snapshot and times
+top-k matches for a few projects. For reference, "filter + sort" is what the
+app could do before: get_all_freelancers filtered by the producto and
+distrito (what search_available_freelancers does on Supabase), sorted by
+rating in Python; it never sees rating dimensions or past work. "nearest"
+is snapshot.nearest(): the k closest available freelancers by travel time
+from the project's ubicacion (geo).
+
+Usage:
+    python benchmarks/bench_matching.py [--rows 50000] [--repeat 50] [--k 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+import matching
+from bench_list_projection import seed
+
+PROJECTS = [
+    {'producto': 'Poliurea', 'ubicacion': 'Av. Faucett 1200, Callao'},
+    {'producto': 'Epóxico', 'ubicacion': 'Planta industrial, Ate'},
+    {'producto': 'Microcemento, Lijado', 'ubicacion': 'Los Olivos'},
+    {'producto': 'JP01Y', 'ubicacion': ''},
+]
+
+def seed_history(rows: int):
+    """Projects, assignments for a third of the freelancers, and a rating for most assignments"""
+    rnd = random.Random(7)
+    conn = db.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO projects (nombre, metros_cuadrados, producto) VALUES (?, ?, ?)",
+                         [(f"Obra {i}", rnd.randint(50, 2000), 'Epóxico') for i in range(500)])
+        conn.executemany("INSERT INTO assignments (project_id, freelancer_id, fecha_inicio) VALUES (?, ?, ?)",
+                         [(rnd.randint(1, 500), rnd.randint(1, rows), f"2025-{rnd.randint(1, 12):02d}-01")
+                          for _ in range(rows // 3)])
+        conn.executemany(
+            "INSERT INTO ratings (assignment_id, calidad, puntualidad, instrucciones, seguridad, profesionalismo, "
+            "rating_general) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(i, *[rnd.randint(2, 5) for _ in range(5)], rnd.uniform(2, 5)) for i in range(1, rows // 4)]
+        )
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def timed(fn, repeat: int) -> list:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+def filter_and_sort(project: dict, k: int):
+    distrito = matching.project_distrito(project, db.get_distritos()) or ""
+    rows = db.get_all_freelancers(skill_filter=project['producto'], distrito_filter=distrito)
+    return sorted(rows, key=lambda row: -(row['rating_promedio'] or 0))[:k]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--k', type=int, default=matching.DEFAULT_K)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        seed_history(args.rows)
+        
+        snapshot = matching.MatchingSnapshot(db.get_match_rows)
+        start = time.perf_counter()
+        snapshot.build()
+        build_ms = (time.perf_counter() - start) * 1000
+        refresh_ms = statistics.median(timed(lambda: snapshot.reload([1, 2, 3]), args.repeat))
+        
+        print(f"{args.rows} freelancers, {len(snapshot._skills)} skills; build {build_ms:.0f} ms, "
+              f"refresh of 3 changed rows {refresh_ms:.2f} ms")
+        print(f"{'project':<22}{'match p50':>11}{'p95':>8}{'max':>8}{'nearest p50':>13}{'filter+sort p50':>17}")
+        for project in PROJECTS:
+            matched = timed(lambda: snapshot.match(project, k=args.k, only_available=False), args.repeat)
+            nearest = timed(lambda: snapshot.nearest(project['ubicacion'], k=args.k), args.repeat)
+            baseline = timed(lambda: filter_and_sort(project, args.k), max(1, args.repeat // 10))
+            print(f"{project['producto']:<22}{statistics.median(matched):>11.2f}{percentile(matched, 0.95):>8.2f}"
+                  f"{max(matched):>8.2f}{statistics.median(nearest):>13.2f}{statistics.median(baseline):>17.1f}")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
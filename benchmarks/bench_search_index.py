@@ -0,0 +1,73 @@
+"""
+Benchmark: search-as-you-type latency, search_index vs the database query
+
+Builds the in-process index over a scratch SQLite directory and replays each
+keystroke of a few searches ("p", "pe", "per", ...), timing the index's top
+matches against query_freelancers(search_term=...), the '%term%' match the
+list used on every search. Supabase adds a network round trip on top of the
+database time; the index needs none.
+
+Usage:
+    python benchmarks/bench_search_index.py [--rows 5000 20000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+import search_index
+from bench_list_projection import seed
+
+SEARCHES = ['perez', 'maria quispe', 'epoxico', 'los olivos', '90000']
+
+def keystrokes(text: str):
+    return [text[:end] for end in range(1, len(text) + 1) if text[end - 1] != ' ']
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[5000, 20000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    typed = [prefix for text in SEARCHES for prefix in keystrokes(text)]
+    print(f"{len(typed)} keystrokes over {len(SEARCHES)} searches, mean of {args.repeat} runs each")
+    print(f"{'rows':>7}{'build ms':>10}{'index p50':>11}{'index p95':>11}{'index max':>11}{'db p50':>9}{'db p95':>9}")
+    for rows in args.rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            db.DB_PATH = os.path.join(tmp, 'bench.db')
+            db.init_database()
+            seed(rows)
+            
+            index = search_index.FreelancerIndex(
+                lambda: db.query_freelancers(limit=None, columns=search_index.SEARCH_COLUMNS)['items'],
+                db.get_freelancer_by_id
+            )
+            start = time.perf_counter()
+            index.build()
+            build_ms = (time.perf_counter() - start) * 1000
+            
+            index_ms = [timed(lambda: index.search(text), args.repeat) for text in typed]
+            db_ms = [timed(lambda: db.query_freelancers(search_term=text, columns=db.LIST_COLUMNS), args.repeat)
+                     for text in typed]
+            
+            print(f"{rows:>7}{build_ms:>10.0f}{statistics.median(index_ms):>11.2f}{percentile(index_ms, 0.95):>11.2f}"
+                  f"{max(index_ms):>11.2f}{statistics.median(db_ms):>9.2f}{percentile(db_ms, 0.95):>9.2f}")
+            
+            db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: per-call sqlite3.connect() vs the persistent, tuned connection manager in database.py
+
+Usage:
+    python benchmarks/bench_sqlite_connections.py [--rows 5000] [--calls 2000]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+DISTRITOS = ['Ate', 'Callao', 'Surco', 'Breña', 'Los Olivos', 'Chorrillos', 'Independencia', 'Villa El Salvador']
+
+def seed(rows: int):
+    """Fill the benchmark database with synthetic freelancers"""
+    conn = db.get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO freelancers (dni, nombre, telefono, distrito, skills, rating_promedio, disponible) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (f"{i:08d}", f"Aplicador {i}", f"9{i:08d}", DISTRITOS[i % len(DISTRITOS)], 'Epóxico, Rodillo', (i % 50) / 10, i % 2)
+                for i in range(rows)
+            ]
+        )
+
+# "Before": the original pattern, one connection opened and closed per call
+
+def naive_get_by_id(freelancer_id: int):
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM freelancers WHERE id = ?", (freelancer_id,))
+    result = cursor.fetchone()
+    conn.close()
+    return dict(result) if result else None
+
+def naive_by_distrito(distrito: str):
+    conn = sqlite3.connect(db.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM freelancers WHERE 1=1 AND distrito = ? ORDER BY rating_promedio DESC, nombre", (distrito,))
+    freelancers = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+    return freelancers
+
+def naive_log_contact(freelancer_id: int):
+    conn = sqlite3.connect(db.DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO contact_log (freelancer_id, tipo, notas) VALUES (?, ?, ?)", (freelancer_id, 'llamada', ''))
+    conn.commit()
+    conn.close()
+
+def timed(label: str, fn, calls: int) -> float:
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed * 1000:9.1f} ms total  {elapsed / calls * 1e6:8.1f} µs/call")
+    return elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=5000)
+    parser.add_argument('--calls', type=int, default=2000)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_PATH = os.path.join(tmp, 'bench.db')
+        db.init_database()
+        seed(args.rows)
+        rows, calls = args.rows, args.calls
+        
+        workloads = [
+            ('get_freelancer_by_id', calls,
+             lambda i: naive_get_by_id(i % rows + 1),
+             lambda i: db.get_freelancer_by_id(i % rows + 1)),
+            ('get_all_freelancers(distrito)', max(calls // 20, 1),
+             lambda i: naive_by_distrito(DISTRITOS[i % len(DISTRITOS)]),
+             lambda i: db.get_all_freelancers(distrito_filter=DISTRITOS[i % len(DISTRITOS)])),
+            ('log_contact', calls,
+             lambda i: naive_log_contact(i % rows + 1),
+             lambda i: db.log_contact(i % rows + 1, 'llamada'))
+        ]
+        
+        print(f"{rows} freelancers, SQLite {sqlite3.sqlite_version}")
+        for label, n, before, after in workloads:
+            print(f"{label} x{n}")
+            t_before = timed('before (connect per call)', before, n)
+            t_after = timed('after (connection manager)', after, n)
+            print(f"  speedup: {t_before / t_after:.1f}x")
+        
+        db.close_connection()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: theme payload per rerun and time to first themed paint on slow 3G
+
+Compares the inline CSS both apps used to send (formatted source with the
+Google Fonts @import) against theme.py's minified, hashed stylesheet:
+
+    first run   bytes of the theme ForwardMsg when a session opens
+    rerun       bytes per rerun; a message of at least minCachedMessageSize
+                is sent once per session and then only as a hash reference
+
+The slow 3G figures are a model, not a browser trace: Chrome DevTools' "Slow
+3G" profile (2000 ms RTT, 400 kbit/s down), websocket compression off
+(Streamlit's default). The @import holds the theme until the Google Fonts CSS
+arrives from a new origin (DNS + TCP + TLS 1.3 + request), and the Inter
+files then load from a second origin and swap in, reflowing the page.
+
+Usage:
+    python benchmarks/bench_theme.py
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from streamlit import config
+from streamlit.runtime.forward_msg_cache import create_reference_msg
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.local_script_runner as local_script_runner
+
+import theme
+
+FONTS_IMPORT = "@import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');"
+
+# DevTools "Slow 3G"
+RTT_MS = 2000
+DOWN_BYTES_PER_MS = 400_000 / 8 / 1000
+
+# New HTTPS origin: DNS, TCP and TLS 1.3 handshakes, then the request
+NEW_ORIGIN_RTTS = 4
+FONTS_CSS_BYTES = 7_000       # css2 response for 5 weights, latin + latin-ext subsets
+FONT_FILE_BYTES = 5 * 24_000  # one woff2 per weight
+
+# ForwardMsgs of the last run, captured on their way to the element tree
+captured = []
+parse_tree_from_messages = local_script_runner.parse_tree_from_messages
+
+def capturing_parse(messages):
+    captured[:] = messages
+    return parse_tree_from_messages(messages)
+
+local_script_runner.parse_tree_from_messages = capturing_parse
+
+def theme_page(markup: str):
+    """The script AppTest runs: the theme element alone"""
+    import streamlit as st
+    st.markdown(markup, unsafe_allow_html=True)
+
+def theme_msg(markup: str):
+    """The ForwardMsg that carries the markup"""
+    AppTest.from_function(theme_page, args=(markup,)).run()
+    return [msg for msg in captured if msg.WhichOneof('type') == 'delta'][0]
+
+def inline_markup(app: str) -> str:
+    """The theme as the apps sent it before: formatted source behind the fonts @import"""
+    sources = []
+    for name in theme.THEMES[app]:
+        with open(os.path.join(theme.CSS_DIR, name), encoding='utf-8') as f:
+            sources.append(f.read())
+    return "<style>\n" + FONTS_IMPORT + "\n" + "\n".join(sources) + "</style>"
+
+def transfer_ms(size: int) -> float:
+    return size / DOWN_BYTES_PER_MS
+
+def payload(markup: str, min_cached: float) -> tuple:
+    """(first run bytes, rerun bytes) for a theme element"""
+    msg = theme_msg(markup)
+    size = msg.ByteSize()
+    if size >= min_cached:
+        return size, create_reference_msg(msg).ByteSize()
+    return size, size
+
+def main():
+    configured = config.get_option('global.minCachedMessageSize')
+    default = config.get_config_options()['global.minCachedMessageSize'].default_val
+    
+    print(f"Theme payload (minCachedMessageSize: default {default:.0f} B, configured {configured:.0f} B)")
+    print(f"{'app':<11}{'theme':<26}{'first run B':>13}{'rerun B':>10}{'rerun ms':>10}")
+    for app in theme.THEMES:
+        cases = [
+            ("inline, unminified", inline_markup(app), default),
+            ("minified, default cache", theme.style_tag(app), default),
+            ("minified, config cache", theme.style_tag(app), configured),
+        ]
+        for label, markup, min_cached in cases:
+            first, rerun = payload(markup, min_cached)
+            print(f"{app:<11}{label:<26}{first:>13}{rerun:>10}{transfer_ms(rerun):>10.0f}")
+    
+    fonts_css_ms = NEW_ORIGIN_RTTS * RTT_MS + transfer_ms(FONTS_CSS_BYTES)
+    fonts_ms = fonts_css_ms + NEW_ORIGIN_RTTS * RTT_MS + transfer_ms(FONT_FILE_BYTES)
+    print()
+    print(f"Slow 3G model ({RTT_MS} ms RTT, {DOWN_BYTES_PER_MS * 8:.0f} kbit/s), "
+          "ms after the theme message starts to arrive")
+    print(f"{'app':<11}{'theme':<26}{'themed paint':>14}{'font swap':>11}")
+    for app in theme.THEMES:
+        before = theme_msg(inline_markup(app)).ByteSize()
+        after = theme_msg(theme.style_tag(app)).ByteSize()
+        print(f"{app:<11}{'inline + @import':<26}{transfer_ms(before) + fonts_css_ms:>14.0f}"
+              f"{transfer_ms(before) + fonts_ms:>11.0f}")
+        print(f"{app:<11}{'minified, system fonts':<26}{transfer_ms(after):>14.0f}{'-':>11}")
+
+if __name__ == "__main__":
+    main()
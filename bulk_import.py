@@ -0,0 +1,296 @@
+"""
+Bulk freelancer import from CSV and Excel (.xlsx) files
+
+Rows are read as a stream (csv.reader over the decoded bytes, openpyxl in
+read-only mode), so a 50k-row crew list is never held in memory as a table.
+Each row is validated and normalized (DNI to 8 digits, phones to the 9-digit
+form the directory uses, skills through text_utils), deduplicated against the
+rows already read, and written in chunks of CHUNK_SIZE: one
+find_existing_dnis() lookup and one upsert_freelancers() batch per chunk, on
+either backend. Rows whose DNI is already in the directory are updated (or
+skipped, on_existing='skip'); rows that fail keep their file row number and
+reason in the report instead of stopping the import. Availability is not
+imported: disponible is derived from the calendar (availability.py).
+"""
+import csv
+import io
+import re
+import sqlite3
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from text_utils import fold_accents, parse_skills
+
+CHUNK_SIZE = 500
+
+# Accepted header names per column, compared accent- and case-folded
+HEADER_ALIASES = {
+    'dni': ('dni', 'documento', 'nro documento', 'numero de documento', 'doc'),
+    'nombre': ('nombre', 'nombres', 'nombre completo', 'apellidos y nombres', 'name'),
+    'telefono': ('telefono', 'celular', 'movil', 'whatsapp', 'telefono whatsapp', 'phone'),
+    'email': ('email', 'correo', 'correo electronico', 'e-mail', 'mail'),
+    'distrito': ('distrito',),
+    'skills': ('skills', 'habilidades', 'productos', 'skills productos', 'especialidad'),
+    'notas': ('notas', 'observaciones', 'comentarios'),
+}
+REQUIRED = ('nombre', 'telefono')
+
+# Column sizes of the freelancers table; a longer value would fail its whole batch
+MAX_LENGTHS = {'nombre': 100, 'email': 100, 'distrito': 50}
+
+EMAIL = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+Progress = Callable[[float, Dict], None]
+
+def _text(value) -> str:
+    """Cell value as trimmed text; Excel numbers without their '.0'"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+def _header_key(name) -> str:
+    return re.sub(r'[^a-z0-9@-]+', ' ', fold_accents(_text(name))).strip()
+
+def map_header(header: List) -> Dict[str, int]:
+    """{column: position} for the recognized header cells; ValueError if a required one is missing"""
+    lookup = {alias: column for column, aliases in HEADER_ALIASES.items() for alias in aliases}
+    positions = {}
+    for position, name in enumerate(header):
+        column = lookup.get(_header_key(name))
+        if column and column not in positions:
+            positions[column] = position
+    missing = [column for column in REQUIRED if column not in positions]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    return positions
+
+# Normalization (ValueError with the reason on invalid values)
+
+def normalize_dni(value) -> Optional[str]:
+    """8-digit DNI, restoring leading zeros Excel drops; None if empty"""
+    text = _text(value)
+    if not text:
+        return None
+    digits = re.sub(r'\D', '', text)
+    if 6 <= len(digits) < 8:
+        digits = digits.zfill(8)
+    if len(digits) != 8:
+        raise ValueError(f"DNI inválido: {text}")
+    return digits
+
+def normalize_phone(value) -> str:
+    """9-digit phone: mobile (9xxxxxxxx) or Lima landline (01xxxxxxx), without +51"""
+    digits = re.sub(r'\D', '', _text(value))
+    if digits.startswith('51') and len(digits) in (10, 11):
+        digits = digits[2:]
+    if len(digits) == 8 and digits.startswith('1'):
+        digits = '0' + digits
+    elif len(digits) == 7:
+        digits = '01' + digits
+    if len(digits) != 9 or not (digits.startswith('9') or digits.startswith('01')):
+        raise ValueError(f"Teléfono inválido: {_text(value) or '(vacío)'}")
+    return digits
+
+def normalize_row(cells: List, positions: Dict[str, int], distritos: Dict[str, str]) -> Dict:
+    """One file row as freelancer columns (only the file's columns)
+    
+    distritos maps folded names to the directory's spelling, so "los olivos"
+    joins "Los Olivos" instead of starting a new distrito.
+    """
+    raw = {column: cells[position] if position < len(cells) else None
+           for column, position in positions.items()}
+    row = {}
+    for column, value in raw.items():
+        if column == 'dni':
+            row['dni'] = normalize_dni(value)
+        elif column == 'telefono':
+            row['telefono'] = normalize_phone(value)
+        elif column == 'email':
+            email = _text(value).lower()
+            if email and not EMAIL.match(email):
+                raise ValueError(f"Email inválido: {email}")
+            row['email'] = email or None
+        elif column == 'skills':
+            names = parse_skills(re.sub(r'[;/|]', ',', _text(value)))
+            row['skills'] = ", ".join(names) or None
+        elif column == 'distrito':
+            distrito = _text(value)
+            row['distrito'] = distritos.get(fold_accents(distrito), distrito) or None
+        else:
+            row[column] = _text(value) or None
+    
+    if not row['nombre']:
+        raise ValueError("Nombre vacío")
+    for column, size in MAX_LENGTHS.items():
+        if row.get(column) and len(row[column]) > size:
+            raise ValueError(f"{column} supera {size} caracteres")
+    return row
+
+# Readers: (row number, cells, fraction of the file read)
+
+class _CountingReader(io.RawIOBase):
+    """Binary stream wrapper counting the bytes read, for progress on CSV files"""
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self.count = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self.count += len(data)
+        return len(data)
+
+def _size(stream) -> Optional[int]:
+    try:
+        position = stream.tell()
+        size = stream.seek(0, io.SEEK_END)
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+def _csv_rows(stream) -> Iterator[Tuple[int, List, float]]:
+    """CSV rows; UTF-8 (with or without BOM) or, failing that, Windows-1252 as Excel saves it"""
+    size = _size(stream)
+    start = stream.tell()
+    sample = stream.read(64 * 1024)
+    stream.seek(start)
+    try:
+        sample.decode('utf-8')
+        encoding = 'utf-8-sig'
+    except UnicodeDecodeError as error:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        encoding = 'utf-8-sig' if error.start >= len(sample) - 3 else 'cp1252'
+    
+    counter = _CountingReader(stream)
+    text = io.TextIOWrapper(io.BufferedReader(counter), encoding=encoding, newline='')
+    first_line = text.readline()
+    # Excel in Spanish locales saves CSV with ';'
+    delimiter = max(',;\t', key=first_line.count)
+    reader = csv.reader(text, delimiter=delimiter)
+    
+    yield 1, next(csv.reader([first_line], delimiter=delimiter), []), 0.0
+    for cells in reader:
+        yield reader.line_num + 1, cells, counter.count / size if size else 0.0
+
+def _xlsx_rows(stream) -> Iterator[Tuple[int, List, float]]:
+    """Rows of the first sheet, read-only (openpyxl streams the sheet XML)"""
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        total = sheet.max_row or 0
+        for number, cells in enumerate(sheet.iter_rows(values_only=True), start=1):
+            yield number, list(cells), number / total if total else 0.0
+    finally:
+        workbook.close()
+
+def read_rows(stream, filename: str) -> Iterator[Tuple[int, List, float]]:
+    """(row number, cells, fraction read) for each row of a .csv or .xlsx file, header first"""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension == 'xlsx':
+        return _xlsx_rows(stream)
+    if extension in ('csv', 'txt'):
+        return _csv_rows(stream)
+    raise ValueError(f"Formato no soportado: .{extension} (use .csv o .xlsx)")
+
+# Import
+
+def _is_row_error(error: Exception) -> bool:
+    """Whether a failed batch can be the fault of some of its rows: invalid data or a constraint
+    
+    PostgREST's APIError carries the SQLSTATE in .code (class 22 data
+    exception, 23 integrity constraint violation).
+    """
+    if isinstance(error, sqlite3.IntegrityError):
+        return True
+    return str(getattr(error, 'code', '') or '')[:2] in ('22', '23')
+
+def _write_chunk(backend, rows: List[Tuple[int, Dict]], report: Dict):
+    """Upsert a chunk; if the batch fails on bad rows, split it to find and report them
+    
+    Any other error (connection, permissions, a bug) is raised: no row of
+    the chunk can succeed, so bisecting would only repeat it per row.
+    """
+    try:
+        backend.upsert_freelancers([row for _, row in rows])
+    except Exception as e:
+        if not _is_row_error(e):
+            raise
+        if len(rows) == 1:
+            report['errors'].append((rows[0][0], f"Error al guardar: {e}"))
+            return
+        middle = len(rows) // 2
+        _write_chunk(backend, rows[:middle], report)
+        _write_chunk(backend, rows[middle:], report)
+
+def _flush(backend, chunk: List[Tuple[int, Dict]], on_existing: str, report: Dict):
+    existing = backend.find_existing_dnis([row['dni'] for _, row in chunk if row.get('dni')])
+    if on_existing == 'skip':
+        report['skipped'] += sum(1 for _, row in chunk if row.get('dni') in existing)
+        chunk = [(number, row) for number, row in chunk if row.get('dni') not in existing]
+    
+    failed_before = len(report['errors'])
+    _write_chunk(backend, chunk, report)
+    failed = {number for number, _ in report['errors'][failed_before:]}
+    for number, row in chunk:
+        if number not in failed:
+            report['updated' if row.get('dni') in existing else 'inserted'] += 1
+
+def import_freelancers(stream, filename: str, backend, on_existing: str = 'update',
+                       chunk_size: int = CHUNK_SIZE, progress: Optional[Progress] = None) -> Dict:
+    """Import a CSV/XLSX crew list into backend (database or database_supabase)
+    
+    on_existing: 'update' overwrites the file's columns for DNIs already in
+    the directory, 'skip' leaves them as they are. progress(fraction, report)
+    is called after each chunk. Returns {'rows', 'inserted', 'updated',
+    'skipped', 'duplicates', 'errors': [(row number, reason)]}.
+    """
+    if on_existing not in ('update', 'skip'):
+        raise ValueError(f"Unknown on_existing: {on_existing}")
+    report = {'rows': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'duplicates': 0, 'errors': []}
+    rows = read_rows(stream, filename)
+    
+    _, header, _ = next(rows, (0, [], 0.0))
+    positions = map_header(header)
+    distritos = {fold_accents(name): name for name in backend.get_distritos()}
+    
+    # First row per DNI (or per phone, for rows without DNI) wins
+    seen = {}
+    chunk = []
+    fraction = 0.0
+    for number, cells, fraction in rows:
+        if not any(_text(cell) for cell in cells):
+            continue
+        report['rows'] += 1
+        try:
+            row = normalize_row(cells, positions, distritos)
+        except ValueError as e:
+            report['errors'].append((number, str(e)))
+            continue
+        
+        key = ('dni', row['dni']) if row.get('dni') else ('telefono', row['telefono'])
+        if key in seen:
+            report['duplicates'] += 1
+            report['errors'].append((number, f"Duplicado de la fila {seen[key]} ({key[0]} {key[1]})"))
+            continue
+        seen[key] = number
+        
+        chunk.append((number, row))
+        if len(chunk) >= chunk_size:
+            _flush(backend, chunk, on_existing, report)
+            chunk = []
+            if progress:
+                progress(fraction, report)
+    
+    if chunk:
+        _flush(backend, chunk, on_existing, report)
+    if progress:
+        progress(1.0, report)
+    return report
@@ -0,0 +1,90 @@
+"""
+Aplicadores grid rendering for app.py
+
+The widget mode, the default, is the original grid: st.columns rows with one
+st.markdown card and one "Ver Perfil" button per freelancer, opening the
+profile within the session. The HTML mode emits each page of cards as one
+precompiled HTML block, a single Streamlit element per page. A link cannot
+reach the session, so HTML cards open ?perfil=<id> in a new tab (a new
+session, which app.py points at the profile from st.query_params) and leave
+the list, its filters and loaded pages as they were. HTML cards are styled
+by the lux-* classes in assets/css/admin.css.
+"""
+from html import escape
+from string import Template
+from typing import Callable, Dict, List
+
+import streamlit as st
+
+# Grid modes selectable in the list view
+GRID_MODES = {'widgets': "Botones", 'html': "Compacta"}
+DEFAULT_GRID_MODE = 'widgets'
+
+COLS_PER_ROW = 4
+
+STATUS = {True: ("#22c55e", "Disponible"), False: ("#ef4444", "Ocupado")}
+
+CARD_TEMPLATE = Template(
+    '<a class="lux-card" href="?perfil=$id" target="_blank">'
+    '<div><div class="lux-card-name">$name</div><div class="lux-card-place">$distrito</div></div>'
+    '<div class="lux-card-foot"><div class="lux-card-rating">$rating<span>★</span></div>'
+    '<div class="lux-card-status" style="color:$color;background:${color}20;">$status</div></div>'
+    '</a>'
+)
+
+# Widget-mode card, as originally rendered by show_freelancer_list
+WIDGET_CARD_TEMPLATE = Template("""
+<div style="background:rgba(255,255,255,0.05);border:1px solid rgba(249,115,22,0.3);border-radius:12px;padding:1.25rem;height:160px;display:flex;flex-direction:column;justify-content:space-between;transition:all 0.2s;cursor:pointer;overflow:hidden;backdrop-filter:blur(10px);" onmouseover="this.style.borderColor='#f97316';this.style.boxShadow='0 4px 12px rgba(249,115,22,0.3)';this.style.background='rgba(249,115,22,0.1)'" onmouseout="this.style.borderColor='rgba(249,115,22,0.3)';this.style.boxShadow='none';this.style.background='rgba(255,255,255,0.05)'">
+    <div>
+        <div style="font-size:1rem;font-weight:600;color:#e2e8f0;margin-bottom:0.25rem;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">$name</div>
+        <div style="font-size:0.8125rem;color:#94a3b8;white-space:nowrap;overflow:hidden;text-overflow:ellipsis;">$distrito</div>
+    </div>
+    <div>
+        <div style="display:flex;align-items:center;justify-content:space-between;margin-top:0.75rem;">
+            <div style="font-size:1.75rem;font-weight:700;color:#eab308;line-height:1;">$rating<span style="font-size:1rem;">★</span></div>
+            <div style="font-size:0.75rem;font-weight:600;color:$color;background:${color}20;padding:0.25rem 0.625rem;border-radius:6px;white-space:nowrap;">$status</div>
+        </div>
+    </div>
+</div>
+""")
+
+def display_name(nombre: str) -> str:
+    """First and last name only, to fit on a card"""
+    name_parts = nombre.split()
+    if len(name_parts) > 2:
+        return f"{name_parts[0]} {name_parts[-1]}"
+    return nombre
+
+def _card_fields(freelancer: Dict) -> Dict:
+    """Escaped template values for one card"""
+    color, status = STATUS[bool(freelancer['disponible'])]
+    return {
+        'id': int(freelancer['id']),
+        'name': escape(display_name(freelancer['nombre'])),
+        'distrito': escape(freelancer['distrito'] or 'Sin ubicación'),
+        'rating': escape(str(freelancer['rating_promedio'])),
+        'color': color,
+        'status': status
+    }
+
+def cards_html(freelancers: List[Dict]) -> str:
+    """One page of cards as a single HTML block"""
+    cards = "".join(CARD_TEMPLATE.substitute(_card_fields(f)) for f in freelancers)
+    return f'<div class="lux-grid">{cards}</div>'
+
+def render_html_grid(pages: List[List[Dict]]):
+    """HTML mode: one element per loaded page"""
+    for page in pages:
+        if page:
+            st.markdown(cards_html(page), unsafe_allow_html=True)
+
+def render_widget_grid(pages: List[List[Dict]], on_select: Callable[[int], None]):
+    """Widget mode: st.columns rows with a card and a "Ver Perfil" button per freelancer"""
+    freelancers = [f for page in pages for f in page]
+    for i in range(0, len(freelancers), COLS_PER_ROW):
+        cols = st.columns(COLS_PER_ROW)
+        for freelancer, col in zip(freelancers[i:i + COLS_PER_ROW], cols):
+            with col:
+                st.markdown(WIDGET_CARD_TEMPLATE.substitute(_card_fields(freelancer)), unsafe_allow_html=True)
+                if st.button("Ver Perfil", key=f"view_{freelancer['id']}", use_container_width=True):
+                    on_select(freelancer['id'])
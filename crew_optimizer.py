@@ -0,0 +1,200 @@
+"""
+Crew optimizer: staff several projects at once
+
+Given projects (producto plus any extra skills, m², dates, ubicacion and crew
+size) and the matching snapshot's pool of applicators, picks every crew
+together instead of one freelancer at a time, at the lowest summed cost of
+the assignments. A freelancer's cost on a project is a weighted sum
+(COST_WEIGHTS) of:
+
+    distancia   travel time from their distrito to the project's: 0 within
+                it, 1 at matching.PROXIMITY_MINUTES or when not located
+    tarifa      their average past tarifa_m2 within the pool's range (0.5
+                without history), scaled by the project's m² per crew member
+                relative to the batch: a cheaper crew saves more on big jobs
+    rating      1 - matching's rating score
+
+Freelancers busy in the availability calendar on a project's dates are not
+candidates for it. Projects whose dates overlap, directly or through a chain
+of overlaps, are solved together so nobody lands on two of them at once (a
+chain's ends that do not overlap each other are kept apart too). Each group
+is an assignment problem of crew slots x candidates, solved sparse with
+SciPy's min_weight_full_bipartite_matching (LAPJVsp). Only each project's
+cheapest candidates, as many as the group has slots, become edges: the other
+slots take at most one fewer, so one of those is always free and no dearer
+candidate is ever needed. The result is exact. assign() records each crew
+with one backend.assign_crew() transaction.
+"""
+import math
+from datetime import date
+from typing import Dict, List, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import min_weight_full_bipartite_matching
+
+import geo
+import matching
+
+COST_WEIGHTS = {'distancia': 0.45, 'tarifa': 0.30, 'rating': 0.25}
+M2_PER_APPLICATOR = 250     # suggested crew: one applicator per this many m²
+MAX_SUGGESTED_CREW = 8
+
+def crew_size(project: Dict) -> int:
+    """The project's 'cuadrilla', else one applicator per M2_PER_APPLICATOR m² (1 to MAX_SUGGESTED_CREW)"""
+    if project.get('cuadrilla'):
+        return int(project['cuadrilla'])
+    m2 = float(project.get('metros_cuadrados') or 0)
+    return min(max(math.ceil(m2 / M2_PER_APPLICATOR), 1), MAX_SUGGESTED_CREW)
+
+def project_dates(project: Dict) -> Tuple[str, str]:
+    """(start, end) ISO dates of a project; a project without dates is taken as today"""
+    start = str(project.get('fecha_inicio') or date.today().isoformat())[:10]
+    end = str(project.get('fecha_fin') or start)[:10]
+    return start, max(start, end)
+
+def overlapping_groups(projects: List[Dict]) -> List[List[int]]:
+    """Positions of the projects grouped by overlapping dates, in start order"""
+    dates = [project_dates(project) for project in projects]
+    groups = []
+    group_end = None
+    for i in sorted(range(len(projects)), key=lambda i: dates[i]):
+        start, end = dates[i]
+        if groups and start <= group_end:
+            groups[-1].append(i)
+            group_end = max(group_end, end)
+        else:
+            groups.append([i])
+            group_end = end
+    return groups
+
+def tarifa_range(pools: List[Dict]) -> Tuple[float, float]:
+    """5th and 95th percentile of the known tarifas across the pools"""
+    tarifas = np.concatenate([pool['tarifa'] for pool in pools] + [np.zeros(0, dtype=np.float32)])
+    tarifas = tarifas[~np.isnan(tarifas)]
+    if not len(tarifas):
+        return 0.0, 0.0
+    low, high = np.percentile(tarifas, [5, 95])
+    return float(low), float(high)
+
+def cost_components(pool: Dict, tarifas: Tuple[float, float], area_factor: float) -> Dict[str, np.ndarray]:
+    """Per-candidate cost parts (COST_WEIGHTS keys) of a matching pool"""
+    span = matching.PROXIMITY_MINUTES - geo.DISTRICT_MINUTES
+    low, high = tarifas
+    if high > low:
+        tarifa = np.clip((pool['tarifa'] - low) / (high - low), 0, 1)
+    else:
+        tarifa = np.zeros(len(pool['ids']), dtype=np.float32)
+    return {
+        'distancia': np.clip((pool['minutos'] - geo.DISTRICT_MINUTES) / span, 0, 1),
+        'tarifa': np.where(np.isnan(pool['tarifa']), 0.5, tarifa) * area_factor,
+        'rating': 1 - pool['rating']
+    }
+
+def project_costs(snapshot: matching.MatchingSnapshot, projects: List[Dict]) -> Tuple[List, List, List, List]:
+    """Per project: crew size, matching pool, cost components and total cost of each candidate"""
+    crews = [crew_size(project) for project in projects]
+    pools = [snapshot.pool(project, project.get('skills') or ()) for project in projects]
+    tarifas = tarifa_range(pools)
+    
+    per_member = [float(project.get('metros_cuadrados') or 0) / crew for project, crew in zip(projects, crews)]
+    sized = [m2 for m2 in per_member if m2 > 0]
+    average = sum(sized) / len(sized) if sized else 0
+    components = [cost_components(pool, tarifas, m2 / average if m2 > 0 else 1.0)
+                  for pool, m2 in zip(pools, per_member)]
+    costs = [sum(COST_WEIGHTS[name] * values for name, values in parts.items()) for parts in components]
+    return crews, pools, components, costs
+
+def solve_group(group: List[int], crews: List[int], pools: List[Dict], costs: List[np.ndarray]) -> Dict[int, List[int]]:
+    """Pool positions picked for each project of an overlapping group"""
+    slots = sum(crews[p] for p in group)
+    kept = {}
+    for p in group:
+        if len(costs[p]) > slots:
+            kept[p] = np.argpartition(costs[p], slots - 1)[:slots]
+        else:
+            kept[p] = np.arange(len(costs[p]))
+    edge_ids = np.concatenate([pools[p]['ids'][kept[p]] for p in group] + [np.zeros(0, dtype=np.int64)])
+    freelancers, edge_columns = np.unique(edge_ids, return_inverse=True)
+    
+    # Costs are shifted by 1 because the sparse matrix drops zeros. Each slot
+    # also has its own "unfilled" column, dearer than any set of real edges,
+    # so a full matching always exists and as many slots as possible are filled.
+    highest = max([float(costs[p][kept[p]].max()) for p in group if len(kept[p])] + [0.0])
+    unfilled = (highest + 1) * (slots + 1)
+    rows, cols, data = [], [], []
+    owner = []
+    offset = 0
+    for p in group:
+        project_columns = edge_columns[offset:offset + len(kept[p])]
+        offset += len(kept[p])
+        for _ in range(crews[p]):
+            slot = len(owner)
+            owner.append(p)
+            rows.append(np.full(len(project_columns) + 1, slot))
+            cols.append(np.append(project_columns, len(freelancers) + slot))
+            data.append(np.append(costs[p][kept[p]] + 1, unfilled))
+    graph = csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                       shape=(slots, len(freelancers) + slots))
+    slot_index, column_index = min_weight_full_bipartite_matching(graph)
+    
+    picked = {p: [] for p in group}
+    position = {p: {int(i): k for k, i in zip(kept[p], pools[p]['ids'][kept[p]])} for p in group}
+    for slot, column in zip(slot_index, column_index):
+        if column < len(freelancers):
+            p = owner[slot]
+            picked[p].append(position[p][int(freelancers[column])])
+    return picked
+
+def optimize(snapshot: matching.MatchingSnapshot, projects: List[Dict]) -> Dict:
+    """Crews for all the projects at the lowest total cost
+    
+    Projects are dicts like projects rows, plus an optional 'cuadrilla'
+    (crew size, see crew_size) and 'skills' required on top of the producto.
+    Returns 'proyectos', per project in the order given: 'proyecto',
+    'cuadrilla' (snapshot rows plus 'costo' and 'componentes', cheapest
+    first) and 'faltantes' (slots nobody free can fill); and 'costo_total'.
+    """
+    crews, pools, components, costs = project_costs(snapshot, projects)
+    picked = {}
+    for group in overlapping_groups(projects):
+        picked.update(solve_group(group, crews, pools, costs))
+    
+    plan = []
+    total = 0.0
+    for p, project in enumerate(projects):
+        chosen = sorted(picked.get(p, []), key=lambda k: costs[p][k])
+        rows = {row['id']: row for row in snapshot.rows(pools[p]['ids'][chosen].tolist())}
+        crew = []
+        for k in chosen:
+            row = rows.get(int(pools[p]['ids'][k]))
+            if row is None:
+                continue
+            minutes = pools[p]['minutos'][k]
+            crew.append({
+                **row,
+                'minutos': round(float(minutes)) if np.isfinite(minutes) else None,
+                'costo': round(float(costs[p][k]), 3),
+                'componentes': {name: round(float(values[k]), 3) for name, values in components[p].items()}
+            })
+            total += float(costs[p][k])
+        plan.append({'proyecto': project, 'cuadrilla': crew, 'faltantes': crews[p] - len(crew)})
+    return {'proyectos': plan, 'costo_total': round(total, 3)}
+
+def assign(backend, plan: Dict) -> Tuple[int, List[str]]:
+    """Record a plan's crews, one backend.assign_crew() transaction per project with an id
+    
+    Returns the assignments made and, per crew rejected as a whole (someone
+    booked since the plan was made), its project and the backend's message.
+    """
+    made, rejected = 0, []
+    for entry in plan['proyectos']:
+        project = entry['proyecto']
+        if not project.get('id') or not entry['cuadrilla']:
+            continue
+        dates = {field: project[field] for field in ('fecha_inicio', 'fecha_fin') if project.get(field)}
+        try:
+            made += len(backend.assign_crew(project['id'], [member['id'] for member in entry['cuadrilla']], dates))
+        except ValueError as e:
+            rejected.append(f"{project.get('nombre') or project['id']}: {e}")
+    return made, rejected
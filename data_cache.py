@@ -0,0 +1,196 @@
+"""
+In-process read-through cache for the FAMS data layer
+
+Read functions are wrapped with @cached and keyed by function and arguments.
+Each entry carries tags; write functions call invalidate() with the tags they
+affect, so only the entries that can have changed are dropped. Entries also
+expire after a TTL, and the least recently used ones are evicted once the
+cache is full.
+
+Cached values are shared between sessions: callers must treat them as
+read-only.
+"""
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Optional
+
+DEFAULT_TTL = 60       # seconds
+DEFAULT_MAX_ENTRIES = 512
+
+class TTLCache:
+    """Size-bounded LRU cache with per-entry TTL and tag-based invalidation"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, tags, value)
+        self._tag_keys = {}            # tag -> set of keys
+        self._tag_versions = {}        # tag -> invalidation counter
+        self._lock = threading.Lock()
+        self._counters = {}            # function name -> {'hits': n, 'misses': n}
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: tuple):
+        """Return (True, value) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._count(key[0], 'misses')
+                return False, None
+            if entry[0] < time.monotonic():
+                self._drop(key)
+                self._count(key[0], 'misses')
+                return False, None
+            self._entries.move_to_end(key)
+            self._count(key[0], 'hits')
+            return True, entry[2]
+
+    def peek(self, function: str, pick: Callable[[Any], Any]) -> Any:
+        """First non-None pick(value) over a function's fresh entries, newest first
+
+        Doesn't count as a hit or refresh the entries' recency.
+        """
+        now = time.monotonic()
+        with self._lock:
+            values = [entry[2] for key, entry in reversed(self._entries.items())
+                      if key[0] == function and entry[0] >= now]
+        for value in values:
+            found = pick(value)
+            if found is not None:
+                return found
+        return None
+
+    def versions(self, tags: Iterable[str]) -> tuple:
+        """Snapshot of the invalidation counters for tags"""
+        with self._lock:
+            return tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def set(self, key: tuple, value: Any, tags: tuple, versions: Optional[tuple] = None, ttl: Optional[float] = None):
+        """Store value unless one of its tags was invalidated since versions was taken"""
+        with self._lock:
+            # A write landed while the value was being fetched: it may be stale
+            if versions is not None and versions != tuple(self._tag_versions.get(tag, 0) for tag in tags):
+                return
+            if key in self._entries:
+                self._drop(key)
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._entries[key] = (expires_at, tags, value)
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying any of tags; returns the number dropped"""
+        dropped = 0
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+                for key in list(self._tag_keys.get(tag, ())):
+                    self._drop(key)
+                    dropped += 1
+            self.invalidations += dropped
+        return dropped
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            for tag in self._tag_keys:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            self._entries.clear()
+            self._tag_keys.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters, overall and per function"""
+        with self._lock:
+            hits = sum(c['hits'] for c in self._counters.values())
+            misses = sum(c['misses'] for c in self._counters.values())
+            return {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0,
+                'size': len(self._entries),
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'functions': {name: dict(c) for name, c in self._counters.items()}
+            }
+
+    def _drop(self, key: tuple):
+        _, tags, _ = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def _count(self, function: str, counter: str):
+        self._counters.setdefault(function, {'hits': 0, 'misses': 0})[counter] += 1
+
+# Process-wide cache shared by every session
+_cache = TTLCache()
+
+# Callbacks told about every invalidation, e.g. to update derived indexes
+_listeners = []
+
+def cached(*tags: str, key_tags: Optional[Callable[..., Iterable[str]]] = None, ttl: Optional[float] = None):
+    """Cache a read function's result by its (normalized) arguments
+
+    tags are attached to every entry; key_tags receives the bound arguments
+    as keyword arguments and returns extra per-call tags, e.g. the row id.
+    """
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = (fn.__name__, tuple(bound.arguments.items()))
+
+            hit, value = _cache.get(key)
+            if hit:
+                return value
+
+            entry_tags = tuple(tags) + tuple(key_tags(**bound.arguments) if key_tags else ())
+            versions = _cache.versions(entry_tags)
+            value = fn(*args, **kwargs)
+            _cache.set(key, value, entry_tags, versions, ttl)
+            return value
+
+        wrapper.uncached = fn
+        return wrapper
+    return decorator
+
+def invalidate(*tags: str) -> int:
+    """Drop cached entries carrying any of tags, then notify the listeners"""
+    dropped = _cache.invalidate(*tags)
+    for listener in list(_listeners):
+        listener(tags)
+    return dropped
+
+def add_listener(callback: Callable[[tuple], None]):
+    """Call callback(tags) after every invalidate(); writes invalidate the tags they affect"""
+    _listeners.append(callback)
+
+def peek(function: str, pick: Callable[[Any], Any]) -> Any:
+    """Look inside the cached results of a function without calling it (see TTLCache.peek)"""
+    return _cache.peek(function, pick)
+
+def clear():
+    """Drop every cached entry"""
+    _cache.clear()
+
+def stats() -> Dict:
+    """Hit/miss counters for the process-wide cache"""
+    return _cache.stats()
+
+def configure(max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+    """Resize the cache and change the default TTL"""
+    _cache.max_entries = max_entries
+    _cache.ttl = ttl
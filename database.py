@@ -1,19 +1,317 @@
 """
 Database initialization and operations for FAMS (Freelance Applicator Management System)
 """
+import json
+import re
 import sqlite3
-from datetime import datetime, date
+import threading
+import weakref
+from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
 import os
 
+import data_cache
+from text_utils import parse_skills, skill_slug
+
 DB_PATH = os.path.join(os.path.dirname(__file__), 'data', 'fams.db')
 
-def init_database():
-    """Initialize database with schema"""
-    # Create data directory if it doesn't exist
+# Connection tuning applied once per connection
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 128  # prepared statements kept per connection
+PRAGMAS = [
+    ('journal_mode', 'WAL'),      # readers don't block the writer
+    ('synchronous', 'NORMAL'),    # safe with WAL, avoids an fsync per commit
+    ('busy_timeout', BUSY_TIMEOUT_MS),
+    ('cache_size', -16000),       # 16 MB page cache (negative = KiB)
+    ('mmap_size', 268435456),     # 256 MB memory-mapped reads
+    ('temp_store', 'MEMORY')
+]
+
+# Connections are pooled per process. A thread leases one on first use and
+# it returns to the pool when the thread ends: Streamlit runs every rerun on
+# a new thread, so reruns reuse tuned connections instead of opening their
+# own, and finished threads don't leave theirs open.
+POOL_SIZE = 8               # idle connections kept for the next threads
+
+_pool = []                  # idle (path, connection) pairs
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+def _connect() -> sqlite3.Connection:
+    """A new tuned connection to DB_PATH (usable from whichever thread leases it)"""
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        check_same_thread=False     # leased by one thread at a time
+    )
+    conn.row_factory = sqlite3.Row
+    for name, value in PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    return conn
+
+def _release(conn: sqlite3.Connection, path: str):
+    """Return a leased connection to the pool (closed if the pool is full or DB_PATH changed)"""
+    if conn.in_transaction:
+        # The thread ended mid-transaction
+        conn.rollback()
+    with _pool_lock:
+        if path == DB_PATH and len(_pool) < POOL_SIZE:
+            _pool.append((path, conn))
+            return
+    conn.close()
+
+class _Lease:
+    """A thread's connection; freed with the thread's local storage, which releases it"""
+    
+    def __init__(self, conn: sqlite3.Connection, path: str):
+        self.conn = conn
+        self.path = path
+        self.release = weakref.finalize(self, _release, conn, path)
+        self.release.atexit = False
+
+def get_connection() -> sqlite3.Connection:
+    """Get this thread's tuned connection to DB_PATH, leased from the pool"""
+    lease = getattr(_local, 'lease', None)
+    if lease is not None and lease.path == DB_PATH:
+        return lease.conn
     
-    conn = sqlite3.connect(DB_PATH)
+    # DB_PATH changed (or first use in this thread): lease one for the current path
+    if lease is not None:
+        lease.release()
+    conn = None
+    with _pool_lock:
+        while _pool and conn is None:
+            path, idle = _pool.pop()
+            if path == DB_PATH:
+                conn = idle
+            else:
+                idle.close()
+    if conn is None:
+        conn = _connect()
+    _local.lease = _Lease(conn, DB_PATH)
+    return conn
+
+def close_connection():
+    """Close this thread's connection and the idle ones in the pool"""
+    lease = getattr(_local, 'lease', None)
+    if lease is not None:
+        lease.release.detach()
+        lease.conn.close()
+        _local.lease = None
+    with _pool_lock:
+        while _pool:
+            _pool.pop()[1].close()
+
+# Rating dimensions scored 1-5 on every rating
+RATING_DIMENSIONS = ['calidad', 'puntualidad', 'instrucciones', 'seguridad', 'profesionalismo']
+
+def _apply_rating_stats(sign: str, row: str) -> str:
+    """Trigger body statements adding (sign '') or removing (sign '-') one rating row; no ratings left rates 0"""
+    columns = ", ".join(f"sum_{d}" for d in RATING_DIMENSIONS)
+    values = ", ".join(f"{sign}{row}.{d}" for d in RATING_DIMENSIONS)
+    updates = ", ".join(f"sum_{d} = sum_{d} + excluded.sum_{d}" for d in RATING_DIMENSIONS)
+    return f'''
+            INSERT INTO freelancer_rating_stats (freelancer_id, ratings_count, sum_general, {columns})
+            SELECT freelancer_id, {sign}1, {sign}{row}.rating_general, {values}
+            FROM assignments WHERE id = {row}.assignment_id
+            ON CONFLICT (freelancer_id) DO UPDATE SET
+                ratings_count = ratings_count + excluded.ratings_count,
+                sum_general = sum_general + excluded.sum_general,
+                {updates};
+            UPDATE freelancers
+            SET rating_promedio = (
+                SELECT CASE WHEN ratings_count > 0 THEN ROUND(sum_general / ratings_count, 2) ELSE 0 END
+                FROM freelancer_rating_stats WHERE freelancer_id = freelancers.id
+            )
+            WHERE id = (SELECT freelancer_id FROM assignments WHERE id = {row}.assignment_id);'''
+
+# Skills index helpers
+
+def _sync_freelancer_skills(conn: sqlite3.Connection, freelancer_id: int, skills: Optional[str]):
+    """Rebuild a freelancer's rows in freelancer_skills from the skills text column"""
+    _sync_skills_batch(conn, [(freelancer_id, skills)])
+
+def _sync_skills_batch(conn: sqlite3.Connection, rows: List[tuple]):
+    """Rebuild freelancer_skills for many (freelancer_id, skills) pairs, one batch per statement"""
+    conn.executemany("DELETE FROM freelancer_skills WHERE freelancer_id = ?", [(row[0],) for row in rows])
+    
+    pairs = [(freelancer_id, name) for freelancer_id, skills in rows for name in parse_skills(skills)]
+    if not pairs:
+        return
+    
+    names = {skill_slug(name): name for _, name in reversed(pairs)}
+    conn.executemany(
+        "INSERT OR IGNORE INTO skills (nombre, slug) VALUES (?, ?)",
+        [(name, slug) for slug, name in names.items()]
+    )
+    skill_ids = dict(conn.execute(
+        "SELECT slug, id FROM skills WHERE slug IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(names)),)
+    ).fetchall())
+    conn.executemany(
+        "INSERT OR IGNORE INTO freelancer_skills (freelancer_id, skill_id) VALUES (?, ?)",
+        [(freelancer_id, skill_ids[skill_slug(name)]) for freelancer_id, name in pairs]
+    )
+
+def _backfill_freelancer_skills(conn: sqlite3.Connection):
+    """Parse the existing skills column of every freelancer into the skills index"""
+    rows = conn.execute("SELECT id, skills FROM freelancers WHERE skills IS NOT NULL").fetchall()
+    _sync_skills_batch(conn, [(row['id'], row['skills']) for row in rows])
+
+def _skills_subquery(skills: List[str], match_all: bool = True) -> tuple:
+    """SQL selecting ids of freelancers with all (or any) of the given skills"""
+    slugs = sorted(set(skill_slug(s) for s in skills if skill_slug(s)))
+    placeholders = ", ".join("?" for _ in slugs)
+    sql = f'''
+        SELECT fs.freelancer_id FROM freelancer_skills fs
+        JOIN skills s ON s.id = fs.skill_id
+        WHERE s.slug IN ({placeholders})
+        GROUP BY fs.freelancer_id
+    '''
+    params = list(slugs)
+    if match_all:
+        sql += " HAVING COUNT(*) = ?"
+        params.append(len(slugs))
+    return sql, params
+
+# An assignment with no end date (nor its project) books this many days from its start
+OPEN_ASSIGNMENT_DAYS = 30
+
+# Versioned schema migrations. Each entry is applied once, in order, and
+# PRAGMA user_version records how many have run on a given database file.
+# Entries are SQL strings or callables taking the connection (for backfills).
+MIGRATIONS = [
+    # 1: secondary indexes for list filters, dashboard counts, sorting and joins
+    [
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_rating_nombre ON freelancers(rating_promedio DESC, nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_distrito_rating ON freelancers(distrito, rating_promedio DESC, nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_estado_disponible ON freelancers(estado, disponible, rating_promedio)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_estado ON projects(estado)",
+        "CREATE INDEX IF NOT EXISTS idx_projects_created_at ON projects(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_assignments_freelancer ON assignments(freelancer_id, project_id)",
+        "CREATE INDEX IF NOT EXISTS idx_assignments_project ON assignments(project_id, freelancer_id)",
+        "CREATE INDEX IF NOT EXISTS idx_ratings_assignment ON ratings(assignment_id)",
+        "CREATE INDEX IF NOT EXISTS idx_contact_log_freelancer_fecha ON contact_log(freelancer_id, fecha DESC)"
+    ],
+    # 2: accent-insensitive full-text index over freelancers, kept in sync by triggers
+    [
+        '''CREATE VIRTUAL TABLE IF NOT EXISTS freelancers_fts USING fts5(
+            nombre, skills, notas, distrito,
+            content='freelancers', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )''',
+        '''CREATE TRIGGER IF NOT EXISTS freelancers_fts_insert AFTER INSERT ON freelancers BEGIN
+            INSERT INTO freelancers_fts (rowid, nombre, skills, notas, distrito)
+            VALUES (new.id, new.nombre, new.skills, new.notas, new.distrito);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS freelancers_fts_delete AFTER DELETE ON freelancers BEGIN
+            INSERT INTO freelancers_fts (freelancers_fts, rowid, nombre, skills, notas, distrito)
+            VALUES ('delete', old.id, old.nombre, old.skills, old.notas, old.distrito);
+        END''',
+        '''CREATE TRIGGER IF NOT EXISTS freelancers_fts_update AFTER UPDATE OF nombre, skills, notas, distrito ON freelancers BEGIN
+            INSERT INTO freelancers_fts (freelancers_fts, rowid, nombre, skills, notas, distrito)
+            VALUES ('delete', old.id, old.nombre, old.skills, old.notas, old.distrito);
+            INSERT INTO freelancers_fts (rowid, nombre, skills, notas, distrito)
+            VALUES (new.id, new.nombre, new.skills, new.notas, new.distrito);
+        END''',
+        "INSERT INTO freelancers_fts (freelancers_fts) VALUES ('rebuild')"
+    ],
+    # 3: normalized skills dictionary with an inverted index, backfilled from freelancers.skills
+    [
+        '''CREATE TABLE IF NOT EXISTS skills (
+            id INTEGER PRIMARY KEY,
+            nombre VARCHAR(50) NOT NULL,
+            slug VARCHAR(50) NOT NULL UNIQUE
+        )''',
+        '''CREATE TABLE IF NOT EXISTS freelancer_skills (
+            freelancer_id INTEGER NOT NULL,
+            skill_id INTEGER NOT NULL,
+            PRIMARY KEY (freelancer_id, skill_id),
+            FOREIGN KEY (freelancer_id) REFERENCES freelancers(id),
+            FOREIGN KEY (skill_id) REFERENCES skills(id)
+        ) WITHOUT ROWID''',
+        "CREATE INDEX IF NOT EXISTS idx_freelancer_skills_skill ON freelancer_skills(skill_id, freelancer_id)",
+        '''CREATE TRIGGER IF NOT EXISTS freelancer_skills_delete AFTER DELETE ON freelancers BEGIN
+            DELETE FROM freelancer_skills WHERE freelancer_id = old.id;
+        END''',
+        _backfill_freelancer_skills
+    ],
+    # 4: running rating sums per freelancer, maintained by triggers on ratings
+    [
+        f'''CREATE TABLE IF NOT EXISTS freelancer_rating_stats (
+            freelancer_id INTEGER PRIMARY KEY,
+            ratings_count INTEGER NOT NULL DEFAULT 0,
+            sum_general REAL NOT NULL DEFAULT 0,
+            {", ".join(f"sum_{d} INTEGER NOT NULL DEFAULT 0" for d in RATING_DIMENSIONS)},
+            FOREIGN KEY (freelancer_id) REFERENCES freelancers(id)
+        )''',
+        f"CREATE TRIGGER IF NOT EXISTS rating_stats_insert AFTER INSERT ON ratings BEGIN {_apply_rating_stats('', 'new')} END",
+        f"CREATE TRIGGER IF NOT EXISTS rating_stats_delete AFTER DELETE ON ratings BEGIN {_apply_rating_stats('-', 'old')} END",
+        f"CREATE TRIGGER IF NOT EXISTS rating_stats_update AFTER UPDATE ON ratings BEGIN {_apply_rating_stats('-', 'old')} {_apply_rating_stats('', 'new')} END",
+        lambda conn: rebuild_rating_stats(conn=conn)
+    ],
+    # 5: covering index for the facet counts (distrito and availability per row)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_distrito_disponible ON freelancers(distrito, disponible)"
+    ],
+    # 6: indexes matching the other list sort orders (see SORTS)
+    [
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_rating_asc_nombre ON freelancers(rating_promedio, nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_nombre ON freelancers(nombre)",
+        "CREATE INDEX IF NOT EXISTS idx_freelancers_distrito_nombre ON freelancers(distrito, nombre)"
+    ],
+    # 7: declared unavailability for the availability calendar; freelancers marked
+    # Ocupado so far keep that for OPEN_ASSIGNMENT_DAYS, since sync_disponible now derives it
+    [
+        '''CREATE TABLE IF NOT EXISTS unavailability (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            freelancer_id INTEGER NOT NULL,
+            fecha_inicio DATE NOT NULL,
+            fecha_fin DATE NOT NULL,
+            motivo VARCHAR(100),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            CHECK (fecha_fin >= fecha_inicio),
+            FOREIGN KEY (freelancer_id) REFERENCES freelancers(id)
+        )''',
+        "CREATE INDEX IF NOT EXISTS idx_unavailability_freelancer ON unavailability(freelancer_id, fecha_inicio)",
+        "CREATE INDEX IF NOT EXISTS idx_unavailability_fecha_fin ON unavailability(fecha_fin)",
+        "CREATE INDEX IF NOT EXISTS idx_assignments_fecha_fin ON assignments(fecha_fin)",
+        '''CREATE TRIGGER IF NOT EXISTS unavailability_delete AFTER DELETE ON freelancers BEGIN
+            DELETE FROM unavailability WHERE freelancer_id = old.id;
+        END''',
+        f'''INSERT INTO unavailability (freelancer_id, fecha_inicio, fecha_fin, motivo)
+            SELECT id, date('now'), date('now', '+{OPEN_ASSIGNMENT_DAYS} days'), 'Marcado como ocupado'
+            FROM freelancers WHERE disponible = 0'''
+    ]
+]
+
+# bm25 column weights for freelancers_fts (nombre, skills, notas, distrito)
+FTS_WEIGHTS = (10.0, 5.0, 1.0, 2.0)
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations and return the resulting schema version"""
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    for target in range(version + 1, len(MIGRATIONS) + 1):
+        with conn:
+            # DDL doesn't open an implicit transaction, so start one explicitly
+            conn.execute("BEGIN")
+            for statement in MIGRATIONS[target - 1]:
+                if callable(statement):
+                    statement(conn)
+                else:
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {target}")
+        version = target
+    
+    return version
+
+def init_database():
+    """Initialize database with schema"""
+    conn = get_connection()
     cursor = conn.cursor()
     
     # 1. Freelancers table
@@ -97,14 +395,14 @@ def init_database():
     ''')
     
     conn.commit()
-    conn.close()
     
-    print(f"✅ Database initialized at: {DB_PATH}")
+    version = migrate(conn)
+    
+    print(f"✅ Database initialized at: {DB_PATH} (schema v{version})")
 
 def insert_sample_data():
     """Insert sample freelancers for testing"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = get_connection()
     
     sample_freelancers = [
         ('12345678', 'Juan Carlos Pérez', '987654321', 'jperez@email.com', 'San Juan de Lurigancho', None, 'JP01Y, Epóxico, Rodillo', 4.5, 'Activo', 1, 'Muy confiable, trabaja hace 2 años'),
@@ -120,164 +418,845 @@ def insert_sample_data():
     ]
     
     try:
-        cursor.executemany('''
-            INSERT INTO freelancers (dni, nombre, telefono, email, distrito, foto_path, skills, rating_promedio, estado, disponible, notas)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', sample_freelancers)
+        with conn:
+            conn.executemany('''
+                INSERT INTO freelancers (dni, nombre, telefono, email, distrito, foto_path, skills, rating_promedio, estado, disponible, notas)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', sample_freelancers)
+            _backfill_freelancer_skills(conn)
         
-        conn.commit()
         print(f"✅ Inserted {len(sample_freelancers)} sample freelancers")
     except sqlite3.IntegrityError:
         print("⚠️ Sample data already exists, skipping...")
-    finally:
-        conn.close()
+
+# Full-text search
+
+def fts_query(text: str, column: Optional[str] = None) -> str:
+    """Build an FTS5 MATCH expression: every word as a prefix, all required"""
+    # Keep only word characters so user input can't inject FTS5 syntax;
+    # accents are folded by the unicode61 tokenizer on both sides
+    terms = " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+    if not terms:
+        return ""
+    return f"{column} : ({terms})" if column else terms
+
+def search_freelancers(text: str, limit: int = 20) -> List[Dict]:
+    """Ranked, accent-insensitive prefix search over nombre, skills, notas and distrito"""
+    match = fts_query(text)
+    if not match:
+        return []
+    
+    conn = get_connection()
+    weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+    rows = conn.execute(f'''
+        SELECT f.*, bm25(freelancers_fts, {weights}) AS score
+        FROM freelancers_fts
+        JOIN freelancers f ON f.id = freelancers_fts.rowid
+        WHERE freelancers_fts MATCH ?
+        ORDER BY score
+        LIMIT ?
+    ''', (match, limit))
+    
+    return [dict(row) for row in rows]
 
 # CRUD Operations
 
-def get_all_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "") -> List[Dict]:
-    """Get all freelancers with optional filters"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+# Default page size for keyset pagination (a multiple of the 4-column grid)
+PAGE_SIZE = 24
+
+# Columns a list query may project; None selects the full row
+FREELANCER_COLUMNS = ('id', 'dni', 'nombre', 'telefono', 'email', 'distrito', 'foto_path', 'skills',
+                      'rating_promedio', 'estado', 'disponible', 'notas', 'created_at')
+
+# Slim projection for list and card views (detail views fetch the full row)
+LIST_COLUMNS = ('id', 'nombre', 'distrito', 'rating_promedio', 'disponible')
+
+# Sort orders for the list queries: (column, descending) pairs ending in id,
+# so the order is total and a row's sort values are its keyset cursor
+SORTS = {
+    'rating_desc': (('rating_promedio', True), ('nombre', False), ('id', False)),
+    'rating_asc': (('rating_promedio', False), ('nombre', False), ('id', False)),
+    'nombre': (('nombre', False), ('id', False))
+}
+DEFAULT_SORT = 'rating_desc'
+
+def _select_list(columns: Optional[tuple] = None, required: tuple = ()) -> str:
+    """SELECT list for a projection, validated against FREELANCER_COLUMNS"""
+    if columns is None:
+        return "*"
     
-    query = "SELECT * FROM freelancers WHERE 1=1"
-    params = []
+    unknown = set(columns) - set(FREELANCER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown freelancer columns: {', '.join(sorted(unknown))}")
+    
+    return ", ".join(dict.fromkeys(tuple(columns) + tuple(required)))
+
+def _filter_conditions(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                       disponible: Optional[bool] = None, estado: str = "",
+                       rating_min: Optional[float] = None, rating_max: Optional[float] = None) -> Dict[str, tuple]:
+    """SQL condition and parameters for each active list filter, keyed by facet"""
+    conditions = {}
     
-    if search_term:
-        query += " AND nombre LIKE ?"
-        params.append(f"%{search_term}%")
+    # Name search goes through the full-text index
+    name_match = fts_query(search_term, 'nombre')
+    if name_match:
+        conditions['search'] = ("id IN (SELECT rowid FROM freelancers_fts WHERE freelancers_fts MATCH ?)", [name_match])
     
-    if skill_filter:
-        query += " AND skills LIKE ?"
-        params.append(f"%{skill_filter}%")
+    # Skills match exactly through the skills index ("Epóxico, Spray" = both)
+    skills = parse_skills(skill_filter)
+    if skills:
+        skills_sql, skills_params = _skills_subquery(skills)
+        conditions['skills'] = (f"id IN ({skills_sql})", skills_params)
     
     if distrito_filter:
+        conditions['distrito'] = ("distrito = ?", [distrito_filter])
+    
+    if disponible is not None:
+        conditions['disponible'] = ("disponible = ?", [int(disponible)])
+    
+    if estado:
+        conditions['estado'] = ("estado = ?", [estado])
+    
+    if rating_min is not None:
+        conditions['rating_min'] = ("rating_promedio >= ?", [rating_min])
+    
+    if rating_max is not None:
+        conditions['rating_max'] = ("rating_promedio <= ?", [rating_max])
+    
+    return conditions
+
+def _freelancer_filters(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                        disponible: Optional[bool] = None, estado: str = "",
+                        rating_min: Optional[float] = None, rating_max: Optional[float] = None) -> tuple:
+    """WHERE clause and parameters shared by the freelancer list queries"""
+    where = "1=1"
+    params = []
+    
+    conditions = _filter_conditions(search_term, skill_filter, distrito_filter, disponible, estado, rating_min, rating_max)
+    for sql, condition_params in conditions.values():
+        where += f" AND {sql}"
+        params.extend(condition_params)
+    
+    return where, params
+
+def _keyset_condition(sort: str, cursor: tuple) -> tuple:
+    """WHERE condition selecting the rows after cursor in the given sort order"""
+    keys = SORTS[sort]
+    
+    # (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ..., with < for descending keys
+    terms = []
+    params = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [f"{key} = ?" for key, _ in keys[:i]]
+        terms.append(" AND ".join(equal + [f"{column} {'<' if descending else '>'} ?"]))
+        params.extend(list(cursor[:i]) + [cursor[i]])
+    
+    # The leading bound lets SQLite seek in the sort index; the OR only
+    # resolves ties on the cursor's own leading value
+    first, descending = keys[0]
+    sql = f"{first} {'<=' if descending else '>='} ? AND ({' OR '.join(f'({t})' for t in terms)})"
+    
+    return sql, [cursor[0]] + params
+
+def query_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                      disponible: Optional[bool] = None, estado: str = "",
+                      rating_min: Optional[float] = None, rating_max: Optional[float] = None,
+                      sort: str = DEFAULT_SORT, cursor: Optional[tuple] = None,
+                      limit: Optional[int] = PAGE_SIZE, columns: Optional[tuple] = None) -> Dict:
+    """Filtered, sorted and keyset-paginated freelancer list
+    
+    sort is a key of SORTS. cursor holds the sort values of the last row of the
+    previous page (None for the first page). Returns {'items': [...],
+    'next_cursor': ...}; next_cursor is None on the last page. limit None
+    returns every matching row in one query. columns projects the rows (e.g.
+    LIST_COLUMNS); the sort columns are always included.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    
+    conn = get_connection()
+    
+    where, params = _freelancer_filters(search_term, skill_filter, distrito_filter, disponible,
+                                        estado, rating_min, rating_max)
+    
+    if cursor is not None:
+        keyset_sql, keyset_params = _keyset_condition(sort, cursor)
+        where += f" AND {keyset_sql}"
+        params.extend(keyset_params)
+    
+    keys = SORTS[sort]
+    order_by = ", ".join(f"{column}{' DESC' if descending else ''}" for column, descending in keys)
+    query = (f"SELECT {_select_list(columns, tuple(column for column, _ in keys))} FROM freelancers "
+             f"WHERE {where} ORDER BY {order_by}")
+    
+    if limit is None:
+        return {'items': [dict(row) for row in conn.execute(query, params)], 'next_cursor': None}
+    
+    rows = [dict(row) for row in conn.execute(f"{query} LIMIT ?", params + [limit + 1])]
+    
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = tuple(items[-1][column] for column, _ in keys)
+    
+    return {'items': items, 'next_cursor': next_cursor}
+
+def get_all_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                        columns: Optional[tuple] = None, disponible: Optional[bool] = None) -> List[Dict]:
+    """Get all freelancers with optional filters, projected on columns (None = full rows)"""
+    return query_freelancers(search_term, skill_filter, distrito_filter, disponible,
+                             limit=None, columns=columns)['items']
+
+def get_freelancers_page(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                         cursor: Optional[tuple] = None, limit: int = PAGE_SIZE,
+                         columns: Optional[tuple] = None, disponible: Optional[bool] = None) -> Dict:
+    """One page of freelancers ordered by rating DESC, nombre, id (see query_freelancers)"""
+    return query_freelancers(search_term, skill_filter, distrito_filter, disponible,
+                             cursor=cursor, limit=limit, columns=columns)
+
+def get_facets(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+               disponible: Optional[bool] = None, estado: str = "",
+               rating_min: Optional[float] = None, rating_max: Optional[float] = None) -> Dict:
+    """Distrito, skill and availability counts for the current filters, in one query
+    
+    Each facet is counted with every filter except its own, so its options stay
+    selectable. 'total' is the number of rows matching all the filters.
+    """
+    conn = get_connection()
+    
+    conditions = _filter_conditions(search_term, skill_filter, distrito_filter, disponible, estado, rating_min, rating_max)
+    
+    # One flag per facet filter (1 when inactive); the other filters apply to all
+    flags = []
+    params = []
+    for facet in ('distrito', 'skills', 'disponible'):
+        sql, condition_params = conditions.pop(facet, ("1", []))
+        flags.append(f"({sql}) AS match_{facet}")
+        params.extend(condition_params)
+    
+    common_sql = " AND ".join(["1=1"] + [sql for sql, _ in conditions.values()])
+    for _, condition_params in conditions.values():
+        params.extend(condition_params)
+    
+    rows = conn.execute(f'''
+        WITH base AS (
+            SELECT id, distrito, disponible, {", ".join(flags)}
+            FROM freelancers
+            WHERE {common_sql}
+        )
+        SELECT 'distrito' AS facet, distrito AS value, COUNT(*) AS count
+        FROM base WHERE match_skills AND match_disponible AND distrito IS NOT NULL
+        GROUP BY distrito
+        UNION ALL
+        SELECT 'disponible', disponible, COUNT(*)
+        FROM base WHERE match_distrito AND match_skills
+        GROUP BY disponible
+        UNION ALL
+        SELECT 'skills', s.nombre, COUNT(*)
+        FROM base
+        JOIN freelancer_skills fs ON fs.freelancer_id = base.id
+        JOIN skills s ON s.id = fs.skill_id
+        WHERE match_distrito AND match_disponible
+        GROUP BY s.id
+        UNION ALL
+        SELECT 'total', NULL, COUNT(*)
+        FROM base WHERE match_distrito AND match_skills AND match_disponible
+    ''', params).fetchall()
+    
+    facets = {'total': 0, 'distritos': [], 'skills': [], 'disponibilidad': []}
+    for row in rows:
+        if row['facet'] == 'total':
+            facets['total'] = row['count']
+        elif row['facet'] == 'distrito':
+            facets['distritos'].append({'value': row['value'], 'count': row['count']})
+        elif row['facet'] == 'skills':
+            facets['skills'].append({'value': row['value'], 'count': row['count']})
+        else:
+            facets['disponibilidad'].append({'value': bool(row['value']), 'count': row['count']})
+    
+    facets['distritos'].sort(key=lambda f: f['value'])
+    facets['skills'].sort(key=lambda f: (-f['count'], f['value']))
+    
+    return facets
+
+def get_distritos() -> List[str]:
+    """Distritos that have at least one freelancer"""
+    return [f['value'] for f in get_facets()['distritos']]
+
+def find_freelancers_by_skills(skills: List[str], match_all: bool = True, distrito: str = "") -> List[Dict]:
+    """Freelancers having all (match_all) or any of the given skills, optionally in one distrito"""
+    if not skills:
+        return []
+    
+    conn = get_connection()
+    skills_sql, params = _skills_subquery(skills, match_all)
+    query = f"SELECT * FROM freelancers WHERE id IN ({skills_sql})"
+    
+    if distrito:
         query += " AND distrito = ?"
-        params.append(distrito_filter)
+        params.append(distrito)
     
     query += " ORDER BY rating_promedio DESC, nombre"
     
-    cursor.execute(query, params)
-    freelancers = [dict(row) for row in cursor.fetchall()]
-    conn.close()
+    return [dict(row) for row in conn.execute(query, params)]
+
+def get_skills() -> List[Dict]:
+    """Skills dictionary with the number of freelancers having each skill"""
+    conn = get_connection()
     
-    return freelancers
+    rows = conn.execute('''
+        SELECT skills.id, skills.nombre, skills.slug, COUNT(freelancer_skills.freelancer_id) AS freelancers
+        FROM skills
+        LEFT JOIN freelancer_skills ON freelancer_skills.skill_id = skills.id
+        GROUP BY skills.id
+        ORDER BY skills.nombre
+    ''')
+    
+    return [dict(row) for row in rows]
 
 def get_freelancer_by_id(freelancer_id: int) -> Optional[Dict]:
     """Get single freelancer by ID"""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    conn = get_connection()
     
-    cursor.execute("SELECT * FROM freelancers WHERE id = ?", (freelancer_id,))
-    result = cursor.fetchone()
-    conn.close()
+    result = conn.execute("SELECT * FROM freelancers WHERE id = ?", (freelancer_id,)).fetchone()
     
     return dict(result) if result else None
 
+# Contact log entries embedded in a profile
+PROFILE_CONTACTS = 10
+
+CONTACT_COLUMNS = ('id', 'freelancer_id', 'fecha', 'tipo', 'notas')
+ASSIGNMENT_COLUMNS = ('id', 'project_id', 'freelancer_id', 'fecha_inicio', 'fecha_fin', 'tarifa_m2',
+                      'monto_total', 'estado_pago')
+PROJECT_COLUMNS = ('id', 'nombre', 'cliente', 'ubicacion', 'fecha_inicio', 'fecha_fin', 'metros_cuadrados',
+                   'producto', 'estado', 'created_at')
+RATING_COLUMNS = ('id', 'assignment_id', *RATING_DIMENSIONS, 'rating_general', 'comentarios', 'fecha')
+
+def _json_object(alias: str, columns: tuple) -> str:
+    """json_object('col', alias.col, ...) for a row of alias"""
+    pairs = ", ".join(f"'{column}', {alias}.{column}" for column in columns)
+    return f"json_object({pairs})"
+
+def get_freelancer_profile(freelancer_id: int, contacts_limit: int = PROFILE_CONTACTS) -> Optional[Dict]:
+    """Freelancer row plus its history, in one statement (same layout as database_supabase)
+    
+    Adds 'contact_history' (newest first), 'projects' (assignments with their
+    project under 'projects') and 'ratings' (newest first, with 'proyecto').
+    """
+    conn = get_connection()
+    
+    # Subquery columns lose their JSON subtype, so nested objects go through json()
+    row = conn.execute(f'''
+        SELECT f.*,
+            (SELECT json_group_array(json(item)) FROM (
+                SELECT {_json_object('c', CONTACT_COLUMNS)} AS item FROM contact_log c
+                WHERE c.freelancer_id = f.id
+                ORDER BY c.fecha DESC, c.id DESC LIMIT ?
+            )) AS contact_history,
+            (SELECT json_group_array(json(item)) FROM (
+                SELECT json_set({_json_object('a', ASSIGNMENT_COLUMNS)}, '$.projects',
+                                CASE WHEN p.id IS NULL THEN NULL ELSE json({_json_object('p', PROJECT_COLUMNS)}) END) AS item
+                FROM assignments a
+                LEFT JOIN projects p ON p.id = a.project_id
+                WHERE a.freelancer_id = f.id
+                ORDER BY a.fecha_inicio DESC, a.id DESC
+            )) AS projects,
+            (SELECT json_group_array(json(item)) FROM (
+                SELECT json_set({_json_object('r', RATING_COLUMNS)}, '$.proyecto', COALESCE(p.nombre, 'Unknown')) AS item
+                FROM assignments a
+                JOIN ratings r ON r.assignment_id = a.id
+                LEFT JOIN projects p ON p.id = a.project_id
+                WHERE a.freelancer_id = f.id
+                ORDER BY r.fecha DESC, r.id DESC
+            )) AS ratings
+        FROM freelancers f
+        WHERE f.id = ?
+    ''', (contacts_limit, freelancer_id)).fetchone()
+    
+    if not row:
+        return None
+    
+    profile = dict(row)
+    for key in ('contact_history', 'projects', 'ratings'):
+        profile[key] = json.loads(profile[key])
+    
+    return profile
+
+def peek_list_row(freelancer_id: int) -> Optional[Dict]:
+    """The local backend has no list cache to seed a profile from"""
+    return None
+
 def add_freelancer(data: Dict) -> int:
     """Add new freelancer"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = get_connection()
     
-    cursor.execute('''
-        INSERT INTO freelancers (dni, nombre, telefono, email, distrito, skills, rating_promedio, disponible, notas)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (
-        data.get('dni'),
-        data['nombre'],
-        data['telefono'],
-        data.get('email'),
-        data.get('distrito'),
-        data.get('skills'),
-        data.get('rating_promedio', 0),
-        data.get('disponible', 1),
-        data.get('notas')
-    ))
-    
-    freelancer_id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO freelancers (dni, nombre, telefono, email, distrito, skills, rating_promedio, notas)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (
+            data.get('dni'),
+            data['nombre'],
+            data['telefono'],
+            data.get('email'),
+            data.get('distrito'),
+            data.get('skills'),
+            data.get('rating_promedio', 0),
+            data.get('notas')
+        ))
+        freelancer_id = cursor.lastrowid
+        _sync_freelancer_skills(conn, freelancer_id, data.get('skills'))
+    data_cache.invalidate('freelancers', 'stats', f'freelancer:{freelancer_id}')
     
     return freelancer_id
 
 def update_freelancer(freelancer_id: int, data: Dict):
     """Update existing freelancer"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = get_connection()
     
-    cursor.execute('''
-        UPDATE freelancers
-        SET dni = ?, nombre = ?, telefono = ?, email = ?, distrito = ?, 
-            skills = ?, rating_promedio = ?, disponible = ?, notas = ?
-        WHERE id = ?
-    ''', (
-        data.get('dni'),
-        data['nombre'],
-        data['telefono'],
-        data.get('email'),
-        data.get('distrito'),
-        data.get('skills'),
-        data.get('rating_promedio', 0),
-        data.get('disponible', 1),
-        data.get('notas'),
-        freelancer_id
-    ))
-    
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute('''
+            UPDATE freelancers
+            SET dni = ?, nombre = ?, telefono = ?, email = ?, distrito = ?, 
+                skills = ?, rating_promedio = ?, notas = ?
+            WHERE id = ?
+        ''', (
+            data.get('dni'),
+            data['nombre'],
+            data['telefono'],
+            data.get('email'),
+            data.get('distrito'),
+            data.get('skills'),
+            data.get('rating_promedio', 0),
+            data.get('notas'),
+            freelancer_id
+        ))
+        _sync_freelancer_skills(conn, freelancer_id, data.get('skills'))
+    data_cache.invalidate('freelancers', 'stats', f'freelancer:{freelancer_id}')
 
 def delete_freelancer(freelancer_id: int):
     """Delete freelancer"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = get_connection()
     
-    cursor.execute("DELETE FROM freelancers WHERE id = ?", (freelancer_id,))
-    
-    conn.commit()
-    conn.close()
+    with conn:
+        conn.execute("DELETE FROM freelancers WHERE id = ?", (freelancer_id,))
+    data_cache.invalidate('freelancers', 'stats', f'freelancer:{freelancer_id}')
 
-def get_stats() -> Dict:
-    """Get dashboard statistics"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+def find_existing_dnis(dnis: List[str]) -> set:
+    """The given DNIs that already belong to a freelancer"""
+    if not dnis:
+        return set()
+    conn = get_connection()
+    rows = conn.execute(
+        "SELECT dni FROM freelancers WHERE dni IN (SELECT value FROM json_each(?))",
+        (json.dumps(list(dnis)),)
+    ).fetchall()
+    return {row['dni'] for row in rows}
+
+def upsert_freelancers(rows: List[Dict]) -> int:
+    """Insert a batch of freelancers in one transaction, updating those whose DNI exists
     
-    # Total freelancers
-    cursor.execute("SELECT COUNT(*) FROM freelancers WHERE estado = 'Activo'")
-    total = cursor.fetchone()[0]
+    Every row has the same keys; only those columns are written, so an
+    update keeps the columns the batch doesn't carry. Returns the row count.
+    """
+    if not rows:
+        return 0
+    columns = list(rows[0])
+    unknown = set(columns) - set(FREELANCER_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown freelancer columns: {', '.join(sorted(unknown))}")
     
-    # Available today
-    cursor.execute("SELECT COUNT(*) FROM freelancers WHERE estado = 'Activo' AND disponible = 1")
-    disponibles = cursor.fetchone()[0]
+    updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != 'dni')
+    conn = get_connection()
     
-    # In project
-    en_proyecto = total - disponibles
+    with conn:
+        last_id = conn.execute("SELECT MAX(id) FROM freelancers").fetchone()[0] or 0
+        conn.executemany(f'''
+            INSERT INTO freelancers ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})
+            ON CONFLICT (dni) DO UPDATE SET {updates}
+        ''', [tuple(row[column] for column in columns) for row in rows])
+        
+        if 'skills' in columns:
+            # The batch's rows: new ids past the previous maximum, plus the updated DNIs
+            dnis = [row['dni'] for row in rows if row.get('dni')]
+            changed = conn.execute('''
+                SELECT id, skills FROM freelancers
+                WHERE id > ? OR dni IN (SELECT value FROM json_each(?))
+            ''', (last_id, json.dumps(dnis))).fetchall()
+            _sync_skills_batch(conn, [(row['id'], row['skills']) for row in changed])
+    # Updated DNIs change cached profiles too
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
     
-    # Average rating
-    cursor.execute("SELECT AVG(rating_promedio) FROM freelancers WHERE estado = 'Activo'")
-    avg_rating = cursor.fetchone()[0] or 0
+    return len(rows)
+
+def get_stats(by_distrito: bool = False) -> Dict:
+    """Get dashboard statistics with one aggregate query, optionally broken down by distrito"""
+    conn = get_connection()
     
-    conn.close()
+    if not by_distrito:
+        row = conn.execute('''
+            SELECT COUNT(*) AS total,
+                   COALESCE(SUM(disponible = 1), 0) AS disponibles,
+                   AVG(rating_promedio) AS avg_rating
+            FROM freelancers
+            WHERE estado = 'Activo'
+        ''').fetchone()
+        return {
+            'total': row['total'],
+            'disponibles': row['disponibles'],
+            'en_proyecto': row['total'] - row['disponibles'],
+            'avg_rating': round(row['avg_rating'] or 0, 1)
+        }
+    
+    # Grouped by distrito; overall totals are summed from the groups
+    rows = conn.execute('''
+        SELECT distrito,
+               COUNT(*) AS total,
+               COALESCE(SUM(disponible = 1), 0) AS disponibles,
+               COALESCE(SUM(rating_promedio), 0) AS rating_sum
+        FROM freelancers
+        WHERE estado = 'Activo'
+        GROUP BY distrito
+        ORDER BY distrito
+    ''').fetchall()
+    
+    por_distrito = [
+        {
+            'distrito': row['distrito'],
+            'total': row['total'],
+            'disponibles': row['disponibles'],
+            'en_proyecto': row['total'] - row['disponibles'],
+            'avg_rating': round(row['rating_sum'] / row['total'], 1)
+        }
+        for row in rows
+    ]
+    total = sum(row['total'] for row in rows)
+    disponibles = sum(row['disponibles'] for row in rows)
+    rating_sum = sum(row['rating_sum'] for row in rows)
     
     return {
         'total': total,
         'disponibles': disponibles,
-        'en_proyecto': en_proyecto,
-        'avg_rating': round(avg_rating, 1)
+        'en_proyecto': total - disponibles,
+        'avg_rating': round(rating_sum / total, 1) if total else 0,
+        'por_distrito': por_distrito
     }
 
 def log_contact(freelancer_id: int, tipo: str, notas: str = ""):
     """Log contact with freelancer"""
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+    conn = get_connection()
     
-    cursor.execute('''
-        INSERT INTO contact_log (freelancer_id, tipo, notas)
-        VALUES (?, ?, ?)
-    ''', (freelancer_id, tipo, notas))
+    with conn:
+        conn.execute('''
+            INSERT INTO contact_log (freelancer_id, tipo, notas)
+            VALUES (?, ?, ?)
+        ''', (freelancer_id, tipo, notas))
+    data_cache.invalidate(f'freelancer:{freelancer_id}')
+
+# Project operations
+
+def get_all_projects() -> List[Dict]:
+    """Get all projects, newest first"""
+    conn = get_connection()
+    rows = conn.execute("SELECT * FROM projects ORDER BY created_at DESC")
+    return [dict(row) for row in rows]
+
+def add_project(data: Dict) -> int:
+    """Add new project"""
+    unknown = set(data) - set(PROJECT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown project columns: {', '.join(sorted(unknown))}")
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute(
+            f"INSERT INTO projects ({', '.join(data)}) VALUES ({', '.join('?' * len(data))})", tuple(data.values())
+        )
+    data_cache.invalidate('projects')
+    return cursor.lastrowid
+
+# Rating operations
+
+def add_rating(assignment_id: int, rating_data: Dict) -> int:
+    """Add rating for an assignment; triggers update the freelancer's aggregates in the same transaction"""
+    conn = get_connection()
     
-    conn.commit()
-    conn.close()
+    # Calculate general rating
+    rating_values = [rating_data.get(d, 0) for d in RATING_DIMENSIONS]
+    rating_general = round(sum(rating_values) / len(rating_values), 2)
+    
+    with conn:
+        cursor = conn.execute(f'''
+            INSERT INTO ratings (assignment_id, {", ".join(RATING_DIMENSIONS)}, rating_general, comentarios)
+            VALUES (?, {", ".join("?" for _ in RATING_DIMENSIONS)}, ?, ?)
+        ''', (assignment_id, *rating_values, rating_general, rating_data.get('comentarios')))
+    # The trigger changed one freelancer's rating_promedio
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
+    
+    return cursor.lastrowid
+
+def get_rating_summary(freelancer_id: int) -> Optional[Dict]:
+    """Rating count and per-dimension averages for a freelancer, read from the running aggregates"""
+    conn = get_connection()
+    
+    row = conn.execute("SELECT * FROM freelancer_rating_stats WHERE freelancer_id = ?", (freelancer_id,)).fetchone()
+    if not row or not row['ratings_count']:
+        return None
+    
+    count = row['ratings_count']
+    summary = {'freelancer_id': freelancer_id, 'ratings_count': count, 'rating_general': round(row['sum_general'] / count, 2)}
+    for d in RATING_DIMENSIONS:
+        summary[d] = round(row[f'sum_{d}'] / count, 2)
+    
+    return summary
+
+def rebuild_rating_stats(freelancer_id: Optional[int] = None, conn: Optional[sqlite3.Connection] = None):
+    """Repair job: recompute rating aggregates (and rating_promedio) from the ratings table"""
+    conn = conn or get_connection()
+    where = "WHERE a.freelancer_id = ?" if freelancer_id is not None else ""
+    params = (freelancer_id,) if freelancer_id is not None else ()
+    sums = ", ".join(f"COALESCE(SUM(r.{d}), 0)" for d in RATING_DIMENSIONS)
+    
+    stats_where = "WHERE freelancer_id = ?" if freelancer_id is not None else ""
+    
+    statements = [
+        # Freelancers whose ratings are all gone drop back to 0, like the triggers leave them
+        (f"UPDATE freelancers SET rating_promedio = 0 WHERE id IN (SELECT freelancer_id FROM freelancer_rating_stats {stats_where})", params),
+        (f"DELETE FROM freelancer_rating_stats {stats_where}", params),
+        (f'''
+            INSERT INTO freelancer_rating_stats (freelancer_id, ratings_count, sum_general, {", ".join(f"sum_{d}" for d in RATING_DIMENSIONS)})
+            SELECT a.freelancer_id, COUNT(*), COALESCE(SUM(r.rating_general), 0), {sums}
+            FROM ratings r
+            JOIN assignments a ON a.id = r.assignment_id
+            {where}
+            GROUP BY a.freelancer_id
+        ''', params),
+        (f'''
+            UPDATE freelancers
+            SET rating_promedio = (
+                SELECT ROUND(sum_general / ratings_count, 2) FROM freelancer_rating_stats
+                WHERE freelancer_id = freelancers.id
+            )
+            WHERE EXISTS (
+                SELECT 1 FROM freelancer_rating_stats
+                WHERE freelancer_id = freelancers.id AND ratings_count > 0
+            )
+            {'AND id = ?' if freelancer_id is not None else ''}
+        ''', params)
+    ]
+    
+    # Inside a migration the caller already holds the transaction
+    if conn.in_transaction:
+        for sql, args in statements:
+            conn.execute(sql, args)
+    else:
+        with conn:
+            for sql, args in statements:
+                conn.execute(sql, args)
+        data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
+
+# Availability calendar: booked and declared unavailable intervals (availability.py)
+
+def get_busy_intervals(start: str, freelancer_ids: Optional[List[int]] = None) -> List[Dict]:
+    """Intervals ending on or after start in which freelancers are booked or unavailable
+    
+    Rows have freelancer_id, fuente ('asignacion' or 'no_disponible'),
+    ref_id (the assignment or unavailability id), fecha_inicio, fecha_fin
+    and motivo. Assignments without dates take their project's; with no end
+    at all they book OPEN_ASSIGNMENT_DAYS. All freelancers when
+    freelancer_ids is None, else only those.
+    """
+    conn = get_connection()
+    if freelancer_ids is None:
+        # Open assignments (no fecha_fin) are read too, and cut by their resolved end
+        assignment_filter, unavailability_filter = "(a.fecha_fin >= ? OR a.fecha_fin IS NULL)", "u.fecha_fin >= ?"
+        params = [start, start]
+    else:
+        ids = "(SELECT value FROM json_each(?))"
+        assignment_filter, unavailability_filter = f"a.freelancer_id IN {ids}", f"u.freelancer_id IN {ids}"
+        params = [json.dumps(list(freelancer_ids))] * 2
+    
+    rows = conn.execute(f'''
+        SELECT * FROM (
+            SELECT a.freelancer_id, 'asignacion' AS fuente, a.id AS ref_id,
+                   COALESCE(a.fecha_inicio, p.fecha_inicio) AS fecha_inicio,
+                   COALESCE(a.fecha_fin, p.fecha_fin,
+                            date(COALESCE(a.fecha_inicio, p.fecha_inicio), '+{OPEN_ASSIGNMENT_DAYS} days')) AS fecha_fin,
+                   p.nombre AS motivo
+            FROM assignments a
+            LEFT JOIN projects p ON p.id = a.project_id
+            WHERE {assignment_filter}
+            UNION ALL
+            SELECT u.freelancer_id, 'no_disponible', u.id, u.fecha_inicio, u.fecha_fin, u.motivo
+            FROM unavailability u
+            WHERE {unavailability_filter}
+        )
+        WHERE fecha_inicio IS NOT NULL AND fecha_fin >= ?
+    ''', params + [start])
+    return [dict(row) for row in rows]
+
+def get_unavailability(freelancer_id: int) -> List[Dict]:
+    """A freelancer's declared unavailability, by start date"""
+    conn = get_connection()
+    rows = conn.execute('''
+        SELECT * FROM unavailability WHERE freelancer_id = ? ORDER BY fecha_inicio
+    ''', (freelancer_id,))
+    return [dict(row) for row in rows]
+
+def add_unavailability(freelancer_id: int, fecha_inicio: str, fecha_fin: str, motivo: str = "") -> int:
+    """Declare a freelancer unavailable from fecha_inicio to fecha_fin (inclusive)"""
+    if fecha_fin < fecha_inicio:
+        raise ValueError("La fecha de fin es anterior a la de inicio")
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            INSERT INTO unavailability (freelancer_id, fecha_inicio, fecha_fin, motivo) VALUES (?, ?, ?, ?)
+        ''', (freelancer_id, fecha_inicio, fecha_fin, motivo or None))
+    data_cache.invalidate('availability', f'freelancer:{freelancer_id}')
+    return cursor.lastrowid
+
+def delete_unavailability(unavailability_id: int):
+    """Delete one declared absence; disponible is left to sync_disponible, which derives it from the calendar"""
+    conn = get_connection()
+    with conn:
+        rows = conn.execute("DELETE FROM unavailability WHERE id = ? RETURNING freelancer_id",
+                            (unavailability_id,)).fetchall()
+    data_cache.invalidate('availability', *[f"freelancer:{row['freelancer_id']}" for row in rows])
+
+def sync_disponible(busy_ids: List[int]) -> int:
+    """Set disponible to False for busy_ids and True for everyone else; returns the rows changed"""
+    conn = get_connection()
+    with conn:
+        cursor = conn.execute('''
+            UPDATE freelancers SET disponible = NOT disponible
+            -- Available but busy, or marked Ocupado but free
+            WHERE disponible = (id IN (SELECT value FROM json_each(?)))
+        ''', (json.dumps(list(busy_ids)),))
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
+    return cursor.rowcount
+
+# Crew assignment: a whole crew in one transaction, rejecting double-booking
+
+def assign_crew(project_id: int, freelancer_ids: List[int], assignment_data: Optional[Dict] = None) -> List[int]:
+    """Assign freelancers to a project in one transaction; returns the new assignment ids, in order
+    
+    assignment_data holds the other assignments columns (fecha_inicio,
+    fecha_fin, tarifa_m2, ...). Nothing is written, and ValueError names
+    them, if any freelancer is booked or declared unavailable on those dates
+    (resolved like get_busy_intervals does); the resolved dates are stored.
+    disponible turns False for those whose work is under way today.
+    """
+    data = dict(assignment_data or {})
+    ids = [int(i) for i in freelancer_ids]
+    unknown = set(data) - (set(ASSIGNMENT_COLUMNS) - {'id', 'project_id', 'freelancer_id'})
+    if unknown:
+        raise ValueError(f"Unknown assignment columns: {', '.join(sorted(unknown))}")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Un aplicador figura dos veces en la cuadrilla")
+    if not ids:
+        return []
+    
+    conn = get_connection()
+    with conn:
+        # Take the write lock before checking, so no other writer books them in between
+        conn.execute("BEGIN IMMEDIATE")
+        project = conn.execute("SELECT fecha_inicio, fecha_fin FROM projects WHERE id = ?", (project_id,)).fetchone()
+        if project is None:
+            raise ValueError(f"Proyecto inexistente: {project_id}")
+        start = str(data.get('fecha_inicio') or project['fecha_inicio'] or date.today().isoformat())
+        end = str(data.get('fecha_fin') or project['fecha_fin'] or
+                  (date.fromisoformat(start[:10]) + timedelta(days=OPEN_ASSIGNMENT_DAYS)).isoformat())
+        if end < start:
+            raise ValueError("La fecha de fin es anterior a la de inicio")
+        
+        names = dict(conn.execute(
+            "SELECT id, nombre FROM freelancers WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+        ).fetchall())
+        missing = [str(i) for i in ids if i not in names]
+        if missing:
+            raise ValueError(f"Aplicadores inexistentes: {', '.join(missing)}")
+        busy = sorted({row['freelancer_id'] for row in get_busy_intervals(start, ids) if row['fecha_inicio'] <= end})
+        if busy:
+            raise ValueError(f"Doble asignación: {', '.join(names[i] for i in busy)} ya ocupados entre {start} y {end}")
+        
+        # Store the dates checked above, so the booking stays visible to the next check
+        data.update(fecha_inicio=start, fecha_fin=end)
+        columns = ['project_id', 'freelancer_id', *data]
+        sql = f"INSERT INTO assignments ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        assignment_ids = [conn.execute(sql, (project_id, i, *data.values())).lastrowid for i in ids]
+        if start <= date.today().isoformat() <= end:
+            conn.execute("UPDATE freelancers SET disponible = 0 WHERE id IN (SELECT value FROM json_each(?))",
+                         (json.dumps(ids),))
+    data_cache.invalidate('availability', 'freelancers', 'stats', *[f'freelancer:{i}' for i in ids])
+    return assignment_ids
+
+def assign_freelancer_to_project(project_id: int, freelancer_id: int, assignment_data: Dict) -> int:
+    """Assign one freelancer to a project (a crew of one, see assign_crew)"""
+    return assign_crew(project_id, [freelancer_id], assignment_data)[0]
+
+# Candidate matching: per freelancer, the columns matching.py scores on
+
+def get_match_rows(freelancer_ids: Optional[List[int]] = None) -> List[Dict]:
+    """Freelancers with rating dimension averages and past work (assignments, m², last start, average tarifa)
+    
+    All freelancers when freelancer_ids is None (the matching snapshot),
+    else only those ids (its incremental refresh).
+    """
+    averages = ", ".join(f"s.sum_{d} * 1.0 / s.ratings_count AS {d}" for d in RATING_DIMENSIONS)
+    sql = f'''
+        SELECT f.id, f.nombre, f.distrito, f.rating_promedio, f.disponible, f.estado, f.skills,
+               COALESCE(s.ratings_count, 0) AS ratings_count, {averages},
+               (SELECT COUNT(*) FROM assignments a WHERE a.freelancer_id = f.id) AS assignments_count,
+               (SELECT COALESCE(SUM(p.metros_cuadrados), 0) FROM assignments a
+                JOIN projects p ON p.id = a.project_id WHERE a.freelancer_id = f.id) AS metros_cuadrados,
+               (SELECT MAX(a.fecha_inicio) FROM assignments a WHERE a.freelancer_id = f.id) AS ultima_asignacion,
+               (SELECT AVG(a.tarifa_m2) FROM assignments a WHERE a.freelancer_id = f.id) AS tarifa_m2
+        FROM freelancers f
+        LEFT JOIN freelancer_rating_stats s ON s.freelancer_id = f.id AND s.ratings_count > 0
+    '''
+    params = ()
+    if freelancer_ids is not None:
+        sql += " WHERE f.id IN (SELECT value FROM json_each(?))"
+        params = (json.dumps([int(i) for i in freelancer_ids]),)
+    conn = get_connection()
+    return [dict(row) for row in conn.execute(sql, params)]
+
+# Report exports, paged by id (keyset) so no report is read in one piece
+
+EXPORT_PAGE_SIZE = 1000
+
+EXPORT_QUERIES = {
+    'freelancers': '''
+        SELECT id, dni, nombre, telefono, email, distrito, skills, rating_promedio, estado, disponible, notas, created_at
+        FROM freelancers
+        WHERE id > ? ORDER BY id LIMIT ?
+    ''',
+    'assignments': '''
+        SELECT a.id, a.project_id, p.nombre AS proyecto, p.cliente, p.ubicacion, p.producto, p.metros_cuadrados,
+               a.freelancer_id, f.nombre AS freelancer, f.dni, a.fecha_inicio, a.fecha_fin,
+               a.tarifa_m2, a.monto_total, a.estado_pago
+        FROM assignments a
+        LEFT JOIN projects p ON p.id = a.project_id
+        LEFT JOIN freelancers f ON f.id = a.freelancer_id
+        WHERE a.id > ? ORDER BY a.id LIMIT ?
+    ''',
+    'ratings': f'''
+        SELECT r.id, r.fecha, r.assignment_id, a.project_id, p.nombre AS proyecto,
+               a.freelancer_id, f.nombre AS freelancer, f.dni,
+               {", ".join(f"r.{d}" for d in RATING_DIMENSIONS)}, r.rating_general, r.comentarios
+        FROM ratings r
+        LEFT JOIN assignments a ON a.id = r.assignment_id
+        LEFT JOIN projects p ON p.id = a.project_id
+        LEFT JOIN freelancers f ON f.id = a.freelancer_id
+        WHERE r.id > ? ORDER BY r.id LIMIT ?
+    '''
+}
+
+def export_page(report: str, after_id: int = 0, limit: int = EXPORT_PAGE_SIZE) -> List[Dict]:
+    """Next page of a report (freelancers, assignments or ratings), rows with id > after_id"""
+    if report not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown report: {report}")
+    conn = get_connection()
+    return [dict(row) for row in conn.execute(EXPORT_QUERIES[report], (after_id, limit))]
 
 if __name__ == "__main__":
     print("🔧 Initializing FAMS Database...")
@@ -2,21 +2,89 @@
 Database operations for FAMS using Supabase
 """
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
+from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
+from postgrest.utils import SyncClient
+import httpx
 import streamlit as st
+import threading
 from typing import List, Dict, Optional
-from datetime import datetime
+from datetime import date, datetime
+
+import data_cache
+from data_cache import cached
+from text_utils import fold_accents, parse_skills, skill_slug
+
+# Connection pool defaults, overridable from the [supabase] section of secrets.toml
+POOL_DEFAULTS = {
+    'pool_size': 10,          # max simultaneous HTTP connections to PostgREST
+    'pool_keepalive': 5,      # idle keep-alive connections kept open
+    'keepalive_expiry': 30.0, # seconds an idle connection is kept
+    'timeout': 10.0           # request timeout in seconds
+}
+
+# Process-wide client, shared by every rerun and every session
+_client: Optional[Client] = None
+_client_config: Optional[tuple] = None
+_client_lock = threading.Lock()
+
+def _read_client_config() -> tuple:
+    """Read credentials and pool settings from Streamlit secrets"""
+    section = st.secrets["supabase"]
+    return (
+        section["url"],
+        section["key"],
+        int(section.get("pool_size", POOL_DEFAULTS['pool_size'])),
+        int(section.get("pool_keepalive", POOL_DEFAULTS['pool_keepalive'])),
+        float(section.get("keepalive_expiry", POOL_DEFAULTS['keepalive_expiry'])),
+        float(section.get("timeout", POOL_DEFAULTS['timeout']))
+    )
+
+def _create_pooled_client(url: str, key: str, pool_size: int, pool_keepalive: int,
+                          keepalive_expiry: float, timeout: float) -> Client:
+    """Create a Supabase client whose REST session uses a bounded keep-alive pool"""
+    client = create_client(
+        supabase_url=url,
+        supabase_key=key,
+        options=ClientOptions(postgrest_client_timeout=timeout)
+    )
+    
+    # Replace postgrest's default httpx session with one using our pool limits
+    default_session = client.postgrest.session
+    client.postgrest.session = SyncClient(
+        base_url=default_session.base_url,
+        headers=default_session.headers,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_keepalive,
+            keepalive_expiry=keepalive_expiry
+        )
+    )
+    default_session.close()
+    
+    return client
 
 # Get Supabase credentials from Streamlit secrets
 def get_supabase_client() -> Client:
-    """Initialize Supabase client"""
+    """Get the process-wide Supabase client, rebuilding it when secrets change"""
+    global _client, _client_config
     try:
-        url = st.secrets["supabase"]["url"]
-        key = st.secrets["supabase"]["key"]
-        # Create client with minimal options
-        return create_client(
-            supabase_url=url,
-            supabase_key=key
-        )
+        config = _read_client_config()
+        
+        # Fast path: client already built with the current secrets
+        if _client is not None and _client_config == config:
+            return _client
+        
+        with _client_lock:
+            if _client is None or _client_config != config:
+                previous = _client
+                _client = _create_pooled_client(*config)
+                _client_config = config
+                if previous is not None:
+                    previous.postgrest.session.close()
+            return _client
     except Exception as e:
         st.error(f"Error connecting to Supabase: {e}")
         st.info("Please configure .streamlit/secrets.toml with your Supabase credentials")
@@ -24,28 +92,212 @@ def get_supabase_client() -> Client:
 
 # CRUD Operations
 
-def get_all_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "") -> List[Dict]:
-    """Get all freelancers with optional filters"""
-    supabase = get_supabase_client()
-    
-    # Start query
-    query = supabase.table('freelancers').select('*')
+# Default page size for keyset pagination (a multiple of the 4-column grid)
+PAGE_SIZE = 24
+
+# Slim projection for list and card views (detail views fetch the full row)
+LIST_COLUMNS = ('id', 'nombre', 'distrito', 'rating_promedio', 'disponible')
+
+# Sort orders for the list queries: (column, descending) pairs ending in id,
+# so the order is total and a row's sort values are its keyset cursor
+SORTS = {
+    'rating_desc': (('rating_promedio', True), ('nombre', False), ('id', False)),
+    'rating_asc': (('rating_promedio', False), ('nombre', False), ('id', False)),
+    'nombre': (('nombre', False), ('id', False))
+}
+DEFAULT_SORT = 'rating_desc'
+
+def _quote(value) -> str:
+    """Quote a value for use inside a PostgREST or=(...) filter"""
+    if not isinstance(value, str):
+        return str(value)
+    text = value.replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{text}"'
+
+def _or(query, *conditions: str):
+    """Add an or=(...) filter (this postgrest-py version has no or_())"""
+    query.params = query.params.add('or', f"({','.join(conditions)})")
+    return query
+
+def _freelancer_query(supabase: Client, search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                      disponible: Optional[bool] = None, estado: str = "",
+                      rating_min: Optional[float] = None, rating_max: Optional[float] = None,
+                      columns: Optional[tuple] = None):
+    """Filtered select on freelancers shared by the list queries
+    
+    columns projects the rows (None = full rows). Returns (query, embeds):
+    embeds are the aliases of the skill joins, to be stripped from the rows.
+    """
+    # Each skill is an aliased inner join on the skills index, so several
+    # skills mean "all of them" ("Epóxico, Spray" = both)
+    skills = parse_skills(skill_filter)
+    embeds = [f"skill{i}" for i in range(len(skills))]
+    select = list(columns) if columns is not None else ['*']
+    select += [f"{alias}:freelancer_skills!inner(skills!inner(slug))" for alias in embeds]
+    
+    query = supabase.table('freelancers').select(",".join(select))
+    
+    for alias, skill in zip(embeds, skills):
+        query = query.eq(f'{alias}.skills.slug', skill_slug(skill))
     
-    # Apply filters
     if search_term:
-        query = query.ilike('nombre', f'%{search_term}%')
-    
-    if skill_filter:
-        query = query.ilike('skills', f'%{skill_filter}%')
+        # Folded on both sides (migration 0011), so accents don't matter, as in the SQLite backend
+        query = query.like('nombre_busqueda', f'%{fold_accents(search_term)}%')
     
     if distrito_filter:
         query = query.eq('distrito', distrito_filter)
     
-    # Execute query
-    response = query.order('rating_promedio', desc=True).order('nombre').execute()
+    if disponible is not None:
+        query = query.eq('disponible', disponible)
+    
+    if estado:
+        query = query.eq('estado', estado)
+    
+    if rating_min is not None:
+        query = query.gte('rating_promedio', rating_min)
+    
+    if rating_max is not None:
+        query = query.lte('rating_promedio', rating_max)
+    
+    return query, embeds
+
+def _strip_embeds(rows: List[Dict], embeds: List[str]) -> List[Dict]:
+    """Drop the skill-join columns added by _freelancer_query"""
+    for row in rows:
+        for alias in embeds:
+            row.pop(alias, None)
+    return rows
+
+def _keyset_filter(query, sort: str, cursor: tuple):
+    """Restrict query to the rows after cursor in the given sort order"""
+    keys = SORTS[sort]
+    
+    # k1.gt.v1, and(k1.eq.v1,k2.gt.v2), ..., with lt for descending keys
+    terms = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [f"{key}.eq.{_quote(value)}" for (key, _), value in zip(keys[:i], cursor)]
+        term = f"{column}.{'lt' if descending else 'gt'}.{_quote(cursor[i])}"
+        terms.append(f"and({','.join(equal + [term])})" if equal else term)
+    
+    # The leading bound lets Postgres range-scan the sort index; the or=()
+    # only resolves ties on the cursor's own leading value
+    first, descending = keys[0]
+    query = query.lte(first, cursor[0]) if descending else query.gte(first, cursor[0])
+    
+    return _or(query, *terms)
+
+@cached('freelancers')
+def query_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                      disponible: Optional[bool] = None, estado: str = "",
+                      rating_min: Optional[float] = None, rating_max: Optional[float] = None,
+                      sort: str = DEFAULT_SORT, cursor: Optional[tuple] = None,
+                      limit: Optional[int] = PAGE_SIZE, columns: Optional[tuple] = None) -> Dict:
+    """Filtered, sorted and keyset-paginated freelancer list
+    
+    sort is a key of SORTS. cursor holds the sort values of the last row of the
+    previous page (None for the first page). Returns {'items': [...],
+    'next_cursor': ...}; next_cursor is None on the last page. limit None
+    returns every matching row, read in keyset pages since PostgREST caps a
+    response at max-rows. columns projects the rows (e.g. LIST_COLUMNS); the
+    sort columns are always included.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort: {sort}")
+    
+    if limit is None:
+        # Each page asks for one row more than it returns, so stay under max-rows
+        items = []
+        while True:
+            page = query_freelancers.uncached(search_term, skill_filter, distrito_filter, disponible, estado,
+                                              rating_min, rating_max, sort, cursor, EXPORT_PAGE_SIZE - 1, columns)
+            items += page['items']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return {'items': items, 'next_cursor': None}
+    
+    supabase = get_supabase_client()
+    keys = SORTS[sort]
+    
+    if columns is not None:
+        columns = tuple(dict.fromkeys(tuple(columns) + tuple(column for column, _ in keys)))
+    query, embeds = _freelancer_query(supabase, search_term, skill_filter, distrito_filter, disponible,
+                                      estado, rating_min, rating_max, columns)
+    
+    if cursor is not None:
+        query = _keyset_filter(query, sort, cursor)
+    
+    for column, descending in keys:
+        query = query.order(column, desc=descending)
+    
+    rows = _strip_embeds(query.limit(limit + 1).execute().data, embeds)
+    
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = tuple(items[-1][column] for column, _ in keys)
+    
+    return {'items': items, 'next_cursor': next_cursor}
+
+def get_all_freelancers(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                        columns: Optional[tuple] = None, disponible: Optional[bool] = None) -> List[Dict]:
+    """Get all freelancers with optional filters, projected on columns (None = full rows), in keyset pages"""
+    return query_freelancers(search_term, skill_filter, distrito_filter, disponible,
+                             limit=None, columns=columns)['items']
+
+def get_freelancers_page(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+                         cursor: Optional[tuple] = None, limit: int = PAGE_SIZE,
+                         columns: Optional[tuple] = None, disponible: Optional[bool] = None) -> Dict:
+    """One page of freelancers ordered by rating DESC, nombre, id (see query_freelancers)"""
+    return query_freelancers(search_term, skill_filter, distrito_filter, disponible,
+                             cursor=cursor, limit=limit, columns=columns)
+
+@cached('freelancers')
+def get_facets(search_term: str = "", skill_filter: str = "", distrito_filter: str = "",
+               disponible: Optional[bool] = None, estado: str = "",
+               rating_min: Optional[float] = None, rating_max: Optional[float] = None) -> Dict:
+    """Distrito, skill and availability counts for the current filters, in one request
+    
+    Each facet is counted with every filter except its own, so its options stay
+    selectable. 'total' is the number of rows matching all the filters.
+    """
+    supabase = get_supabase_client()
+    
+    response = supabase.rpc('get_freelancer_facets', {
+        'p_search': search_term or None,
+        'p_skills': parse_skills(skill_filter) or None,
+        'p_distrito': distrito_filter or None,
+        'p_disponible': disponible,
+        'p_estado': estado or None,
+        'p_rating_min': rating_min,
+        'p_rating_max': rating_max
+    }).execute()
+    
+    return response.data
+
+def find_freelancers_by_skills(skills: List[str], match_all: bool = True, distrito: str = "") -> List[Dict]:
+    """Freelancers having all (match_all) or any of the given skills, optionally in one distrito"""
+    if not skills:
+        return []
+    
+    supabase = get_supabase_client()
+    
+    response = supabase.rpc('find_freelancers_by_skills', {
+        'p_skills': skills,
+        'p_match_all': match_all,
+        'p_distrito': distrito or None
+    }).execute()
+    
+    return response.data
+
+def get_skills() -> List[Dict]:
+    """Skills dictionary, sorted by name"""
+    supabase = get_supabase_client()
+    
+    response = supabase.table('skills').select('id, nombre, slug').order('nombre').execute()
     
     return response.data
 
+@cached('freelancer_detail', key_tags=lambda freelancer_id: (f'freelancer:{freelancer_id}',))
 def get_freelancer_by_id(freelancer_id: int) -> Optional[Dict]:
     """Get single freelancer by ID"""
     supabase = get_supabase_client()
@@ -54,6 +306,56 @@ def get_freelancer_by_id(freelancer_id: int) -> Optional[Dict]:
     
     return response.data[0] if response.data else None
 
+# Contact log entries embedded in a profile
+PROFILE_CONTACTS = 10
+
+# The freelancer with its recent contacts and its assignments, each with the
+# project and the assignment's ratings, as PostgREST resource embeds
+PROFILE_SELECT = "*,contact_log(*),assignments(*,projects(*),ratings(*))"
+
+def _split_profile(row: Dict) -> Dict:
+    """Reshape an embedded profile row: contact_history, projects and ratings lists"""
+    assignments = row.pop('assignments', None) or []
+    ratings = []
+    for assignment in assignments:
+        project = assignment.get('projects')
+        for rating in assignment.pop('ratings', None) or []:
+            rating['proyecto'] = project['nombre'] if project else 'Unknown'
+            ratings.append(rating)
+    ratings.sort(key=lambda r: (r['fecha'] or '', r['id']), reverse=True)
+    
+    row['contact_history'] = row.pop('contact_log', None) or []
+    row['projects'] = assignments
+    row['ratings'] = ratings
+    return row
+
+@cached('freelancer_detail', key_tags=lambda freelancer_id, **_: (f'freelancer:{freelancer_id}',))
+def get_freelancer_profile(freelancer_id: int, contacts_limit: int = PROFILE_CONTACTS) -> Optional[Dict]:
+    """Freelancer row plus its history, in one request
+    
+    Adds 'contact_history' (newest first, as get_contact_history),
+    'projects' (assignments with their project, as get_freelancer_projects)
+    and 'ratings' (newest first with 'proyecto', as get_freelancer_ratings).
+    """
+    supabase = get_supabase_client()
+    
+    response = (
+        supabase.table('freelancers').select(PROFILE_SELECT).eq('id', freelancer_id)
+        .order('fecha', desc=True, foreign_table='contact_log')
+        .limit(contacts_limit, foreign_table='contact_log')
+        .order('fecha_inicio', desc=True, foreign_table='assignments')
+        .execute()
+    )
+    
+    return _split_profile(response.data[0]) if response.data else None
+
+def peek_list_row(freelancer_id: int) -> Optional[Dict]:
+    """The freelancer's row from a cached list page, if any (no request)"""
+    return data_cache.peek(
+        'query_freelancers',
+        lambda page: next((row for row in page['items'] if row['id'] == freelancer_id), None)
+    )
+
 def add_freelancer(data: Dict) -> int:
     """Add new freelancer"""
     supabase = get_supabase_client()
@@ -67,14 +369,15 @@ def add_freelancer(data: Dict) -> int:
         'distrito': data.get('distrito'),
         'skills': data.get('skills'),
         'rating_promedio': data.get('rating_promedio', 0),
-        'disponible': data.get('disponible', True),
         'notas': data.get('notas')
     }
     
     # Insert
     response = supabase.table('freelancers').insert(freelancer_data).execute()
+    freelancer_id = response.data[0]['id'] if response.data else None
+    data_cache.invalidate('freelancers', 'stats', *([f'freelancer:{freelancer_id}'] if freelancer_id else []))
     
-    return response.data[0]['id'] if response.data else None
+    return freelancer_id
 
 def update_freelancer(freelancer_id: int, data: Dict):
     """Update existing freelancer"""
@@ -89,12 +392,12 @@ def update_freelancer(freelancer_id: int, data: Dict):
         'distrito': data.get('distrito'),
         'skills': data.get('skills'),
         'rating_promedio': data.get('rating_promedio', 0),
-        'disponible': data.get('disponible', True),
         'notas': data.get('notas')
     }
     
     # Update
     response = supabase.table('freelancers').update(update_data).eq('id', freelancer_id).execute()
+    data_cache.invalidate('freelancers', 'stats', f'freelancer:{freelancer_id}')
     
     return response.data
 
@@ -103,43 +406,48 @@ def delete_freelancer(freelancer_id: int):
     supabase = get_supabase_client()
     
     response = supabase.table('freelancers').delete().eq('id', freelancer_id).execute()
+    data_cache.invalidate('freelancers', 'stats', f'freelancer:{freelancer_id}')
     
     return response.data
 
-def toggle_disponibilidad(freelancer_id: int, disponible: bool):
-    """Toggle freelancer availability"""
+def find_existing_dnis(dnis: List[str]) -> set:
+    """The given DNIs that already belong to a freelancer"""
+    if not dnis:
+        return set()
     supabase = get_supabase_client()
-    
-    response = supabase.table('freelancers').update({'disponible': disponible}).eq('id', freelancer_id).execute()
-    
-    return response.data
+    response = supabase.table('freelancers').select('dni').in_('dni', list(dnis)).execute()
+    return {row['dni'] for row in response.data}
 
-def get_stats() -> Dict:
-    """Get dashboard statistics"""
+def upsert_freelancers(rows: List[Dict]) -> int:
+    """Insert a batch of freelancers in one request, updating those whose DNI exists
+    
+    Every row has the same keys; only those columns are written, so an
+    update keeps the columns the batch doesn't carry. The skills index is
+    kept in sync by the sync_freelancer_skills trigger. Returns the row count.
+    """
+    if not rows:
+        return 0
     supabase = get_supabase_client()
     
-    # Get all active freelancers
-    all_response = supabase.table('freelancers').select('*', count='exact').eq('estado', 'Activo').execute()
-    total = all_response.count if hasattr(all_response, 'count') else len(all_response.data)
+    # Minimal return: the import doesn't need the rows back
+    supabase.table('freelancers').upsert(rows, on_conflict='dni', returning=ReturnMethod.minimal).execute()
+    # Updated DNIs change cached profiles too
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
     
-    # Get available freelancers
-    available_response = supabase.table('freelancers').select('*', count='exact').eq('estado', 'Activo').eq('disponible', True).execute()
-    disponibles = available_response.count if hasattr(available_response, 'count') else len(available_response.data)
+    return len(rows)
+
+@cached('stats')
+def get_stats(by_distrito: bool = False) -> Dict:
+    """Get dashboard statistics in one round trip, optionally broken down by distrito"""
+    supabase = get_supabase_client()
     
-    # Calculate in project
-    en_proyecto = total - disponibles
+    response = supabase.rpc('get_dashboard_stats', {'p_by_distrito': by_distrito}).execute()
+    stats = response.data
     
-    # Get average rating
-    ratings_response = supabase.table('freelancers').select('rating_promedio').eq('estado', 'Activo').execute()
-    ratings = [float(r['rating_promedio']) for r in ratings_response.data if r['rating_promedio']]
-    avg_rating = round(sum(ratings) / len(ratings), 1) if ratings else 0
+    if not by_distrito:
+        stats.pop('por_distrito', None)
     
-    return {
-        'total': total,
-        'disponibles': disponibles,
-        'en_proyecto': en_proyecto,
-        'avg_rating': avg_rating
-    }
+    return stats
 
 def log_contact(freelancer_id: int, tipo: str, notas: str = ""):
     """Log contact with freelancer"""
@@ -152,6 +460,7 @@ def log_contact(freelancer_id: int, tipo: str, notas: str = ""):
     }
     
     response = supabase.table('contact_log').insert(contact_data).execute()
+    data_cache.invalidate(f'freelancer:{freelancer_id}')
     
     return response.data
 
@@ -165,6 +474,7 @@ def get_contact_history(freelancer_id: int, limit: int = 10) -> List[Dict]:
 
 # Project operations
 
+@cached('projects')
 def get_all_projects() -> List[Dict]:
     """Get all projects"""
     supabase = get_supabase_client()
@@ -178,26 +488,52 @@ def add_project(data: Dict) -> int:
     supabase = get_supabase_client()
     
     response = supabase.table('projects').insert(data).execute()
+    data_cache.invalidate('projects')
     
     return response.data[0]['id'] if response.data else None
 
-def assign_freelancer_to_project(project_id: int, freelancer_id: int, assignment_data: Dict) -> int:
-    """Assign freelancer to project"""
+# Columns assign_crew() takes in assignment_data; the assign_crew function (0010) rejects any other
+ASSIGNMENT_DATA_COLUMNS = ('fecha_inicio', 'fecha_fin', 'tarifa_m2', 'monto_total', 'estado_pago')
+
+def assign_crew(project_id: int, freelancer_ids: List[int], assignment_data: Optional[Dict] = None) -> List[int]:
+    """Assign freelancers to a project in one transaction (assign_crew RPC); returns the new assignment ids, in order
+    
+    assignment_data holds the other assignments columns (fecha_inicio,
+    fecha_fin, tarifa_m2, ...). Nothing is written, and ValueError names
+    them, if any freelancer is booked or declared unavailable on those dates;
+    the dates checked are the ones stored. disponible turns False for those
+    whose work is under way today.
+    """
+    data = dict(assignment_data or {})
+    ids = [int(i) for i in freelancer_ids]
+    unknown = set(data) - set(ASSIGNMENT_DATA_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown assignment columns: {', '.join(sorted(unknown))}")
+    if len(set(ids)) != len(ids):
+        raise ValueError("Un aplicador figura dos veces en la cuadrilla")
+    if not ids:
+        return []
     supabase = get_supabase_client()
     
-    data = {
-        'project_id': project_id,
-        'freelancer_id': freelancer_id,
-        **assignment_data
-    }
-    
-    response = supabase.table('assignments').insert(data).execute()
-    
-    # Update freelancer availability
-    if response.data:
-        toggle_disponibilidad(freelancer_id, False)
+    try:
+        response = supabase.rpc('assign_crew', {
+            'p_project_id': project_id,
+            'p_freelancer_ids': ids,
+            'p_data': {column: value.isoformat() if isinstance(value, date) else value for column, value in data.items()}
+        }).execute()
+    except APIError as e:
+        # Integrity errors (class 23): double-booking, a repeated or unknown freelancer, bad dates
+        if (e.code or '').startswith('23'):
+            raise ValueError(e.message) from e
+        raise
+    data_cache.invalidate('availability', 'freelancers', 'stats', *[f'freelancer:{i}' for i in ids])
     
-    return response.data[0]['id'] if response.data else None
+    created = {row['freelancer_id']: row['assignment_id'] for row in response.data}
+    return [created[i] for i in ids]
+
+def assign_freelancer_to_project(project_id: int, freelancer_id: int, assignment_data: Dict) -> int:
+    """Assign one freelancer to a project (a crew of one, see assign_crew)"""
+    return assign_crew(project_id, [freelancer_id], assignment_data)[0]
 
 def get_project_assignments(project_id: int) -> List[Dict]:
     """Get all assignments for a project with freelancer details"""
@@ -217,13 +553,19 @@ def get_freelancer_projects(freelancer_id: int) -> List[Dict]:
 
 # Rating operations
 
+RATING_DIMENSIONS = ['calidad', 'puntualidad', 'instrucciones', 'seguridad', 'profesionalismo']
+
 def add_rating(assignment_id: int, rating_data: Dict) -> int:
-    """Add rating for an assignment"""
+    """Add rating for an assignment
+    
+    The ratings_maintain_stats trigger updates the freelancer's running
+    aggregates and rating_promedio in the same transaction, so this is a
+    single round trip.
+    """
     supabase = get_supabase_client()
     
     # Calculate general rating
-    dimensions = ['calidad', 'puntualidad', 'instrucciones', 'seguridad', 'profesionalismo']
-    rating_values = [rating_data.get(d, 0) for d in dimensions]
+    rating_values = [rating_data.get(d, 0) for d in RATING_DIMENSIONS]
     rating_general = round(sum(rating_values) / len(rating_values), 2)
     
     data = {
@@ -233,34 +575,40 @@ def add_rating(assignment_id: int, rating_data: Dict) -> int:
     }
     
     response = supabase.table('ratings').insert(data).execute()
-    
-    # Update freelancer's average rating
-    if response.data:
-        assignment = supabase.table('assignments').select('freelancer_id').eq('id', assignment_id).execute()
-        if assignment.data:
-            freelancer_id = assignment.data[0]['freelancer_id']
-            update_freelancer_rating(freelancer_id)
+    # The trigger changed one freelancer's rating_promedio; the id isn't known here
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
     
     return response.data[0]['id'] if response.data else None
 
 def update_freelancer_rating(freelancer_id: int):
-    """Recalculate and update freelancer's average rating"""
+    """Rebuild a freelancer's rating aggregates and average from scratch (repair only)"""
+    rebuild_rating_stats(freelancer_id)
+
+def rebuild_rating_stats(freelancer_id: Optional[int] = None) -> int:
+    """Repair job: recompute rating aggregates for one freelancer, or all when None"""
     supabase = get_supabase_client()
     
-    # Get all ratings for this freelancer through assignments
-    assignments = supabase.table('assignments').select('id').eq('freelancer_id', freelancer_id).execute()
+    response = supabase.rpc('rebuild_rating_stats', {'p_freelancer_id': freelancer_id}).execute()
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
     
-    if not assignments.data:
-        return
+    return response.data
+
+def get_rating_summary(freelancer_id: int) -> Optional[Dict]:
+    """Rating count and per-dimension averages for a freelancer, read from the running aggregates"""
+    supabase = get_supabase_client()
     
-    assignment_ids = [a['id'] for a in assignments.data]
+    response = supabase.table('freelancer_rating_stats').select('*').eq('freelancer_id', freelancer_id).execute()
+    
+    if not response.data or not response.data[0]['ratings_count']:
+        return None
     
-    # Get all ratings for these assignments
-    ratings = supabase.table('ratings').select('rating_general').in_('assignment_id', assignment_ids).execute()
+    row = response.data[0]
+    count = row['ratings_count']
+    summary = {'freelancer_id': freelancer_id, 'ratings_count': count, 'rating_general': round(float(row['sum_general']) / count, 2)}
+    for d in RATING_DIMENSIONS:
+        summary[d] = round(row[f'sum_{d}'] / count, 2)
     
-    if ratings.data:
-        avg_rating = round(sum(r['rating_general'] for r in ratings.data) / len(ratings.data), 2)
-        supabase.table('freelancers').update({'rating_promedio': avg_rating}).eq('id', freelancer_id).execute()
+    return summary
 
 def get_freelancer_ratings(freelancer_id: int) -> List[Dict]:
     """Get all ratings for a freelancer"""
@@ -285,17 +633,163 @@ def get_freelancer_ratings(freelancer_id: int) -> List[Dict]:
     
     return ratings.data
 
-# Utility functions
+# Report exports, paged by id (keyset) so no report is read in one piece
 
-def get_distritos() -> List[str]:
-    """Get list of all unique distritos"""
+EXPORT_PAGE_SIZE = 1000  # PostgREST's default max-rows
+
+# Per report: the select (joins as embeds) and where each embedded value goes in the flat row
+EXPORT_SELECTS = {
+    'freelancers': (
+        "id,dni,nombre,telefono,email,distrito,skills,rating_promedio,estado,disponible,notas,created_at",
+        {}
+    ),
+    'assignments': (
+        "id,project_id,freelancer_id,fecha_inicio,fecha_fin,tarifa_m2,monto_total,estado_pago,"
+        "projects(nombre,cliente,ubicacion,producto,metros_cuadrados),freelancers(nombre,dni)",
+        {
+            'proyecto': ('projects', 'nombre'), 'cliente': ('projects', 'cliente'),
+            'ubicacion': ('projects', 'ubicacion'), 'producto': ('projects', 'producto'),
+            'metros_cuadrados': ('projects', 'metros_cuadrados'),
+            'freelancer': ('freelancers', 'nombre'), 'dni': ('freelancers', 'dni')
+        }
+    ),
+    'ratings': (
+        f"id,fecha,assignment_id,{','.join(RATING_DIMENSIONS)},rating_general,comentarios,"
+        "assignments(project_id,freelancer_id,projects(nombre),freelancers(nombre,dni))",
+        {
+            'project_id': ('assignments', 'project_id'), 'proyecto': ('assignments', 'projects', 'nombre'),
+            'freelancer_id': ('assignments', 'freelancer_id'),
+            'freelancer': ('assignments', 'freelancers', 'nombre'), 'dni': ('assignments', 'freelancers', 'dni')
+        }
+    )
+}
+
+def _flatten(row: Dict, paths: Dict[str, tuple]) -> Dict:
+    """Move embedded values to top-level columns and drop the embeds"""
+    embeds = {path[0] for path in paths.values()}
+    for column, path in paths.items():
+        value = row
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        row[column] = value
+    for embed in embeds:
+        row.pop(embed, None)
+    return row
+
+def export_page(report: str, after_id: int = 0, limit: int = EXPORT_PAGE_SIZE) -> List[Dict]:
+    """Next page of a report (freelancers, assignments or ratings), rows with id > after_id"""
+    if report not in EXPORT_SELECTS:
+        raise ValueError(f"Unknown report: {report}")
+    select, paths = EXPORT_SELECTS[report]
     supabase = get_supabase_client()
     
-    response = supabase.table('freelancers').select('distrito').execute()
+    response = supabase.table(report).select(select).gt('id', after_id).order('id').limit(limit).execute()
     
-    distritos = sorted(set(r['distrito'] for r in response.data if r.get('distrito')))
+    return [_flatten(row, paths) for row in response.data]
+
+# Candidate matching: per freelancer, the columns matching.py scores on
+
+def get_match_rows(freelancer_ids: Optional[List[int]] = None) -> List[Dict]:
+    """Freelancers with rating dimension averages, past work and average tarifa (freelancer_match_rows view)
+    
+    All freelancers when freelancer_ids is None (the matching snapshot, read
+    in keyset pages), else only those ids (its incremental refresh).
+    """
+    supabase = get_supabase_client()
     
-    return distritos
+    if freelancer_ids is not None:
+        response = supabase.table('freelancer_match_rows').select('*').in_('id', list(freelancer_ids)).execute()
+        return response.data
+    
+    rows = []
+    after_id = 0
+    while True:
+        response = supabase.table('freelancer_match_rows').select('*').gt('id', after_id).order('id').limit(EXPORT_PAGE_SIZE).execute()
+        page = response.data
+        rows += page
+        if len(page) < EXPORT_PAGE_SIZE:
+            return rows
+        after_id = page[-1]['id']
+
+# Availability calendar: booked and declared unavailable intervals (availability.py)
+
+def get_busy_intervals(start: str, freelancer_ids: Optional[List[int]] = None) -> List[Dict]:
+    """Intervals ending on or after start in which freelancers are booked or unavailable (busy_intervals view)
+    
+    Rows have freelancer_id, fuente ('asignacion' or 'no_disponible'),
+    ref_id, fecha_inicio, fecha_fin and motivo. All freelancers when
+    freelancer_ids is None (read in pages), else only those.
+    """
+    supabase = get_supabase_client()
+    
+    def select():
+        query = supabase.table('busy_intervals').select('*').gte('fecha_fin', start)
+        return query.in_('freelancer_id', list(freelancer_ids)) if freelancer_ids is not None else query
+    
+    if freelancer_ids is not None:
+        return select().execute().data
+    
+    # The view has no single key, so pages go by offset over a total order
+    # (range()'s end is exclusive in this postgrest-py version)
+    rows = []
+    while True:
+        response = (select().order('freelancer_id').order('fuente').order('ref_id')
+                    .range(len(rows), len(rows) + EXPORT_PAGE_SIZE).execute())
+        rows += response.data
+        if len(response.data) < EXPORT_PAGE_SIZE:
+            return rows
+
+def get_unavailability(freelancer_id: int) -> List[Dict]:
+    """A freelancer's declared unavailability, by start date"""
+    supabase = get_supabase_client()
+    
+    response = supabase.table('unavailability').select('*').eq('freelancer_id', freelancer_id).order('fecha_inicio').execute()
+    
+    return response.data
+
+def add_unavailability(freelancer_id: int, fecha_inicio: str, fecha_fin: str, motivo: str = "") -> int:
+    """Declare a freelancer unavailable from fecha_inicio to fecha_fin (inclusive)"""
+    if fecha_fin < fecha_inicio:
+        raise ValueError("La fecha de fin es anterior a la de inicio")
+    supabase = get_supabase_client()
+    
+    response = supabase.table('unavailability').insert({
+        'freelancer_id': freelancer_id,
+        'fecha_inicio': fecha_inicio,
+        'fecha_fin': fecha_fin,
+        'motivo': motivo or None
+    }).execute()
+    data_cache.invalidate('availability', f'freelancer:{freelancer_id}')
+    
+    return response.data[0]['id'] if response.data else None
+
+def delete_unavailability(unavailability_id: int):
+    """Delete one declared absence; disponible is left to sync_disponible, which derives it from the calendar"""
+    supabase = get_supabase_client()
+    
+    response = supabase.table('unavailability').delete().eq('id', unavailability_id).execute()
+    data_cache.invalidate('availability', *[f"freelancer:{row['freelancer_id']}" for row in response.data])
+    
+    return response.data
+
+def sync_disponible(busy_ids: List[int]) -> int:
+    """Set disponible to False for busy_ids and True for everyone else; returns the rows changed"""
+    supabase = get_supabase_client()
+    
+    response = supabase.rpc('sync_disponible', {'p_busy': list(busy_ids)}).execute()
+    data_cache.invalidate('freelancers', 'stats', 'freelancer_detail')
+    
+    return response.data[0]['changed'] if response.data else 0
+
+# Utility functions
+
+def get_distritos() -> List[str]:
+    """Get list of all unique distritos"""
+    return [f['value'] for f in get_facets()['distritos']]
+
+def cache_stats() -> Dict:
+    """Hit/miss counters of the data-layer cache"""
+    return data_cache.stats()
 
 def search_available_freelancers(skill: str = "", distrito: str = "") -> List[Dict]:
     """Search for available freelancers"""
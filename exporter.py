@@ -0,0 +1,157 @@
+"""
+Streaming report exports to CSV and Excel (.xlsx)
+
+Reports are read with backend.export_page(), one keyset page (id > last id)
+at a time, and each page is written out before the next is fetched: rows go
+through csv.writer or an openpyxl write-only sheet, so memory stays flat
+however large the directory grows. Assignments come joined with their
+project and freelancer, ratings with their assignment's project and
+freelancer, as the database returns them.
+
+Excel exports put one sheet per report in a workbook; CSV exports are one
+file per report, zipped when more than one is asked for. The admin app
+offers the file through st.download_button, and scheduled jobs run this
+module from the command line:
+
+    python exporter.py --format xlsx --out reportes/
+    python exporter.py --format csv --reports freelancers --backend local
+"""
+import argparse
+import csv
+import io
+import os
+import zipfile
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Report -> (sheet / file title, [(column, header)])
+REPORTS = {
+    'freelancers': ("Aplicadores", [
+        ('id', 'ID'), ('dni', 'DNI'), ('nombre', 'Nombre'), ('telefono', 'Teléfono'), ('email', 'Email'),
+        ('distrito', 'Distrito'), ('skills', 'Skills'), ('rating_promedio', 'Rating'), ('estado', 'Estado'),
+        ('disponible', 'Disponible'), ('notas', 'Notas'), ('created_at', 'Registrado')
+    ]),
+    'assignments': ("Asignaciones", [
+        ('id', 'ID'), ('project_id', 'ID Proyecto'), ('proyecto', 'Proyecto'), ('cliente', 'Cliente'),
+        ('ubicacion', 'Ubicación'), ('producto', 'Producto'), ('metros_cuadrados', 'm²'),
+        ('freelancer_id', 'ID Aplicador'), ('freelancer', 'Aplicador'), ('dni', 'DNI'),
+        ('fecha_inicio', 'Inicio'), ('fecha_fin', 'Fin'), ('tarifa_m2', 'Tarifa m²'),
+        ('monto_total', 'Monto total'), ('estado_pago', 'Estado de pago')
+    ]),
+    'ratings': ("Calificaciones", [
+        ('id', 'ID'), ('fecha', 'Fecha'), ('assignment_id', 'ID Asignación'), ('project_id', 'ID Proyecto'),
+        ('proyecto', 'Proyecto'), ('freelancer_id', 'ID Aplicador'), ('freelancer', 'Aplicador'), ('dni', 'DNI'),
+        ('calidad', 'Calidad'), ('puntualidad', 'Puntualidad'), ('instrucciones', 'Instrucciones'),
+        ('seguridad', 'Seguridad'), ('profesionalismo', 'Profesionalismo'),
+        ('rating_general', 'Rating general'), ('comentarios', 'Comentarios')
+    ])
+}
+
+FORMATS = {
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'csv': 'text/csv',
+    'zip': 'application/zip'
+}
+
+Progress = Callable[[str, int], None]
+
+def iter_rows(backend, report: str, page_size: Optional[int] = None) -> Iterator[Dict]:
+    """Every row of a report, fetched one keyset page at a time"""
+    page_size = page_size or backend.EXPORT_PAGE_SIZE
+    after_id = 0
+    while True:
+        page = backend.export_page(report, after_id, page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        after_id = page[-1]['id']
+
+def _cell(column: str, value):
+    """Value as written to the file; availability reads Sí/No"""
+    if column == 'disponible' and value is not None:
+        return "Sí" if value else "No"
+    return value
+
+def _rows(backend, report: str, progress: Optional[Progress]) -> Iterator[list]:
+    """Header, then the report's rows as lists, reporting the count written every 1000 rows"""
+    columns = REPORTS[report][1]
+    yield [header for _, header in columns]
+    count = 0
+    for count, row in enumerate(iter_rows(backend, report), start=1):
+        yield [_cell(column, row.get(column)) for column, _ in columns]
+        if progress and count % 1000 == 0:
+            progress(report, count)
+    if progress:
+        progress(report, count)
+
+def write_csv(backend, report: str, stream, progress: Optional[Progress] = None):
+    """One report as UTF-8 CSV (with the BOM Excel needs to read accents) on a binary stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='', write_through=True)
+    try:
+        csv.writer(text).writerows(_rows(backend, report, progress))
+    finally:
+        text.detach()
+
+def write_xlsx(backend, reports: Iterable[str], stream, progress: Optional[Progress] = None):
+    """A workbook with one sheet per report; write-only, so rows are streamed to disk"""
+    from openpyxl import Workbook
+    
+    workbook = Workbook(write_only=True)
+    for report in reports:
+        sheet = workbook.create_sheet(REPORTS[report][0])
+        for values in _rows(backend, report, progress):
+            sheet.append(values)
+    workbook.save(stream)
+
+def export(backend, reports: List[str], fmt: str, stream, progress: Optional[Progress] = None) -> str:
+    """Write reports in fmt ('xlsx' or 'csv') to a binary stream; returns the file's format
+    
+    CSV with several reports is a zip of one CSV per report ('zip').
+    """
+    unknown = [report for report in reports if report not in REPORTS]
+    if unknown or not reports:
+        raise ValueError(f"Unknown reports: {', '.join(unknown) or '(none)'}")
+    if fmt == 'xlsx':
+        write_xlsx(backend, reports, stream, progress)
+        return 'xlsx'
+    if fmt != 'csv':
+        raise ValueError(f"Unknown format: {fmt}")
+    if len(reports) == 1:
+        write_csv(backend, reports[0], stream, progress)
+        return 'csv'
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for report in reports:
+            with archive.open(f"{report}.csv", 'w') as member:
+                write_csv(backend, report, member, progress)
+    return 'zip'
+
+def filename(reports: List[str], fmt: str, day: Optional[date] = None) -> str:
+    """luxpro_<report or 'reportes'>_<YYYY-MM-DD>.<fmt>"""
+    name = reports[0] if len(reports) == 1 else 'reportes'
+    return f"luxpro_{name}_{(day or date.today()).isoformat()}.{fmt}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Export LuxPro reports to CSV or Excel")
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--reports', nargs='+', choices=list(REPORTS), default=list(REPORTS))
+    parser.add_argument('--backend', choices=['supabase', 'local'], default='supabase',
+                        help="supabase reads .streamlit/secrets.toml; local is the SQLite database")
+    parser.add_argument('--out', default='.', help="directory for the file")
+    args = parser.parse_args()
+    
+    if args.backend == 'local':
+        import database as backend
+    else:
+        import database_supabase as backend
+    
+    os.makedirs(args.out, exist_ok=True)
+    partial = os.path.join(args.out, '.export.partial')
+    with open(partial, 'wb') as f:
+        fmt = export(backend, args.reports, args.format, f,
+                     lambda report, count: print(f"  {report}: {count} filas".ljust(40), end='\r', flush=True))
+    path = os.path.join(args.out, filename(args.reports, fmt))
+    os.replace(partial, path)
+    print(f"\n✅ {path}")
+
+if __name__ == "__main__":
+    main()
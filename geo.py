@@ -0,0 +1,229 @@
+"""
+District geodata: centroids, distances and travel times between distritos
+
+Freelancers and projects are located by distrito (free text), so distance is
+worked out at district resolution from a bundled table of approximate
+centroids for Lima Metropolitana and Callao, where the network works; no
+network access or GIS library is needed. At import the table becomes two
+matrices indexed by NAMES position:
+
+    DISTANCE_KM      great-circle distance between centroids
+    TRAVEL_MINUTES   estimated travel time: DISTRICT_MINUTES to get around a
+                     distrito, plus the road distance (ROAD_FACTOR times the
+                     straight line) at TRAVEL_SPEED_KMH, Lima traffic included
+
+lookup() resolves a distrito as typed ("SJL", "Surco", "San Juan de
+Lurigancho") and locate() finds one in an ubicacion, including pasted
+"lat, lon" coordinates, which are snapped to the nearest centroid through a
+GridIndex.
+"""
+import math
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from text_utils import fold_accents
+
+# Approximate centroid (lat, lon) of each distrito's urban area
+CENTROIDS = {
+    # Lima Metropolitana
+    'Ancón': (-11.770, -77.160),
+    'Ate': (-12.035, -76.920),
+    'Barranco': (-12.146, -77.021),
+    'Breña': (-12.059, -77.052),
+    'Carabayllo': (-11.880, -77.030),
+    'Chaclacayo': (-11.975, -76.770),
+    'Chorrillos': (-12.170, -77.015),
+    'Cieneguilla': (-12.100, -76.800),
+    'Comas': (-11.940, -77.050),
+    'El Agustino': (-12.045, -76.995),
+    'Independencia': (-11.990, -77.055),
+    'Jesús María': (-12.075, -77.045),
+    'La Molina': (-12.085, -76.935),
+    'La Victoria': (-12.070, -77.020),
+    'Lima': (-12.046, -77.043),
+    'Lince': (-12.085, -77.035),
+    'Los Olivos': (-11.965, -77.070),
+    'Lurigancho': (-11.940, -76.700),
+    'Lurín': (-12.275, -76.870),
+    'Magdalena del Mar': (-12.090, -77.070),
+    'Miraflores': (-12.120, -77.030),
+    'Pachacámac': (-12.230, -76.860),
+    'Pucusana': (-12.480, -76.795),
+    'Pueblo Libre': (-12.075, -77.063),
+    'Puente Piedra': (-11.865, -77.075),
+    'Punta Hermosa': (-12.335, -76.825),
+    'Punta Negra': (-12.365, -76.795),
+    'Rímac': (-12.030, -77.030),
+    'San Bartolo': (-12.390, -76.780),
+    'San Borja': (-12.100, -76.995),
+    'San Isidro': (-12.097, -77.035),
+    'San Juan de Lurigancho': (-11.980, -77.005),
+    'San Juan de Miraflores': (-12.160, -76.970),
+    'San Luis': (-12.075, -76.995),
+    'San Martín de Porres': (-12.000, -77.080),
+    'San Miguel': (-12.080, -77.090),
+    'Santa Anita': (-12.045, -76.970),
+    'Santa María del Mar': (-12.405, -76.775),
+    'Santa Rosa': (-11.800, -77.165),
+    'Santiago de Surco': (-12.140, -76.990),
+    'Surquillo': (-12.115, -77.010),
+    'Villa El Salvador': (-12.215, -76.935),
+    'Villa María del Triunfo': (-12.160, -76.935),
+    # Callao
+    'Bellavista': (-12.060, -77.110),
+    'Callao': (-12.055, -77.125),
+    'Carmen de la Legua-Reynoso': (-12.040, -77.095),
+    'La Perla': (-12.070, -77.115),
+    'La Punta': (-12.072, -77.163),
+    'Mi Perú': (-11.855, -77.125),
+    'Ventanilla': (-11.875, -77.130)
+}
+
+# Other ways a distrito is written (accent-folded) -> its CENTROIDS name
+ALIASES = {
+    'sjl': 'San Juan de Lurigancho', 'sjm': 'San Juan de Miraflores', 'smp': 'San Martín de Porres',
+    'ves': 'Villa El Salvador', 'vmt': 'Villa María del Triunfo', 'surco': 'Santiago de Surco',
+    'magdalena': 'Magdalena del Mar', 'cercado': 'Lima', 'cercado de lima': 'Lima', 'lima cercado': 'Lima',
+    'vitarte': 'Ate', 'ate vitarte': 'Ate', 'chosica': 'Lurigancho', 'lurigancho chosica': 'Lurigancho',
+    'carmen de la legua': 'Carmen de la Legua-Reynoso', 'carmen de la legua reynoso': 'Carmen de la Legua-Reynoso'
+}
+
+# Named only when nothing more specific is ("Ate (Lima Este)" is Ate)
+GENERIC = {'Lima'}
+
+DISTRICT_MINUTES = 10       # getting around within a distrito
+ROAD_FACTOR = 1.35          # road distance over straight-line distance
+TRAVEL_SPEED_KMH = 20       # average door-to-door speed across the city
+
+EARTH_RADIUS_KM = 6371.0
+GRID_CELL_DEGREES = 0.05    # ~5.5 km cells
+MAX_SNAP_KM = 15            # coordinates farther than this from every centroid are outside the table
+
+NAMES = list(CENTROIDS)
+POSITION = {name: i for i, name in enumerate(NAMES)}
+_FOLDED = {**{fold_accents(name): name for name in NAMES}, **ALIASES}
+_NAMED = re.compile(r'\b(' + '|'.join(re.escape(key) for key in sorted(_FOLDED, key=len, reverse=True)) + r')\b')
+_COORDINATES = re.compile(r'(-?\d{1,2}\.\d+)\s*[,;]\s*(-?\d{1,3}\.\d+)')
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works elementwise on NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+def _matrices() -> Tuple[np.ndarray, np.ndarray]:
+    lat, lon = np.array([CENTROIDS[name] for name in NAMES]).T
+    distance = haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+    minutes = DISTRICT_MINUTES + distance * ROAD_FACTOR / TRAVEL_SPEED_KMH * 60
+    return distance.astype(np.float32), minutes.astype(np.float32)
+
+DISTANCE_KM, TRAVEL_MINUTES = _matrices()
+
+class GridIndex:
+    """Points bucketed in GRID_CELL_DEGREES cells; nearest() searches rings of cells outwards"""
+    
+    def __init__(self, points: Iterable[Tuple[object, float, float]]):
+        self._cells = {}                # (row, col) -> [(key, lat, lon)]
+        for key, lat, lon in points:
+            self._cells.setdefault(self._cell(lat, lon), []).append((key, lat, lon))
+        self._size = sum(len(points) for points in self._cells.values())
+        rows = [row for row, _ in self._cells]
+        cols = [col for _, col in self._cells]
+        self._bounds = (min(rows), max(rows), min(cols), max(cols)) if self._cells else None
+    
+    @staticmethod
+    def _cell(lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / GRID_CELL_DEGREES), math.floor(lon / GRID_CELL_DEGREES)
+    
+    @staticmethod
+    def _ring(row: int, col: int, ring: int) -> List[Tuple[int, int]]:
+        """Cells exactly ring cells away from (row, col)"""
+        if ring == 0:
+            return [(row, col)]
+        edges = [(row + dr, col + dc) for dr in (-ring, ring) for dc in range(-ring, ring + 1)]
+        return edges + [(row + dr, col + dc) for dc in (-ring, ring) for dr in range(-ring + 1, ring)]
+    
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[object, float]]:
+        """The k points closest to (lat, lon) as (key, km), closest first"""
+        if self._bounds is None:
+            return []
+        row, col = self._cell(lat, lon)
+        row_min, row_max, col_min, col_max = self._bounds
+        # Rings that can hold points: from the nearest edge of the occupied cells to the farthest
+        first = max(row_min - row, row - row_max, col_min - col, col - col_max, 0)
+        last = max(abs(row - row_min), abs(row - row_max), abs(col - col_min), abs(col - col_max))
+        found = []
+        for ring in range(first, last + 1):
+            for cell in self._ring(row, col, ring):
+                for key, plat, plon in self._cells.get(cell, ()):
+                    found.append((key, float(haversine_km(lat, lon, plat, plon))))
+            # Points in further rings are at least ring cells away
+            reach = ring * GRID_CELL_DEGREES * 111 * math.cos(math.radians(lat))
+            if len(found) == self._size or (len(found) >= k and sorted(km for _, km in found)[k - 1] <= reach):
+                break
+        return sorted(found, key=lambda item: item[1])[:k]
+
+_grid = GridIndex((name, lat, lon) for name, (lat, lon) in CENTROIDS.items())
+
+def lookup(distrito: Optional[str]) -> Optional[str]:
+    """CENTROIDS name of a distrito as typed ('SJL', 'surco', 'Jesus Maria'), None if unknown"""
+    key = re.sub(r'[\s\-]+', ' ', fold_accents(distrito or '')).strip()
+    key = re.sub(r'^distrito de ', '', key)
+    return _FOLDED.get(key)
+
+def nearest_distrito(lat: float, lon: float) -> Optional[str]:
+    """The distrito whose centroid is closest to a coordinate, None outside the table's area"""
+    name, km = _grid.nearest(lat, lon)[0]
+    return name if km <= MAX_SNAP_KM else None
+
+def locate(text: Optional[str]) -> Optional[str]:
+    """The distrito a distrito name or ubicacion refers to
+    
+    Tries the text as a distrito, then "lat, lon" coordinates in it (snapped
+    to the nearest centroid), then the longest distrito named in it, GENERIC
+    ones last. None when nothing is recognized.
+    """
+    if not text:
+        return None
+    exact = lookup(text)
+    if exact:
+        return exact
+    coordinates = _COORDINATES.search(text)
+    if coordinates:
+        lat, lon = float(coordinates.group(1)), float(coordinates.group(2))
+        snapped = nearest_distrito(lat, lon) if -90 <= lat <= 90 and -180 <= lon <= 180 else None
+        if snapped:
+            return snapped
+    named = [_FOLDED[match] for match in _NAMED.findall(re.sub(r'[\s\-]+', ' ', fold_accents(text)))]
+    if not named:
+        return None
+    return max(named, key=lambda name: (name not in GENERIC, len(name)))
+
+def distance_km(a: str, b: str) -> Optional[float]:
+    """Distance between two distritos as typed, None if either is unknown"""
+    a, b = lookup(a), lookup(b)
+    return float(DISTANCE_KM[POSITION[a], POSITION[b]]) if a and b else None
+
+def travel_minutes(a: str, b: str) -> Optional[float]:
+    """Estimated travel time between two distritos as typed, None if either is unknown"""
+    a, b = lookup(a), lookup(b)
+    return float(TRAVEL_MINUTES[POSITION[a], POSITION[b]]) if a and b else None
+
+def from_origin(origin: str, positions: np.ndarray, matrix: np.ndarray = TRAVEL_MINUTES) -> np.ndarray:
+    """Row of matrix from origin (a CENTROIDS name) to each NAMES position; inf where the position is -1"""
+    row = matrix[POSITION[origin]]
+    return np.where(positions >= 0, row[np.maximum(positions, 0)], np.inf).astype(np.float32)
+
+def sort_by_proximity(rows: List[Dict], origin: str) -> List[Dict]:
+    """Rows ordered by travel time from origin to their distrito; unknown distritos last, order kept on ties"""
+    place = locate(origin)
+    if place is None:
+        return list(rows)
+    
+    def minutes(row: Dict) -> float:
+        distrito = lookup(row.get('distrito'))
+        return float(TRAVEL_MINUTES[POSITION[place], POSITION[distrito]]) if distrito else math.inf
+    
+    return sorted(rows, key=minutes)
@@ -0,0 +1,111 @@
+"""
+In-process structures built from a backend and kept current by its writes
+
+search_index.FreelancerIndex, matching.MatchingSnapshot and
+availability.AvailabilityCalendar each hold backend rows in memory, shared by
+every session of the process. LiveStructure is the lifecycle they have in
+common: the first query builds the structure; data_cache invalidations
+carrying its tag re-read the freelancers they name (freelancer:<id>) in a
+background thread; other invalidations, or a build older than
+REFRESH_SECONDS, rebuild it in a background thread while queries keep
+answering from the previous build. A build that overlaps a write is left
+stale, since the write may be missing from what it loaded.
+"""
+import threading
+import time
+from typing import Any, Callable, List
+
+import data_cache
+
+REFRESH_SECONDS = 300   # full rebuild interval, for writes made by other processes
+
+class LiveStructure:
+    """Build, background rebuild and invalidation handling; subclasses load and install the data"""
+    
+    tag = 'freelancers'     # invalidations without this tag don't concern the structure
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.built_at = None            # time.monotonic() of the last full build
+        self._stale = False
+        self._rebuilding = False
+        self._writes = 0                # write notifications seen, to detect races with a rebuild
+    
+    # Subclass hooks
+    
+    def _load(self) -> Any:
+        """Read everything from the backend, without the lock; the result goes to _install"""
+        raise NotImplementedError
+    
+    def _install(self, loaded: Any):
+        """Replace the data with what _load returned (lock held)"""
+        raise NotImplementedError
+    
+    def reload(self, freelancer_ids: List[int]):
+        """Re-read some freelancers now (after a write)"""
+        raise NotImplementedError
+    
+    def _outdated(self) -> bool:
+        """Whether queries must wait for a build instead of answering from the current one"""
+        return self.built_at is None
+    
+    # Lifecycle
+    
+    def build(self):
+        """Rebuild from the backend now; queries meanwhile use the previous build"""
+        with self._lock:
+            writes = self._writes
+        loaded = self._load()
+        with self._lock:
+            self._install(loaded)
+            self.built_at = time.monotonic()
+            # A write during the load may be missing from it
+            self._stale = self._writes != writes
+    
+    def _build_in_background(self):
+        try:
+            self.build()
+        finally:
+            self._rebuilding = False
+    
+    def refresh(self):
+        """Start a background rebuild unless one is running"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+        threading.Thread(target=self._build_in_background, daemon=True).start()
+    
+    def on_invalidate(self, tags: tuple):
+        """data_cache listener: re-read the freelancers a write names, or rebuild"""
+        if self.tag not in tags:
+            return
+        ids = [int(tag.split(':', 1)[1]) for tag in tags if tag.startswith('freelancer:')]
+        with self._lock:
+            self._writes += 1
+            if not ids:
+                self._stale = True
+        if ids:
+            threading.Thread(target=self.reload, args=(ids,), daemon=True).start()
+    
+    def _ensure_fresh(self):
+        """Build on first use; rebuild in the background once stale or old"""
+        if self._outdated():
+            self.build()
+        elif self._stale or time.monotonic() - self.built_at > REFRESH_SECONDS:
+            self.refresh()
+
+# One structure per (class, backend module), shared by every session of the process
+_shared = {}
+_shared_lock = threading.RLock()   # reentrant: a structure may build on another one
+
+def shared(cls: type, backend, create: Callable[[], LiveStructure]) -> LiveStructure:
+    """The process-wide cls over a backend (database or database_supabase), created and subscribed on first use"""
+    with _shared_lock:
+        key = (cls.__name__, backend.__name__)
+        structure = _shared.get(key)
+        if structure is None:
+            structure = create()
+            data_cache.add_listener(structure.on_invalidate)
+            _shared[key] = structure
+        return structure
@@ -0,0 +1,379 @@
+"""
+Candidate matching: rank the freelancers for a project
+
+The directory is held as a columnar snapshot (NumPy arrays, one entry per
+freelancer, and a boolean freelancer x skill matrix), so scoring a project is
+a handful of vector operations over every freelancer instead of a query per
+filter. A candidate's score is a weighted sum (WEIGHTS) of:
+
+    skills       share of the project's skills (its producto plus any asked
+                 for) the freelancer has
+    rating       weighted rating dimensions, shrunk towards RATING_PRIOR
+                 while there are few ratings
+    disponible   free for the project's dates (fecha_inicio to fecha_fin) in
+                 the availability calendar, or available now without dates
+    distancia    travel time from the project's distrito (geo.TRAVEL_MINUTES):
+                 1 within it, falling to 0 at PROXIMITY_MINUTES
+    experiencia  past assignments with us, saturating at EXPERIENCE_SATURATION
+
+The snapshot is built from backend.get_match_rows() and kept current as a
+live_structure.LiveStructure, like search_index: writes naming
+freelancer:<id> re-read those rows, other changes and an old snapshot
+rebuild it in the background. nearest() answers "the k closest
+available freelancers" from the same arrays, and pool() gives
+crew_optimizer everyone who can staff a project.
+"""
+import math
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+import availability
+import geo
+import live_structure
+from text_utils import fold_accents, parse_skills, skill_slug
+
+WEIGHTS = {'skills': 0.35, 'rating': 0.25, 'disponible': 0.15, 'distancia': 0.15, 'experiencia': 0.10}
+
+# Weight of each rating dimension in the rating score
+DIMENSION_WEIGHTS = {'calidad': 0.30, 'puntualidad': 0.20, 'instrucciones': 0.15,
+                     'seguridad': 0.20, 'profesionalismo': 0.15}
+RATING_PRIOR = 3.5          # assumed average of a freelancer with no ratings yet
+RATING_PRIOR_WEIGHT = 3     # ...counted as this many ratings
+
+EXPERIENCE_SATURATION = 10  # assignments at which experiencia reaches 1
+PROXIMITY_MINUTES = 90      # travel time at which distancia reaches 0
+DEFAULT_K = 5
+
+# Per-freelancer arrays of the snapshot
+ARRAYS = {
+    'ids': np.int64,
+    'active': bool,                 # estado Activo and not deleted
+    'disponible': bool,
+    'rating': np.float32,           # rating_score()
+    'rating_promedio': np.float32,
+    'experience': np.float32,       # experience_score()
+    'tarifa': np.float32,           # average tarifa_m2 of past assignments, NaN without any
+    'distrito': np.int32            # code in the distrito vocabulary
+}
+
+# Columns kept per freelancer for the candidate list
+DISPLAY_COLUMNS = ('id', 'nombre', 'distrito', 'rating_promedio', 'disponible', 'skills',
+                   'ratings_count', 'assignments_count', 'metros_cuadrados', 'ultima_asignacion', 'tarifa_m2')
+
+def rating_score(row: Dict) -> float:
+    """0-1 rating: weighted dimension averages (or rating_promedio), shrunk towards the prior"""
+    count = row.get('ratings_count') or 0
+    if count and all(row.get(d) is not None for d in DIMENSION_WEIGHTS):
+        average = sum(float(row[d]) * weight for d, weight in DIMENSION_WEIGHTS.items())
+    else:
+        # A rating entered by hand on the form counts as one rating
+        average = float(row.get('rating_promedio') or 0)
+        count = 1 if average else 0
+    shrunk = (count * average + RATING_PRIOR_WEIGHT * RATING_PRIOR) / (count + RATING_PRIOR_WEIGHT)
+    return min(max((shrunk - 1) / 4, 0.0), 1.0)
+
+def experience_score(assignments: int) -> float:
+    return min(math.log1p(assignments or 0) / math.log1p(EXPERIENCE_SATURATION), 1.0)
+
+def project_distrito(project: Dict, distritos: Iterable[str]) -> Optional[str]:
+    """The project's distrito: its distrito field, or the longest known distrito named in its ubicacion"""
+    if project.get('distrito'):
+        return project['distrito']
+    ubicacion = fold_accents(project.get('ubicacion') or '')
+    named = [d for d in distritos if d and fold_accents(d) in ubicacion]
+    return max(named, key=len) if named else None
+
+class MatchingSnapshot(live_structure.LiveStructure):
+    """Columnar snapshot of the directory, scored per project; safe to share between sessions"""
+    
+    def __init__(self, load_rows: Callable[[Optional[List[int]]], List[Dict]],
+                 calendar: Optional[availability.AvailabilityCalendar] = None):
+        super().__init__()
+        self._load_rows = load_rows     # rows of get_match_rows(ids), all when ids is None
+        self._calendar = calendar       # for projects with dates
+        self._reset()
+    
+    def _reset(self):
+        self._position = {}             # id -> row position
+        self._rows = []                 # position -> DISPLAY_COLUMNS dict
+        self._skills = {}               # skill slug -> matrix column
+        self._distritos = {}            # distrito -> code
+        self._distrito_geo = []         # code -> geo.NAMES position, -1 outside the table
+        for name, dtype in ARRAYS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.skill_matrix = np.zeros((0, 0), dtype=bool)  # freelancer x skill
+    
+    # Encoding
+    
+    def _codes(self, rows: List[Dict]):
+        """Skill columns and distrito code of each row, growing the vocabularies"""
+        skill_cols = []
+        for row in rows:
+            cols = []
+            for name in parse_skills(row.get('skills')):
+                cols.append(self._skills.setdefault(skill_slug(name), len(self._skills)))
+            skill_cols.append(cols)
+        distrito_codes = []
+        for row in rows:
+            distrito = row.get('distrito') or ''
+            if distrito not in self._distritos:
+                self._distritos[distrito] = len(self._distritos)
+                place = geo.lookup(distrito)
+                self._distrito_geo.append(geo.POSITION[place] if place else -1)
+            distrito_codes.append(self._distritos[distrito])
+        return skill_cols, distrito_codes
+    
+    def _write(self, positions: np.ndarray, rows: List[Dict]):
+        """Encode rows into the arrays at the given positions (arrays already sized)"""
+        skill_cols, distrito_codes = self._codes(rows)
+        if self.skill_matrix.shape[1] < len(self._skills):
+            extra = np.zeros((self.skill_matrix.shape[0], len(self._skills) - self.skill_matrix.shape[1]), dtype=bool)
+            self.skill_matrix = np.hstack([self.skill_matrix, extra])
+        
+        self.ids[positions] = [row['id'] for row in rows]
+        self.active[positions] = [(row.get('estado') or 'Activo') == 'Activo' for row in rows]
+        self.disponible[positions] = [bool(row.get('disponible')) for row in rows]
+        self.rating[positions] = [rating_score(row) for row in rows]
+        self.rating_promedio[positions] = [float(row.get('rating_promedio') or 0) for row in rows]
+        self.experience[positions] = [experience_score(row.get('assignments_count')) for row in rows]
+        self.tarifa[positions] = [float(row['tarifa_m2']) if row.get('tarifa_m2') is not None else np.nan for row in rows]
+        self.distrito[positions] = distrito_codes
+        self.skill_matrix[positions] = False
+        row_index = [p for p, cols in zip(positions, skill_cols) for _ in cols]
+        self.skill_matrix[row_index, [c for cols in skill_cols for c in cols]] = True
+        
+        for position, row in zip(positions, rows):
+            self._rows[position] = {column: row.get(column) for column in DISPLAY_COLUMNS}
+            self._position[row['id']] = position
+    
+    def _append(self, rows: List[Dict]):
+        """Grow the arrays by len(rows) and encode the rows at the end"""
+        start, extra = len(self._rows), len(rows)
+        for name, dtype in ARRAYS.items():
+            setattr(self, name, np.concatenate([getattr(self, name), np.zeros(extra, dtype=dtype)]))
+        self.skill_matrix = np.vstack([self.skill_matrix, np.zeros((extra, self.skill_matrix.shape[1]), dtype=bool)])
+        self._rows += [None] * extra
+        self._write(np.arange(start, start + extra), rows)
+    
+    def upsert(self, rows: List[Dict]):
+        """Re-encode changed rows in place and append new ones"""
+        with self._lock:
+            known = [row for row in rows if row['id'] in self._position]
+            if known:
+                self._write(np.array([self._position[row['id']] for row in known]), known)
+            new = [row for row in rows if row['id'] not in self._position]
+            if new:
+                self._append(new)
+    
+    def remove(self, freelancer_ids: Iterable[int]):
+        """Stop matching deleted freelancers (their slots are dropped at the next build)"""
+        with self._lock:
+            for freelancer_id in freelancer_ids:
+                position = self._position.pop(freelancer_id, None)
+                if position is not None:
+                    self.active[position] = False
+    
+    # Building
+    
+    def _load(self) -> 'MatchingSnapshot':
+        fresh = MatchingSnapshot(self._load_rows, self._calendar)
+        fresh._append(self._load_rows(None))
+        return fresh
+    
+    def _install(self, fresh: 'MatchingSnapshot'):
+        for name in ('_position', '_rows', '_skills', '_distritos', '_distrito_geo', 'skill_matrix', *ARRAYS):
+            setattr(self, name, getattr(fresh, name))
+    
+    def reload(self, freelancer_ids: List[int]):
+        """Re-read some freelancers now (after a write)"""
+        rows = self._load_rows(list(freelancer_ids))
+        self.upsert(rows)
+        self.remove(set(freelancer_ids) - {row['id'] for row in rows})
+    
+    # Matching
+    
+    def distritos(self) -> List[str]:
+        return [d for d in self._distritos if d]
+    
+    def _mask(self, disponible: Optional[bool], min_rating: Optional[float], exclude: Iterable[int]) -> np.ndarray:
+        """Active freelancers passing the filters (call with the lock held)"""
+        mask = self.active.copy()
+        if disponible is not None:
+            mask &= self.disponible == disponible
+        if min_rating is not None:
+            mask &= self.rating_promedio >= min_rating
+        for freelancer_id in exclude:
+            position = self._position.get(freelancer_id)
+            if position is not None:
+                mask[position] = False
+        return mask
+    
+    def _from(self, place: str, matrix: np.ndarray) -> np.ndarray:
+        """Row of a geo matrix from place per distrito code; inf outside the table (lock held)"""
+        return geo.from_origin(place, np.array(self._distrito_geo, dtype=np.int32), matrix)
+    
+    def _available(self, project: Dict) -> np.ndarray:
+        """Free for the project's dates in the calendar, else disponible (lock held)"""
+        if self._calendar is not None and project.get('fecha_inicio'):
+            start = project['fecha_inicio']
+            free = self._calendar.free_mask(self.ids, start, project.get('fecha_fin') or start)
+            # None: the dates are past or beyond the calendar's horizon
+            if free is not None:
+                return free
+        return self.disponible
+    
+    def match(self, project: Dict, k: int = DEFAULT_K, skills: Iterable[str] = (),
+              only_available: bool = True, min_rating: Optional[float] = None,
+              exclude: Iterable[int] = ()) -> List[Dict]:
+        """The k best candidates for a project, best first
+        
+        project needs producto and either distrito or ubicacion, and may have
+        fecha_inicio / fecha_fin (a projects row works as is); skills adds
+        required skills to its producto.
+        Each candidate is its DISPLAY_COLUMNS row plus 'score' and the
+        per-criterion 'componentes'.
+        """
+        self._ensure_fresh()
+        
+        wanted = {skill_slug(s) for s in parse_skills(project.get('producto')) + list(skills)}
+        
+        with self._lock:
+            available = self._available(project)
+            mask = self._mask(None, min_rating, exclude)
+            if only_available:
+                mask &= available
+            
+            columns = [self._skills[slug] for slug in wanted if slug in self._skills]
+            if wanted:
+                # A skill nobody has counts as missing for everyone
+                skill_score = self.skill_matrix[:, columns].sum(axis=1, dtype=np.float32) / len(wanted)
+            else:
+                skill_score = np.ones(len(self.ids), dtype=np.float32)
+            
+            near = np.zeros(len(self.ids), dtype=np.float32)
+            place = geo.locate(project.get('distrito') or project.get('ubicacion'))
+            if place:
+                minutes = self._from(place, geo.TRAVEL_MINUTES)
+                span = PROXIMITY_MINUTES - geo.DISTRICT_MINUTES
+                near = np.clip(1 - (minutes - geo.DISTRICT_MINUTES) / span, 0, 1).astype(np.float32)[self.distrito]
+            # Distritos outside the geo table still match by name
+            distrito = project_distrito(project, self._distritos)
+            code = self._distritos.get(distrito) if distrito else None
+            if code is not None:
+                near[self.distrito == code] = 1
+            
+            components = {
+                'skills': skill_score,
+                'rating': self.rating,
+                'disponible': available.astype(np.float32),
+                'distancia': near,
+                'experiencia': self.experience
+            }
+            score = sum(WEIGHTS[name] * values for name, values in components.items())
+            
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > k:
+                # Everyone scoring at least the k-th best, so ties at the cut are decided below
+                kth = np.partition(score[candidates], len(candidates) - k)[len(candidates) - k]
+                candidates = candidates[score[candidates] >= kth]
+            # Best score first; ties go to the better rating
+            candidates = candidates[np.lexsort((-self.rating[candidates], -score[candidates]))][:k]
+            
+            return [
+                {
+                    **self._rows[i],
+                    'score': round(float(score[i]), 3),
+                    'componentes': {name: round(float(values[i]), 3) for name, values in components.items()}
+                }
+                for i in candidates
+            ]
+    
+    def nearest(self, origin: str, k: int = DEFAULT_K, skills: Iterable[str] = (),
+                disponible: Optional[bool] = True, distrito: str = "",
+                exclude: Iterable[int] = (), include_unlocated: bool = False) -> List[Dict]:
+        """The k freelancers closest to origin (a distrito or an ubicacion), closest first
+        
+        skills are all required; distrito restricts to one distrito as
+        stored. Each row is its DISPLAY_COLUMNS plus 'minutos' (estimated
+        travel time) and 'km' from origin. Freelancers whose distrito is not
+        in the geo table come last, with None for both, if include_unlocated.
+        Empty when origin is not located.
+        """
+        place = geo.locate(origin)
+        if place is None:
+            return []
+        self._ensure_fresh()
+        
+        with self._lock:
+            minutes = self._from(place, geo.TRAVEL_MINUTES)[self.distrito]
+            mask = self._mask(disponible, None, exclude)
+            if not include_unlocated:
+                mask &= np.isfinite(minutes)
+            for skill in skills:
+                column = self._skills.get(skill_slug(skill))
+                if column is None:
+                    return []
+                mask &= self.skill_matrix[:, column]
+            if distrito:
+                mask &= self.distrito == self._distritos.get(distrito, -1)
+            
+            candidates = np.flatnonzero(mask)
+            if len(candidates) > k:
+                kth = np.partition(minutes[candidates], k - 1)[k - 1]
+                candidates = candidates[minutes[candidates] <= kth]
+            # Closest first; ties (same distrito) go to the better rating
+            candidates = candidates[np.lexsort((-self.rating_promedio[candidates], minutes[candidates]))][:k]
+            km = self._from(place, geo.DISTANCE_KM)[self.distrito[candidates]]
+            
+            return [
+                {
+                    **self._rows[i],
+                    'minutos': round(float(minutes[i])) if np.isfinite(minutes[i]) else None,
+                    'km': round(float(distance), 1) if np.isfinite(distance) else None
+                }
+                for i, distance in zip(candidates, km)
+            ]
+    
+    def pool(self, project: Dict, skills: Iterable[str] = ()) -> Dict[str, np.ndarray]:
+        """Freelancers who can staff a project: active, with every skill it needs and free for its dates
+        
+        Arrays per candidate: 'ids', 'minutos' (travel time from the
+        project's distrito, inf when either is not located), 'rating'
+        (rating_score) and 'tarifa' (NaN without past assignments).
+        """
+        self._ensure_fresh()
+        wanted = {skill_slug(s) for s in parse_skills(project.get('producto')) + list(skills)}
+        place = geo.locate(project.get('distrito') or project.get('ubicacion'))
+        
+        with self._lock:
+            mask = self._mask(None, None, ()) & self._available(project)
+            for slug in wanted:
+                column = self._skills.get(slug)
+                if column is None:
+                    mask[:] = False
+                    break
+                mask &= self.skill_matrix[:, column]
+            
+            positions = np.flatnonzero(mask)
+            if place:
+                minutes = self._from(place, geo.TRAVEL_MINUTES)[self.distrito[positions]]
+            else:
+                minutes = np.full(len(positions), np.inf, dtype=np.float32)
+            return {
+                'ids': self.ids[positions],
+                'minutos': minutes,
+                'rating': self.rating[positions],
+                'tarifa': self.tarifa[positions]
+            }
+    
+    def rows(self, freelancer_ids: Iterable[int]) -> List[Dict]:
+        """DISPLAY_COLUMNS rows of freelancers in the snapshot, in the order given"""
+        with self._lock:
+            return [dict(self._rows[self._position[i]]) for i in freelancer_ids if i in self._position]
+
+def get_snapshot(backend) -> MatchingSnapshot:
+    """The process-wide matching snapshot over a backend's directory (database or database_supabase)"""
+    return live_structure.shared(MatchingSnapshot, backend, lambda: MatchingSnapshot(
+        backend.get_match_rows, availability.get_calendar(backend)
+    ))
@@ -0,0 +1,214 @@
+"""
+In-process search index over the freelancer directory
+
+Search-as-you-type for the Aplicadores list without a request per keystroke.
+Text is accent-folded (text_utils.fold_accents) and split into words; every
+word start up to MAX_PREFIX characters is posted per field, and every word
+trigram is posted for infix matches ("rez" finds "Pérez", as ilike '%rez%'
+did). Each query word must match; word starts score the field weight, infix
+matches SUBSTRING_FACTOR of it, and ties go to the higher rating.
+
+The index is built from every row of the backend's directory query (cached
+by data_cache; Supabase reads it in keyset pages under PostgREST's max-rows)
+and kept current on writes as a live_structure.LiveStructure: writes naming
+freelancer:<id> re-read those rows, other directory changes and an old index
+rebuild it in the background.
+"""
+import heapq
+import re
+from typing import Callable, Dict, Iterable, List, Optional
+
+import live_structure
+from text_utils import fold_accents, parse_skills, skill_slug
+
+# Columns the index keeps per freelancer (the list card plus searchable fields)
+SEARCH_COLUMNS = ('id', 'nombre', 'distrito', 'rating_promedio', 'disponible', 'skills', 'telefono')
+
+# Score of a word-start match per field, as the FTS weights in database.py
+FIELD_WEIGHTS = {'nombre': 10.0, 'skills': 5.0, 'telefono': 3.0, 'distrito': 2.0}
+SUBSTRING_FACTOR = 0.5
+
+MAX_PREFIX = 12         # longer query words are checked against the full words
+DEFAULT_LIMIT = 48
+
+WORD = re.compile(r'\w+')
+
+def field_words(field: str, value) -> List[str]:
+    """Folded words of one field; a phone number is one word of its digits"""
+    if value is None:
+        return []
+    if field == 'telefono':
+        digits = re.sub(r'\D', '', str(value))
+        return [digits] if digits else []
+    return WORD.findall(fold_accents(str(value)))
+
+def trigrams(word: str) -> set:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+class FreelancerIndex(live_structure.LiveStructure):
+    """Prefix and trigram postings over SEARCH_COLUMNS rows, safe to share between sessions"""
+    
+    def __init__(self, load_rows: Callable[[], List[Dict]], load_row: Callable[[int], Optional[Dict]]):
+        super().__init__()
+        self._load_rows = load_rows     # every row, with at least SEARCH_COLUMNS
+        self._load_row = load_row       # one fresh row by id, None once deleted
+        self._reset()
+    
+    def _reset(self):
+        self._rows = {}                 # id -> row
+        self._words = {}                # id -> {field: [words]}
+        self._ratings = {}              # id -> rating, to rank ties
+        self._prefixes = {field: {} for field in FIELD_WEIGHTS}  # field -> word start -> ids
+        self._trigrams = {field: {} for field in FIELD_WEIGHTS}  # field -> trigram -> ids
+        self._filters = {}              # ('distrito', value) / ('disponible', bool) / ('skill', slug) -> ids
+    
+    # Postings
+    
+    def _postings(self, row: Dict, words: Dict[str, List[str]]):
+        """(postings dict, key) pairs a row is filed under"""
+        for field, values in words.items():
+            for word in values:
+                for end in range(1, min(len(word), MAX_PREFIX) + 1):
+                    yield self._prefixes[field], word[:end]
+                for trigram in trigrams(word):
+                    yield self._trigrams[field], trigram
+        yield self._filters, ('distrito', row.get('distrito'))
+        yield self._filters, ('disponible', bool(row.get('disponible')))
+        for skill in parse_skills(row.get('skills')):
+            yield self._filters, ('skill', skill_slug(skill))
+    
+    def _add(self, row: Dict):
+        freelancer_id = row['id']
+        words = {field: field_words(field, row.get(field)) for field in FIELD_WEIGHTS}
+        self._rows[freelancer_id] = {column: row.get(column) for column in SEARCH_COLUMNS}
+        self._words[freelancer_id] = words
+        self._ratings[freelancer_id] = float(row.get('rating_promedio') or 0)
+        for postings, key in self._postings(row, words):
+            postings.setdefault(key, set()).add(freelancer_id)
+    
+    def _remove(self, freelancer_id: int):
+        row = self._rows.pop(freelancer_id, None)
+        if row is None:
+            return
+        words = self._words.pop(freelancer_id)
+        del self._ratings[freelancer_id]
+        for postings, key in self._postings(row, words):
+            ids = postings.get(key)
+            if ids is not None:
+                ids.discard(freelancer_id)
+                if not ids:
+                    del postings[key]
+    
+    def upsert(self, row: Dict):
+        """Index a new or changed row"""
+        with self._lock:
+            self._remove(row['id'])
+            self._add(row)
+    
+    def remove(self, freelancer_id: int):
+        """Drop a deleted freelancer"""
+        with self._lock:
+            self._remove(freelancer_id)
+    
+    # Building
+    
+    def _load(self) -> 'FreelancerIndex':
+        fresh = FreelancerIndex(self._load_rows, self._load_row)
+        for row in self._load_rows():
+            fresh._add(row)
+        return fresh
+    
+    def _install(self, fresh: 'FreelancerIndex'):
+        self._rows, self._words, self._ratings = fresh._rows, fresh._words, fresh._ratings
+        self._prefixes, self._trigrams, self._filters = fresh._prefixes, fresh._trigrams, fresh._filters
+    
+    def reload(self, freelancer_ids: Iterable[int]):
+        """Re-read some freelancers now (after a write)"""
+        for freelancer_id in freelancer_ids:
+            row = self._load_row(freelancer_id)
+            if row is None:
+                self.remove(freelancer_id)
+            else:
+                self.upsert(row)
+    
+    # Searching
+    
+    def _match(self, word: str) -> List[tuple]:
+        """Disjoint (score, ids) groups of the rows matching one query word, best first"""
+        levels = [(weight, field, False) for field, weight in FIELD_WEIGHTS.items()]
+        levels += [(weight * SUBSTRING_FACTOR, field, True) for field, weight in FIELD_WEIGHTS.items()]
+        
+        groups = []
+        matched = set()
+        for score, field, infix in sorted(levels, reverse=True):
+            if not infix:
+                ids = self._prefixes[field].get(word[:MAX_PREFIX], set()) - matched
+                exact = len(word) <= MAX_PREFIX
+            else:
+                grams = [self._trigrams[field].get(g, set()) for g in trigrams(word)]
+                ids = set.intersection(*sorted(grams, key=len)) - matched if grams else set()
+                exact = len(word) == 3
+            # Postings narrow the candidates; longer words are confirmed on the words
+            if not exact:
+                ids = {i for i in ids if any((w.startswith(word) if not infix else word in w)
+                                             for w in self._words[i][field])}
+            if ids:
+                groups.append((score, ids))
+                matched |= ids
+        return groups
+    
+    def search(self, text: str, limit: int = DEFAULT_LIMIT, distrito: str = "",
+               disponible: Optional[bool] = None, skills: Iterable[str] = ()) -> Dict:
+        """Top matches for text, best first, among the rows passing the filters
+        
+        Every query word must match a word start (or, from 3 characters, part
+        of a word) in nombre, skills, telefono or distrito. skills are names,
+        all required. Returns {'items': [rows], 'total': number of matches}.
+        """
+        self._ensure_fresh()
+        
+        words = field_words('nombre', text)
+        if not words:
+            return {'items': [], 'total': 0}
+        
+        filters = [('skill', skill_slug(s)) for s in skills]
+        if distrito:
+            filters.append(('distrito', distrito))
+        if disponible is not None:
+            filters.append(('disponible', disponible))
+        
+        with self._lock:
+            groups = self._match(words[0])
+            if len(words) > 1:
+                # Several words: every one must match, scores add up
+                scores = {i: score for score, ids in groups for i in ids}
+                for word in words[1:]:
+                    matches = {i: score for score, ids in self._match(word) for i in ids}
+                    scores = {i: scores[i] + matches[i] for i in scores.keys() & matches.keys()}
+                by_score = {}
+                for i, score in scores.items():
+                    by_score.setdefault(score, set()).add(i)
+                groups = sorted(by_score.items(), reverse=True)
+            
+            if filters:
+                allowed = set.intersection(*(self._filters.get(key, set()) for key in filters))
+                groups = [(score, ids & allowed) for score, ids in groups]
+            
+            # Best score first, then highest rating
+            top = []
+            for score, ids in groups:
+                if len(top) >= limit:
+                    break
+                top += heapq.nlargest(limit - len(top), ids, key=self._ratings.__getitem__)
+            
+            return {
+                'items': [dict(self._rows[i]) for i in top],
+                'total': sum(len(ids) for _, ids in groups)
+            }
+
+def get_index(backend) -> FreelancerIndex:
+    """The process-wide index over a backend's directory (database or database_supabase)"""
+    return live_structure.shared(FreelancerIndex, backend, lambda: FreelancerIndex(
+        lambda: backend.query_freelancers(limit=None, columns=SEARCH_COLUMNS)['items'],
+        backend.get_freelancer_by_id
+    ))
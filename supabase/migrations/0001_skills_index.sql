@@ -0,0 +1,88 @@
+-- Normalized skills dictionary and inverted index (freelancer_skills)
+-- replacing LIKE/ilike matching on the comma-separated freelancers.skills column.
+-- freelancers.skills stays the source of truth; a trigger keeps the index in sync.
+
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- Canonical skill key: trimmed, lowercase, accents removed ('Epóxico' -> 'epoxico')
+CREATE OR REPLACE FUNCTION skill_slug(skill TEXT)
+RETURNS TEXT AS $$
+    SELECT regexp_replace(lower(public.unaccent(trim(skill))), '\s+', ' ', 'g');
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE TABLE IF NOT EXISTS skills (
+    id BIGSERIAL PRIMARY KEY,
+    nombre VARCHAR(50) NOT NULL,
+    slug VARCHAR(50) NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS freelancer_skills (
+    freelancer_id BIGINT NOT NULL REFERENCES freelancers(id) ON DELETE CASCADE,
+    skill_id BIGINT NOT NULL REFERENCES skills(id) ON DELETE CASCADE,
+    PRIMARY KEY (freelancer_id, skill_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_freelancer_skills_skill ON freelancer_skills(skill_id, freelancer_id);
+
+-- Rebuild one freelancer's index rows from the skills text column
+CREATE OR REPLACE FUNCTION sync_freelancer_skills()
+RETURNS TRIGGER AS $$
+BEGIN
+    DELETE FROM freelancer_skills WHERE freelancer_id = NEW.id;
+
+    INSERT INTO skills (nombre, slug)
+    SELECT DISTINCT ON (skill_slug(s)) regexp_replace(trim(s), '\s+', ' ', 'g'), skill_slug(s)
+    FROM unnest(string_to_array(coalesce(NEW.skills, ''), ',')) AS s
+    WHERE skill_slug(s) <> ''
+    ON CONFLICT (slug) DO NOTHING;
+
+    INSERT INTO freelancer_skills (freelancer_id, skill_id)
+    SELECT DISTINCT NEW.id, sk.id
+    FROM unnest(string_to_array(coalesce(NEW.skills, ''), ',')) AS s
+    JOIN skills sk ON sk.slug = skill_slug(s)
+    ON CONFLICT DO NOTHING;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS sync_freelancer_skills ON freelancers;
+CREATE TRIGGER sync_freelancer_skills AFTER INSERT OR UPDATE OF skills ON freelancers
+FOR EACH ROW EXECUTE FUNCTION sync_freelancer_skills();
+
+-- Backfill from existing rows
+INSERT INTO skills (nombre, slug)
+SELECT DISTINCT ON (skill_slug(s)) regexp_replace(trim(s), '\s+', ' ', 'g'), skill_slug(s)
+FROM freelancers f, unnest(string_to_array(coalesce(f.skills, ''), ',')) AS s
+WHERE skill_slug(s) <> ''
+ON CONFLICT (slug) DO NOTHING;
+
+INSERT INTO freelancer_skills (freelancer_id, skill_id)
+SELECT DISTINCT f.id, sk.id
+FROM freelancers f, unnest(string_to_array(coalesce(f.skills, ''), ',')) AS s
+JOIN skills sk ON sk.slug = skill_slug(s)
+ON CONFLICT DO NOTHING;
+
+-- Freelancers having all (p_match_all) or any of the given skills, optionally in one distrito
+CREATE OR REPLACE FUNCTION find_freelancers_by_skills(
+    p_skills TEXT[],
+    p_match_all BOOLEAN DEFAULT true,
+    p_distrito TEXT DEFAULT NULL
+)
+RETURNS SETOF freelancers AS $$
+    WITH wanted AS (
+        SELECT DISTINCT skill_slug(s) AS slug FROM unnest(p_skills) AS s WHERE skill_slug(s) <> ''
+    )
+    SELECT f.*
+    FROM freelancers f
+    WHERE f.id IN (
+        SELECT fs.freelancer_id
+        FROM freelancer_skills fs
+        JOIN skills sk ON sk.id = fs.skill_id
+        JOIN wanted w ON w.slug = sk.slug
+        GROUP BY fs.freelancer_id
+        HAVING NOT p_match_all OR COUNT(*) = (SELECT COUNT(*) FROM wanted)
+    )
+    AND (p_distrito IS NULL OR f.distrito = p_distrito)
+    ORDER BY f.rating_promedio DESC, f.nombre;
+$$ LANGUAGE sql STABLE;
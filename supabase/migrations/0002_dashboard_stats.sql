@@ -0,0 +1,40 @@
+-- Dashboard statistics in a single round trip.
+-- Replaces two count='exact' selects (which downloaded every active row) and a
+-- third select that averaged rating_promedio in Python.
+
+-- Per-distrito aggregates over active freelancers
+CREATE OR REPLACE VIEW freelancer_stats_by_distrito AS
+SELECT
+    distrito,
+    COUNT(*) AS total,
+    COUNT(*) FILTER (WHERE disponible) AS disponibles,
+    COUNT(*) - COUNT(*) FILTER (WHERE disponible) AS en_proyecto,
+    SUM(rating_promedio) FILTER (WHERE rating_promedio > 0) AS rating_sum,
+    COUNT(rating_promedio) FILTER (WHERE rating_promedio > 0) AS rated
+FROM freelancers
+WHERE estado = 'Activo'
+GROUP BY distrito;
+
+-- Totals (and optionally the per-distrito breakdown) as one JSON object.
+-- avg_rating ignores unrated (0/NULL) freelancers, as the app always has.
+CREATE OR REPLACE FUNCTION get_dashboard_stats(p_by_distrito BOOLEAN DEFAULT false)
+RETURNS JSON AS $$
+    SELECT json_build_object(
+        'total', COALESCE(SUM(total), 0),
+        'disponibles', COALESCE(SUM(disponibles), 0),
+        'en_proyecto', COALESCE(SUM(en_proyecto), 0),
+        'avg_rating', COALESCE(ROUND(SUM(rating_sum) / NULLIF(SUM(rated), 0), 1), 0),
+        'por_distrito', CASE WHEN p_by_distrito THEN COALESCE(json_agg(
+            json_build_object(
+                'distrito', distrito,
+                'total', total,
+                'disponibles', disponibles,
+                'en_proyecto', en_proyecto,
+                'avg_rating', COALESCE(ROUND(rating_sum / NULLIF(rated, 0), 1), 0)
+            ) ORDER BY distrito
+        ), '[]'::json) END
+    )
+    FROM freelancer_stats_by_distrito;
+$$ LANGUAGE sql STABLE;
+
+CREATE INDEX IF NOT EXISTS idx_freelancers_estado_disponible ON freelancers(estado, disponible, distrito);
@@ -0,0 +1,117 @@
+-- Running rating aggregates per freelancer, maintained in O(1) by a trigger
+-- on ratings, inside the same transaction as the rating insert.
+-- Replaces the read-assignment / read-all-assignments / read-all-ratings /
+-- write-average sequence that add_rating used to run from Python.
+
+CREATE TABLE IF NOT EXISTS freelancer_rating_stats (
+    freelancer_id BIGINT PRIMARY KEY REFERENCES freelancers(id) ON DELETE CASCADE,
+    ratings_count INTEGER NOT NULL DEFAULT 0,
+    sum_general NUMERIC(12,2) NOT NULL DEFAULT 0,
+    sum_calidad INTEGER NOT NULL DEFAULT 0,
+    sum_puntualidad INTEGER NOT NULL DEFAULT 0,
+    sum_instrucciones INTEGER NOT NULL DEFAULT 0,
+    sum_seguridad INTEGER NOT NULL DEFAULT 0,
+    sum_profesionalismo INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);
+
+-- Add (p_sign = 1) or remove (p_sign = -1) one rating from its freelancer's aggregates
+CREATE OR REPLACE FUNCTION apply_rating_stats(r ratings, p_sign INTEGER)
+RETURNS VOID AS $$
+DECLARE
+    v_freelancer_id BIGINT;
+    v_count INTEGER;
+    v_sum NUMERIC;
+BEGIN
+    SELECT freelancer_id INTO v_freelancer_id FROM assignments WHERE id = r.assignment_id;
+    IF v_freelancer_id IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO freelancer_rating_stats AS s (
+        freelancer_id, ratings_count, sum_general,
+        sum_calidad, sum_puntualidad, sum_instrucciones, sum_seguridad, sum_profesionalismo
+    )
+    VALUES (
+        v_freelancer_id, p_sign, p_sign * COALESCE(r.rating_general, 0),
+        p_sign * COALESCE(r.calidad, 0), p_sign * COALESCE(r.puntualidad, 0), p_sign * COALESCE(r.instrucciones, 0),
+        p_sign * COALESCE(r.seguridad, 0), p_sign * COALESCE(r.profesionalismo, 0)
+    )
+    ON CONFLICT (freelancer_id) DO UPDATE SET
+        ratings_count = s.ratings_count + EXCLUDED.ratings_count,
+        sum_general = s.sum_general + EXCLUDED.sum_general,
+        sum_calidad = s.sum_calidad + EXCLUDED.sum_calidad,
+        sum_puntualidad = s.sum_puntualidad + EXCLUDED.sum_puntualidad,
+        sum_instrucciones = s.sum_instrucciones + EXCLUDED.sum_instrucciones,
+        sum_seguridad = s.sum_seguridad + EXCLUDED.sum_seguridad,
+        sum_profesionalismo = s.sum_profesionalismo + EXCLUDED.sum_profesionalismo,
+        updated_at = NOW()
+    RETURNING ratings_count, sum_general INTO v_count, v_sum;
+
+    -- Removing the last rating resets the average to the column default
+    UPDATE freelancers
+    SET rating_promedio = CASE WHEN v_count > 0 THEN ROUND(v_sum / v_count, 2) ELSE 0 END
+    WHERE id = v_freelancer_id;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION ratings_maintain_stats()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_rating_stats(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_rating_stats(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS ratings_maintain_stats ON ratings;
+CREATE TRIGGER ratings_maintain_stats AFTER INSERT OR UPDATE OR DELETE ON ratings
+FOR EACH ROW EXECUTE FUNCTION ratings_maintain_stats();
+
+-- Repair job: recompute aggregates from scratch for one freelancer (or all when NULL)
+CREATE OR REPLACE FUNCTION rebuild_rating_stats(p_freelancer_id BIGINT DEFAULT NULL)
+RETURNS INTEGER AS $$
+DECLARE
+    v_rebuilt INTEGER;
+BEGIN
+    -- Freelancers whose ratings are all gone drop back to 0, like the trigger leaves them
+    UPDATE freelancers SET rating_promedio = 0
+    WHERE id IN (
+        SELECT freelancer_id FROM freelancer_rating_stats
+        WHERE p_freelancer_id IS NULL OR freelancer_id = p_freelancer_id
+    );
+
+    DELETE FROM freelancer_rating_stats
+    WHERE p_freelancer_id IS NULL OR freelancer_id = p_freelancer_id;
+
+    INSERT INTO freelancer_rating_stats (
+        freelancer_id, ratings_count, sum_general,
+        sum_calidad, sum_puntualidad, sum_instrucciones, sum_seguridad, sum_profesionalismo
+    )
+    SELECT a.freelancer_id, COUNT(*), COALESCE(SUM(r.rating_general), 0),
+           COALESCE(SUM(r.calidad), 0), COALESCE(SUM(r.puntualidad), 0), COALESCE(SUM(r.instrucciones), 0),
+           COALESCE(SUM(r.seguridad), 0), COALESCE(SUM(r.profesionalismo), 0)
+    FROM ratings r
+    JOIN assignments a ON a.id = r.assignment_id
+    WHERE p_freelancer_id IS NULL OR a.freelancer_id = p_freelancer_id
+    GROUP BY a.freelancer_id;
+    GET DIAGNOSTICS v_rebuilt = ROW_COUNT;
+
+    UPDATE freelancers f
+    SET rating_promedio = ROUND(s.sum_general / s.ratings_count, 2)
+    FROM freelancer_rating_stats s
+    WHERE s.freelancer_id = f.id
+      AND s.ratings_count > 0
+      AND (p_freelancer_id IS NULL OR f.id = p_freelancer_id);
+
+    RETURN v_rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE INDEX IF NOT EXISTS idx_ratings_assignment ON ratings(assignment_id);
+
+SELECT rebuild_rating_stats();
@@ -0,0 +1,72 @@
+-- Filter facets for the Aplicadores list in a single round trip.
+-- Replaces downloading every freelancer row to build the distrito dropdown.
+-- Filters mirror the list query: ilike on nombre, all of p_skills (by slug),
+-- distrito and disponible. Each facet is counted with every filter except its
+-- own, so the options of an active filter stay selectable.
+CREATE OR REPLACE FUNCTION get_freelancer_facets(
+    p_search TEXT DEFAULT NULL,
+    p_skills TEXT[] DEFAULT NULL,
+    p_distrito TEXT DEFAULT NULL,
+    p_disponible BOOLEAN DEFAULT NULL
+)
+RETURNS JSON AS $$
+    WITH wanted AS (
+        SELECT DISTINCT skill_slug(s) AS slug FROM unnest(coalesce(p_skills, '{}')) AS s WHERE skill_slug(s) <> ''
+    ),
+    base AS MATERIALIZED (
+        SELECT
+            f.id,
+            f.distrito,
+            f.disponible,
+            (p_distrito IS NULL OR f.distrito = p_distrito) AS match_distrito,
+            (p_disponible IS NULL OR f.disponible = p_disponible) AS match_disponible,
+            (
+                NOT EXISTS (SELECT 1 FROM wanted)
+                OR f.id IN (
+                    SELECT fs.freelancer_id
+                    FROM freelancer_skills fs
+                    JOIN skills sk ON sk.id = fs.skill_id
+                    JOIN wanted w ON w.slug = sk.slug
+                    GROUP BY fs.freelancer_id
+                    HAVING COUNT(*) = (SELECT COUNT(*) FROM wanted)
+                )
+            ) AS match_skills
+        FROM freelancers f
+        WHERE p_search IS NULL OR p_search = '' OR f.nombre ILIKE '%' || p_search || '%'
+    )
+    SELECT json_build_object(
+        'total', (
+            SELECT COUNT(*) FROM base WHERE match_distrito AND match_skills AND match_disponible
+        ),
+        'distritos', (
+            SELECT COALESCE(json_agg(json_build_object('value', distrito, 'count', n) ORDER BY distrito), '[]'::json)
+            FROM (
+                SELECT distrito, COUNT(*) AS n FROM base
+                WHERE match_skills AND match_disponible AND distrito IS NOT NULL
+                GROUP BY distrito
+            ) d
+        ),
+        'skills', (
+            SELECT COALESCE(json_agg(json_build_object('value', nombre, 'count', n) ORDER BY n DESC, nombre), '[]'::json)
+            FROM (
+                SELECT sk.nombre, COUNT(*) AS n
+                FROM base b
+                JOIN freelancer_skills fs ON fs.freelancer_id = b.id
+                JOIN skills sk ON sk.id = fs.skill_id
+                WHERE b.match_distrito AND b.match_disponible
+                GROUP BY sk.id, sk.nombre
+            ) s
+        ),
+        'disponibilidad', (
+            SELECT COALESCE(json_agg(json_build_object('value', disponible, 'count', n) ORDER BY disponible), '[]'::json)
+            FROM (
+                SELECT disponible, COUNT(*) AS n FROM base
+                WHERE match_distrito AND match_skills AND disponible IS NOT NULL
+                GROUP BY disponible
+            ) a
+        )
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Lets the facet scan read distrito/disponible from the index alone
+CREATE INDEX IF NOT EXISTS idx_freelancers_distrito_disponible ON freelancers(distrito, disponible);
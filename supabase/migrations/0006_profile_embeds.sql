@@ -0,0 +1,5 @@
+-- Indexes for the one-request profile (get_freelancer_profile): the embedded
+-- contact_log is read newest first with a limit, and ratings are joined per
+-- assignment (idx_ratings_assignment, 0003).
+CREATE INDEX IF NOT EXISTS idx_contact_log_freelancer_fecha ON contact_log(freelancer_id, fecha DESC);
+CREATE INDEX IF NOT EXISTS idx_assignments_freelancer_fecha ON assignments(freelancer_id, fecha_inicio DESC);
@@ -0,0 +1,57 @@
+-- Availability calendar (availability.py): declared unavailability, and the
+-- booked and unavailable intervals the calendar's bitsets are built from.
+-- freelancers.disponible becomes derived ("free today"), kept by
+-- sync_disponible() from a nightly job.
+
+CREATE TABLE IF NOT EXISTS unavailability (
+    id BIGSERIAL PRIMARY KEY,
+    freelancer_id BIGINT NOT NULL REFERENCES freelancers(id) ON DELETE CASCADE,
+    fecha_inicio DATE NOT NULL,
+    fecha_fin DATE NOT NULL,
+    motivo VARCHAR(100),
+    created_at TIMESTAMP DEFAULT NOW(),
+    CHECK (fecha_fin >= fecha_inicio)
+);
+
+CREATE INDEX IF NOT EXISTS idx_unavailability_freelancer ON unavailability(freelancer_id, fecha_inicio);
+CREATE INDEX IF NOT EXISTS idx_unavailability_fecha_fin ON unavailability(fecha_fin);
+CREATE INDEX IF NOT EXISTS idx_assignments_fecha_fin ON assignments(fecha_fin);
+
+-- Freelancers marked Ocupado so far keep that for 30 days (OPEN_ASSIGNMENT_DAYS)
+INSERT INTO unavailability (freelancer_id, fecha_inicio, fecha_fin, motivo)
+SELECT f.id, CURRENT_DATE, CURRENT_DATE + 30, 'Marcado como ocupado'
+FROM freelancers f
+WHERE NOT f.disponible
+  AND NOT EXISTS (SELECT 1 FROM unavailability u WHERE u.freelancer_id = f.id AND u.motivo = 'Marcado como ocupado');
+
+-- Assignments take their project's dates when they have none; with no end at
+-- all they book 30 days (OPEN_ASSIGNMENT_DAYS in database.py)
+CREATE OR REPLACE VIEW busy_intervals WITH (security_invoker = true) AS
+SELECT * FROM (
+    SELECT
+        a.freelancer_id,
+        'asignacion'::TEXT AS fuente,
+        a.id AS ref_id,
+        COALESCE(a.fecha_inicio, p.fecha_inicio) AS fecha_inicio,
+        COALESCE(a.fecha_fin, p.fecha_fin, COALESCE(a.fecha_inicio, p.fecha_inicio) + 30) AS fecha_fin,
+        p.nombre::TEXT AS motivo
+    FROM assignments a
+    LEFT JOIN projects p ON p.id = a.project_id
+    UNION ALL
+    SELECT u.freelancer_id, 'no_disponible', u.id, u.fecha_inicio, u.fecha_fin, u.motivo::TEXT
+    FROM unavailability u
+) intervals
+WHERE fecha_inicio IS NOT NULL;
+
+-- disponible = not in p_busy, for every freelancer. Returns the rows changed
+-- as a one-row table, which postgrest-py reads as a list of rows.
+CREATE OR REPLACE FUNCTION sync_disponible(p_busy BIGINT[])
+RETURNS TABLE (changed INTEGER) AS $$
+BEGIN
+    UPDATE freelancers SET disponible = NOT disponible
+    -- Available but busy, or marked Ocupado but free
+    WHERE disponible = (id = ANY(p_busy));
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    RETURN NEXT;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,30 @@
+-- Average tarifa_m2 of each freelancer's past assignments on the matching
+-- rows (0007), one of the costs the crew optimizer (crew_optimizer.py)
+-- staffs projects by. The column is added last so the view can be replaced
+-- in place.
+CREATE OR REPLACE VIEW freelancer_match_rows WITH (security_invoker = true) AS
+SELECT
+    f.id, f.nombre, f.distrito, f.rating_promedio, f.disponible, f.estado, f.skills,
+    COALESCE(s.ratings_count, 0) AS ratings_count,
+    s.sum_calidad::NUMERIC / NULLIF(s.ratings_count, 0) AS calidad,
+    s.sum_puntualidad::NUMERIC / NULLIF(s.ratings_count, 0) AS puntualidad,
+    s.sum_instrucciones::NUMERIC / NULLIF(s.ratings_count, 0) AS instrucciones,
+    s.sum_seguridad::NUMERIC / NULLIF(s.ratings_count, 0) AS seguridad,
+    s.sum_profesionalismo::NUMERIC / NULLIF(s.ratings_count, 0) AS profesionalismo,
+    w.assignments_count,
+    w.metros_cuadrados,
+    w.ultima_asignacion,
+    w.tarifa_m2
+FROM freelancers f
+LEFT JOIN freelancer_rating_stats s ON s.freelancer_id = f.id
+-- Per freelancer through idx_assignments_freelancer_fecha (0006)
+CROSS JOIN LATERAL (
+    SELECT
+        COUNT(*) AS assignments_count,
+        COALESCE(SUM(p.metros_cuadrados), 0) AS metros_cuadrados,
+        MAX(a.fecha_inicio) AS ultima_asignacion,
+        AVG(a.tarifa_m2) AS tarifa_m2
+    FROM assignments a
+    LEFT JOIN projects p ON p.id = a.project_id
+    WHERE a.freelancer_id = f.id
+) w;
@@ -0,0 +1,78 @@
+-- Crew assignment in one transaction (assign_crew() in database_supabase.py):
+-- every assignment of a crew is inserted in one call, and disponible turns
+-- false for those whose work is under way today. Nothing is written if any
+-- of them is already booked or declared unavailable on those dates (the
+-- busy_intervals view, 0008): the call fails with SQLSTATE 23P01 naming them.
+-- The freelancer rows are locked first, so two crews racing for the same
+-- applicator cannot both pass the check.
+--
+-- p_data holds the other assignments columns (fecha_inicio, fecha_fin,
+-- tarifa_m2, monto_total, estado_pago); any other key is rejected, as
+-- database.py's assign_crew() does, instead of being dropped by
+-- jsonb_populate_record. Missing dates are checked as busy_intervals
+-- resolves them: the project's, then 30 days from the start
+-- (OPEN_ASSIGNMENT_DAYS in database.py), and stored as resolved.
+CREATE OR REPLACE FUNCTION assign_crew(p_project_id BIGINT, p_freelancer_ids BIGINT[], p_data JSONB DEFAULT '{}')
+RETURNS TABLE (freelancer_id BIGINT, assignment_id BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+    v_row assignments;
+    v_project projects;
+    v_start DATE;
+    v_end DATE;
+    v_busy TEXT;
+    v_invalid TEXT;
+BEGIN
+    SELECT string_agg(k.key, ', ' ORDER BY k.key) INTO v_invalid
+    FROM jsonb_object_keys(p_data) AS k(key)
+    WHERE k.key NOT IN ('fecha_inicio', 'fecha_fin', 'tarifa_m2', 'monto_total', 'estado_pago');
+    IF v_invalid IS NOT NULL THEN
+        RAISE EXCEPTION 'Unknown assignment columns: %', v_invalid USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+    v_row := jsonb_populate_record(NULL::assignments, p_data);
+    SELECT * INTO v_project FROM projects WHERE id = p_project_id;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Proyecto inexistente: %', p_project_id USING ERRCODE = 'foreign_key_violation';
+    END IF;
+    IF cardinality(p_freelancer_ids) <> (SELECT COUNT(DISTINCT id) FROM unnest(p_freelancer_ids) AS ids(id)) THEN
+        RAISE EXCEPTION 'Un aplicador figura dos veces en la cuadrilla' USING ERRCODE = 'unique_violation';
+    END IF;
+
+    v_start := COALESCE(v_row.fecha_inicio, v_project.fecha_inicio, CURRENT_DATE);
+    v_end := COALESCE(v_row.fecha_fin, v_project.fecha_fin, v_start + 30);
+    IF v_end < v_start THEN
+        RAISE EXCEPTION 'La fecha de fin es anterior a la de inicio' USING ERRCODE = 'check_violation';
+    END IF;
+
+    PERFORM 1 FROM freelancers WHERE id = ANY(p_freelancer_ids) ORDER BY id FOR UPDATE;
+
+    SELECT string_agg(crew.id::TEXT, ', ' ORDER BY crew.ord) INTO v_invalid
+    FROM unnest(p_freelancer_ids) WITH ORDINALITY AS crew(id, ord)
+    WHERE NOT EXISTS (SELECT 1 FROM freelancers f WHERE f.id = crew.id);
+    IF v_invalid IS NOT NULL THEN
+        RAISE EXCEPTION 'Aplicadores inexistentes: %', v_invalid USING ERRCODE = 'foreign_key_violation';
+    END IF;
+
+    SELECT string_agg(DISTINCT f.nombre, ', ') INTO v_busy
+    FROM busy_intervals b
+    JOIN freelancers f ON f.id = b.freelancer_id
+    WHERE b.freelancer_id = ANY(p_freelancer_ids)
+      AND b.fecha_inicio <= v_end AND b.fecha_fin >= v_start;
+    IF v_busy IS NOT NULL THEN
+        RAISE EXCEPTION 'Doble asignación: % ya ocupados entre % y %', v_busy, v_start, v_end
+            USING ERRCODE = 'exclusion_violation';
+    END IF;
+
+    IF v_start <= CURRENT_DATE AND CURRENT_DATE <= v_end THEN
+        UPDATE freelancers SET disponible = FALSE WHERE id = ANY(p_freelancer_ids);
+    END IF;
+
+    -- Store the dates checked above, so the booking stays visible to the next check
+    RETURN QUERY
+    INSERT INTO assignments AS a (project_id, freelancer_id, fecha_inicio, fecha_fin, tarifa_m2, monto_total, estado_pago)
+    SELECT p_project_id, crew.id, v_start, v_end, v_row.tarifa_m2, v_row.monto_total,
+           COALESCE(v_row.estado_pago, 'Pendiente')
+    FROM unnest(p_freelancer_ids) AS crew(id)
+    RETURNING a.freelancer_id, a.id;
+END;
+$$ LANGUAGE plpgsql;
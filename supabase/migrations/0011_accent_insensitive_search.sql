@@ -0,0 +1,94 @@
+-- Accent-insensitive name search, matching the SQLite backend (FTS5 with
+-- remove_diacritics): "Jesus" finds "Jesús" and "Nunez" finds "Núñez".
+-- nombre_busqueda holds the folded name (lowercase, no accents, like
+-- text_utils.fold_accents); the list query and get_freelancer_facets()
+-- match the folded search term against it.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Lowercase without accents ('Núñez' -> 'nunez'); IMMUTABLE like skill_slug (0001).
+-- The generated column and its index call it on insert and on restore, when
+-- search_path may not include public (pg_dump clears it), so the function and
+-- the dictionary are both named with their schema.
+CREATE OR REPLACE FUNCTION public.fold_search(value TEXT)
+RETURNS TEXT AS $$
+    SELECT lower(public.unaccent('public.unaccent'::regdictionary, coalesce(value, '')));
+$$ LANGUAGE sql IMMUTABLE;
+
+ALTER TABLE freelancers
+    ADD COLUMN IF NOT EXISTS nombre_busqueda TEXT GENERATED ALWAYS AS (public.fold_search(nombre)) STORED;
+
+-- '%term%' matches use the trigram index
+CREATE INDEX IF NOT EXISTS idx_freelancers_nombre_busqueda ON freelancers USING gin (nombre_busqueda gin_trgm_ops);
+
+-- Same signature as 0005; only the search filter changes
+CREATE OR REPLACE FUNCTION get_freelancer_facets(
+    p_search TEXT DEFAULT NULL,
+    p_skills TEXT[] DEFAULT NULL,
+    p_distrito TEXT DEFAULT NULL,
+    p_disponible BOOLEAN DEFAULT NULL,
+    p_estado TEXT DEFAULT NULL,
+    p_rating_min NUMERIC DEFAULT NULL,
+    p_rating_max NUMERIC DEFAULT NULL
+)
+RETURNS JSON AS $$
+    WITH wanted AS (
+        SELECT DISTINCT skill_slug(s) AS slug FROM unnest(coalesce(p_skills, '{}')) AS s WHERE skill_slug(s) <> ''
+    ),
+    base AS MATERIALIZED (
+        SELECT
+            f.id,
+            f.distrito,
+            f.disponible,
+            (p_distrito IS NULL OR f.distrito = p_distrito) AS match_distrito,
+            (p_disponible IS NULL OR f.disponible = p_disponible) AS match_disponible,
+            (
+                NOT EXISTS (SELECT 1 FROM wanted)
+                OR f.id IN (
+                    SELECT fs.freelancer_id
+                    FROM freelancer_skills fs
+                    JOIN skills sk ON sk.id = fs.skill_id
+                    JOIN wanted w ON w.slug = sk.slug
+                    GROUP BY fs.freelancer_id
+                    HAVING COUNT(*) = (SELECT COUNT(*) FROM wanted)
+                )
+            ) AS match_skills
+        FROM freelancers f
+        WHERE (p_search IS NULL OR p_search = '' OR f.nombre_busqueda LIKE '%' || fold_search(p_search) || '%')
+          AND (p_estado IS NULL OR f.estado = p_estado)
+          AND (p_rating_min IS NULL OR f.rating_promedio >= p_rating_min)
+          AND (p_rating_max IS NULL OR f.rating_promedio <= p_rating_max)
+    )
+    SELECT json_build_object(
+        'total', (
+            SELECT COUNT(*) FROM base WHERE match_distrito AND match_skills AND match_disponible
+        ),
+        'distritos', (
+            SELECT COALESCE(json_agg(json_build_object('value', distrito, 'count', n) ORDER BY distrito), '[]'::json)
+            FROM (
+                SELECT distrito, COUNT(*) AS n FROM base
+                WHERE match_skills AND match_disponible AND distrito IS NOT NULL
+                GROUP BY distrito
+            ) d
+        ),
+        'skills', (
+            SELECT COALESCE(json_agg(json_build_object('value', nombre, 'count', n) ORDER BY n DESC, nombre), '[]'::json)
+            FROM (
+                SELECT sk.nombre, COUNT(*) AS n
+                FROM base b
+                JOIN freelancer_skills fs ON fs.freelancer_id = b.id
+                JOIN skills sk ON sk.id = fs.skill_id
+                WHERE b.match_distrito AND b.match_disponible
+                GROUP BY sk.id, sk.nombre
+            ) s
+        ),
+        'disponibilidad', (
+            SELECT COALESCE(json_agg(json_build_object('value', disponible, 'count', n) ORDER BY disponible), '[]'::json)
+            FROM (
+                SELECT disponible, COUNT(*) AS n FROM base
+                WHERE match_distrito AND match_skills AND disponible IS NOT NULL
+                GROUP BY disponible
+            ) a
+        )
+    );
+$$ LANGUAGE sql STABLE;
@@ -0,0 +1,16 @@
+"""Shared fixtures: the repo root on sys.path and a scratch SQLite database"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import database as db
+
+@pytest.fixture
+def sqlite_db(tmp_path, monkeypatch):
+    """database.py pointed at an empty, migrated database for the test"""
+    monkeypatch.setattr(db, 'DB_PATH', str(tmp_path / 'test.db'))
+    db.init_database()
+    yield db
+    db.close_connection()
@@ -0,0 +1,102 @@
+"""database.assign_crew: whole crews in one transaction, rejected on double-booking"""
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+@pytest.fixture
+def crew_db(sqlite_db):
+    """Four freelancers and two projects: one running this week, one next month"""
+    conn = sqlite_db.get_connection()
+    with conn:
+        conn.executemany("INSERT INTO freelancers (nombre, telefono) VALUES (?, ?)",
+                         [(f"Aplicador {i}", f"90000000{i}") for i in range(1, 5)])
+        conn.execute("INSERT INTO projects (nombre, fecha_inicio, fecha_fin) VALUES ('Esta semana', ?, ?)",
+                     (day(-1), day(5)))
+        conn.execute("INSERT INTO projects (nombre, fecha_inicio, fecha_fin) VALUES ('Mes próximo', ?, ?)",
+                     (day(30), day(40)))
+    return sqlite_db
+
+def assignments(db) -> list:
+    return [tuple(row) for row in db.get_connection().execute(
+        "SELECT project_id, freelancer_id, fecha_inicio, fecha_fin FROM assignments ORDER BY id")]
+
+def disponibles(db) -> dict:
+    return dict(db.get_connection().execute("SELECT id, disponible FROM freelancers").fetchall())
+
+def test_crew_is_assigned_in_order(crew_db):
+    ids = crew_db.assign_crew(1, [3, 1, 2])
+    assert len(set(ids)) == 3
+    rows = crew_db.get_connection().execute("SELECT id, freelancer_id FROM assignments").fetchall()
+    assert [dict(rows)[i] for i in ids] == [3, 1, 2]
+    # Under way today: the crew is no longer available
+    assert disponibles(crew_db) == {1: 0, 2: 0, 3: 0, 4: 1}
+
+def test_future_crew_keeps_disponible(crew_db):
+    crew_db.assign_crew(2, [1, 2], {'tarifa_m2': 12.5})
+    assert assignments(crew_db) == [(2, 1, day(30), day(40)), (2, 2, day(30), day(40))]
+    assert disponibles(crew_db) == {1: 1, 2: 1, 3: 1, 4: 1}
+
+def test_overlapping_booking_rejects_the_whole_crew(crew_db):
+    crew_db.assign_crew(1, [2])
+    with pytest.raises(ValueError, match="Doble asignación: Aplicador 2 ya ocupados"):
+        crew_db.assign_crew(2, [1, 2, 3], {'fecha_inicio': day(4), 'fecha_fin': day(8)})
+    assert assignments(crew_db) == [(1, 2, day(-1), day(5))]
+    assert not crew_db.get_connection().in_transaction
+    
+    # The day after the first project ends is free
+    crew_db.assign_crew(2, [1, 2, 3], {'fecha_inicio': day(6), 'fecha_fin': day(8)})
+    assert len(assignments(crew_db)) == 4
+
+def test_declared_unavailability_rejects_the_crew(crew_db):
+    crew_db.add_unavailability(4, day(33), day(34), "Viaje")
+    with pytest.raises(ValueError, match="Aplicador 4"):
+        crew_db.assign_crew(2, [3, 4])
+    assert assignments(crew_db) == []
+
+def test_open_assignment_books_the_default_span(crew_db):
+    conn = crew_db.get_connection()
+    with conn:
+        conn.execute("INSERT INTO projects (nombre) VALUES ('Sin fechas')")
+    crew_db.assign_crew(3, [1], {'fecha_inicio': day(50)})
+    with pytest.raises(ValueError, match="Doble asignación"):
+        crew_db.assign_crew(3, [1], {'fecha_inicio': day(50 + crew_db.OPEN_ASSIGNMENT_DAYS),
+                                     'fecha_fin': day(90)})
+
+def test_undated_project_cannot_be_booked_twice(crew_db):
+    conn = crew_db.get_connection()
+    with conn:
+        conn.execute("INSERT INTO projects (nombre) VALUES ('Sin fechas')")
+    crew_db.assign_crew(3, [1])
+    assert assignments(crew_db) == [(3, 1, day(0), day(crew_db.OPEN_ASSIGNMENT_DAYS))]
+    with pytest.raises(ValueError, match="Doble asignación: Aplicador 1"):
+        crew_db.assign_crew(3, [1, 2])
+    assert len(assignments(crew_db)) == 1
+
+@pytest.mark.parametrize('project_id, freelancer_ids, data, message', [
+    (1, [1, 2, 1], {}, "Un aplicador figura dos veces en la cuadrilla"),
+    (1, [1, 99, 98], {}, "Aplicadores inexistentes: 99, 98"),
+    (7, [1], {}, "Proyecto inexistente: 7"),
+    (1, [1], {'fecha': day(1), 'tarifa': 10}, "Unknown assignment columns: fecha, tarifa"),
+    (1, [1], {'fecha_inicio': day(3), 'fecha_fin': day(2)}, "La fecha de fin es anterior a la de inicio"),
+])
+def test_invalid_crews_write_nothing(crew_db, project_id, freelancer_ids, data, message):
+    with pytest.raises(ValueError, match=message):
+        crew_db.assign_crew(project_id, freelancer_ids, data)
+    assert assignments(crew_db) == []
+    assert disponibles(crew_db) == {1: 1, 2: 1, 3: 1, 4: 1}
+
+def test_failure_midway_rolls_back_the_crew(crew_db):
+    conn = crew_db.get_connection()
+    conn.execute('''
+        CREATE TEMP TRIGGER reject_third BEFORE INSERT ON assignments WHEN NEW.freelancer_id = 3
+        BEGIN SELECT RAISE(ABORT, 'rechazado'); END
+    ''')
+    with pytest.raises(sqlite3.IntegrityError, match="rechazado"):
+        crew_db.assign_crew(1, [1, 2, 3])
+    assert assignments(crew_db) == []
+    assert disponibles(crew_db) == {1: 1, 2: 1, 3: 1, 4: 1}
+    assert not conn.in_transaction
@@ -0,0 +1,115 @@
+"""bulk_import: row normalization, deduplication and the per-row error report"""
+import io
+import re
+import sqlite3
+
+import pytest
+
+import bulk_import
+
+POSITIONS = {'dni': 0, 'nombre': 1, 'telefono': 2, 'distrito': 3}
+
+def csv_file(*lines: str) -> io.BytesIO:
+    return io.BytesIO("\n".join(lines).encode('utf-8'))
+
+def test_normalize_row_cleans_each_column():
+    row = bulk_import.normalize_row([1234567.0, '  Ana   Pérez ', '+51 987 654 321', 'los olivos'],
+                                    POSITIONS, {'los olivos': 'Los Olivos'})
+    assert row == {'dni': '01234567', 'nombre': 'Ana Pérez', 'telefono': '987654321', 'distrito': 'Los Olivos'}
+
+def test_normalize_row_blank_cells():
+    row = bulk_import.normalize_row(['', 'Luis Soto', '1234567'], POSITIONS, {})
+    assert row['dni'] is None
+    assert row['telefono'] == '011234567'
+    assert row['distrito'] is None     # short rows read the missing cells as empty
+
+@pytest.mark.parametrize('cells, reason', [
+    (['123', 'Ana', '987654321'], "DNI inválido: 123"),
+    (['', 'Ana', '12345'], "Teléfono inválido: 12345"),
+    (['', 'Ana', ''], "Teléfono inválido: (vacío)"),
+    (['', '', '987654321'], "Nombre vacío"),
+    (['', 'A' * 101, '987654321'], "nombre supera 100 caracteres"),
+])
+def test_normalize_row_rejects_invalid_cells(cells, reason):
+    with pytest.raises(ValueError, match=re.escape(reason)):
+        bulk_import.normalize_row(cells, POSITIONS, {})
+
+def test_import_dedupes_and_reports_bad_rows(sqlite_db):
+    report = bulk_import.import_freelancers(csv_file(
+        "DNI;Nombre;Celular;Rating;Disponible",
+        "1234567;Ana Pérez;987654321;5;no",
+        ";Luis Soto;987111222;cinco;quizás",
+        ";Luis Soto Bis;987 111 222;",
+        "01234567;Ana Duplicada;999888777;",
+        "123;Mal DNI;999000111;",
+        "",
+        "87654321;Sin Teléfono;;",
+    ), 'crew.csv', sqlite_db)
+    
+    assert (report['rows'], report['inserted'], report['updated'], report['duplicates']) == (6, 2, 0, 2)
+    assert report['errors'] == [
+        (4, "Duplicado de la fila 3 (telefono 987111222)"),
+        (5, "Duplicado de la fila 2 (dni 01234567)"),
+        (6, "DNI inválido: 123"),
+        (8, "Teléfono inválido: (vacío)"),
+    ]
+    rows = sqlite_db.get_connection().execute(
+        "SELECT dni, nombre, telefono, rating_promedio, disponible FROM freelancers ORDER BY id").fetchall()
+    # Rating and Disponible aren't import columns: their cells are ignored, not written
+    assert [tuple(row) for row in rows] == [('01234567', 'Ana Pérez', '987654321', 0, 1),
+                                            (None, 'Luis Soto', '987111222', 0, 1)]
+
+def test_existing_dnis_are_updated_or_skipped(sqlite_db):
+    bulk_import.import_freelancers(csv_file("DNI,Nombre,Celular", "12345678,Ana,987654321"), 'a.csv', sqlite_db)
+    
+    report = bulk_import.import_freelancers(csv_file("DNI,Nombre,Celular", "12345678,Ana María,987654321"),
+                                            'b.csv', sqlite_db, on_existing='skip')
+    assert (report['inserted'], report['updated'], report['skipped']) == (0, 0, 1)
+    
+    report = bulk_import.import_freelancers(csv_file("DNI,Nombre,Celular", "12345678,Ana María,987654321"),
+                                            'c.csv', sqlite_db)
+    assert (report['inserted'], report['updated'], report['skipped']) == (0, 1, 0)
+    assert sqlite_db.get_connection().execute("SELECT nombre FROM freelancers").fetchone()[0] == 'Ana María'
+
+class APIError(Exception):
+    """Stand-in for postgrest's APIError, which carries the SQLSTATE in .code"""
+    def __init__(self, code: str):
+        super().__init__(f"SQLSTATE {code}")
+        self.code = code
+
+class FailingBackend:
+    """Accepts batches without the rejected phones; a batch with one fails whole, raising error"""
+    def __init__(self, rejected: set, error: Exception):
+        self.rejected = rejected
+        self.error = error
+        self.written = []
+        self.batches = 0
+    
+    def upsert_freelancers(self, rows):
+        self.batches += 1
+        if any(row['telefono'] in self.rejected for row in rows):
+            raise self.error
+        self.written += rows
+        return len(rows)
+
+@pytest.mark.parametrize('error', [sqlite3.IntegrityError("CHECK constraint failed"), APIError('23514'),
+                                   APIError('22001')])
+def test_failed_batch_is_bisected_down_to_the_bad_rows(error):
+    rows = [(number, {'telefono': f'9{number:08}'}) for number in range(2, 18)]
+    backend = FailingBackend({'900000005', '900000012'}, error)
+    report = {'errors': []}
+    
+    bulk_import._write_chunk(backend, rows, report)
+    
+    assert report['errors'] == [(5, f"Error al guardar: {error}"), (12, f"Error al guardar: {error}")]
+    assert len(backend.written) == 14
+    assert backend.batches < len(rows) * 2
+
+@pytest.mark.parametrize('error', [ConnectionError("timeout"), APIError('42501'), ValueError("Unknown column")])
+def test_other_errors_stop_the_import_instead_of_bisecting(error):
+    rows = [(number, {'telefono': f'9{number:08}'}) for number in range(2, 18)]
+    backend = FailingBackend({'900000005'}, error)
+    
+    with pytest.raises(type(error)):
+        bulk_import._write_chunk(backend, rows, {'errors': []})
+    assert backend.batches == 1
@@ -0,0 +1,69 @@
+"""crew_optimizer: the sparse group solve matches a dense assignment over every candidate"""
+import numpy as np
+import pytest
+from scipy.optimize import linear_sum_assignment
+
+import crew_optimizer
+
+def random_group(seed: int, crews: list, freelancers: int):
+    """Pools drawing on one shared set of freelancers, with random costs"""
+    rnd = np.random.default_rng(seed)
+    pools, costs = [], []
+    for _ in crews:
+        ids = np.sort(rnd.choice(freelancers, size=rnd.integers(1, freelancers + 1), replace=False)) + 1
+        pools.append({'ids': ids.astype(np.int64)})
+        costs.append(rnd.random(len(ids)).astype(np.float32))
+    return pools, costs
+
+def dense_optimum(crews: list, pools: list, costs: list) -> tuple:
+    """(slots filled, total cost) of the best assignment, filling as many slots as possible"""
+    ids = np.unique(np.concatenate([pool['ids'] for pool in pools]))
+    column = {int(i): j for j, i in enumerate(ids)}
+    slots = [p for p, crew in enumerate(crews) for _ in range(crew)]
+    unfilled = 1e6
+    matrix = np.full((len(slots), len(ids) + len(slots)), unfilled)
+    for row, p in enumerate(slots):
+        matrix[row, [column[int(i)] for i in pools[p]['ids']]] = costs[p]
+    rows, cols = linear_sum_assignment(matrix)
+    picked = matrix[rows, cols][matrix[rows, cols] < unfilled]
+    return len(picked), float(picked.sum())
+
+@pytest.mark.parametrize('seed, crews, freelancers', [
+    (1, [3, 2, 4], 40),
+    (2, [8, 8, 8, 8], 30),      # more slots than some pools: not everyone can be staffed
+    (3, [1] * 25, 400),         # many small crews sharing a large pool
+    (4, [6, 1, 5, 2], 12),
+])
+def test_solve_group_is_optimal(seed, crews, freelancers):
+    pools, costs = random_group(seed, crews, freelancers)
+    group = list(range(len(crews)))
+    
+    picked = crew_optimizer.solve_group(group, crews, pools, costs)
+    
+    chosen = [int(pools[p]['ids'][k]) for p in group for k in picked[p]]
+    assert len(chosen) == len(set(chosen))                  # nobody on two projects of the group
+    assert all(len(picked[p]) <= crews[p] for p in group)
+    filled, cost = dense_optimum(crews, pools, costs)
+    assert len(chosen) == filled
+    assert sum(float(costs[p][k]) for p in group for k in picked[p]) == pytest.approx(cost, abs=1e-4)
+
+def test_large_groups_reach_past_the_cheapest_candidates():
+    # Every project ranks the same freelancers cheapest, so 600 slots need more than the first 500
+    costs = np.random.default_rng(5).random(700).astype(np.float32)
+    pools = [{'ids': np.arange(1, 701, dtype=np.int64)}] * 300
+    crews = [2] * 300
+    
+    picked = crew_optimizer.solve_group(list(range(300)), crews, pools, [costs] * 300)
+    
+    assert sum(len(positions) for positions in picked.values()) == 600
+    filled, cost = dense_optimum(crews, pools, [costs] * 300)
+    assert sum(float(costs[k]) for positions in picked.values() for k in positions) == pytest.approx(cost, rel=1e-5)
+
+def test_overlapping_groups_chain_through_overlaps():
+    projects = [
+        {'fecha_inicio': '2030-01-10', 'fecha_fin': '2030-01-15'},
+        {'fecha_inicio': '2030-01-01', 'fecha_fin': '2030-01-05'},
+        {'fecha_inicio': '2030-01-04', 'fecha_fin': '2030-01-11'},
+        {'fecha_inicio': '2030-02-01'},
+    ]
+    assert crew_optimizer.overlapping_groups(projects) == [[1, 2, 0], [3]]
@@ -0,0 +1,110 @@
+"""data_cache: tag invalidation, the version-checked set, TTL, LRU eviction and write notifications"""
+import threading
+
+import pytest
+
+import data_cache
+from data_cache import TTLCache
+
+@pytest.fixture
+def cache(monkeypatch):
+    """A fresh process-wide cache and listener list for the test"""
+    fresh = TTLCache()
+    monkeypatch.setattr(data_cache, '_cache', fresh)
+    monkeypatch.setattr(data_cache, '_listeners', [])
+    return fresh
+
+def test_invalidate_drops_only_entries_with_the_tag():
+    cache = TTLCache()
+    cache.set(('list', 1), 'a', ('freelancers',))
+    cache.set(('detail', 7), 'b', ('freelancers', 'freelancer:7'))
+    cache.set(('stats',), 'c', ('stats',))
+    
+    assert cache.invalidate('freelancer:7') == 1
+    assert cache.get(('detail', 7)) == (False, None)
+    assert cache.get(('list', 1)) == (True, 'a')
+    assert cache.get(('stats',)) == (True, 'c')
+    
+    assert cache.invalidate('freelancers', 'stats') == 2
+    assert cache.stats()['size'] == 0
+
+def test_set_after_invalidation_during_fetch_is_discarded():
+    cache = TTLCache()
+    tags = ('freelancers', 'freelancer:7')
+    versions = cache.versions(tags)
+    cache.invalidate('freelancer:7')    # a write lands while the value is fetched
+    cache.set(('detail', 7), 'stale', tags, versions)
+    assert cache.get(('detail', 7)) == (False, None)
+    
+    cache.set(('detail', 7), 'fresh', tags, cache.versions(tags))
+    assert cache.get(('detail', 7)) == (True, 'fresh')
+
+def test_clear_also_discards_sets_in_flight():
+    cache = TTLCache()
+    cache.set(('list', 1), 'a', ('freelancers',))
+    versions = cache.versions(('freelancers',))
+    cache.clear()
+    cache.set(('list', 1), 'stale', ('freelancers',), versions)
+    assert cache.get(('list', 1)) == (False, None)
+
+def test_expired_entries_miss(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(data_cache.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(ttl=10)
+    cache.set(('list', 1), 'a', ('freelancers',))
+    now[0] = 109
+    assert cache.get(('list', 1)) == (True, 'a')
+    now[0] = 111
+    assert cache.get(('list', 1)) == (False, None)
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.set(('f', 1), 1, ())
+    cache.set(('f', 2), 2, ())
+    cache.get(('f', 1))
+    cache.set(('f', 3), 3, ())
+    assert cache.get(('f', 2)) == (False, None)
+    assert cache.get(('f', 1)) == (True, 1)
+    assert cache.stats()['evictions'] == 1
+
+def test_cached_function_racing_a_write_does_not_store_stale_rows(cache):
+    rows = {'nombre': 'Ana'}
+    fetching, written = threading.Event(), threading.Event()
+    
+    @data_cache.cached('freelancers', key_tags=lambda freelancer_id: (f'freelancer:{freelancer_id}',))
+    def get_freelancer(freelancer_id):
+        value = dict(rows)
+        fetching.set()
+        written.wait(5)
+        return value
+    
+    reader = threading.Thread(target=get_freelancer, args=(7,))
+    reader.start()
+    fetching.wait(5)
+    rows['nombre'] = 'Ana María'
+    data_cache.invalidate('freelancer:7')
+    written.set()
+    reader.join()
+    
+    assert cache.stats()['size'] == 0
+    assert get_freelancer(7) == {'nombre': 'Ana María'}
+    assert get_freelancer(7) == {'nombre': 'Ana María'}
+    assert cache.stats()['functions']['get_freelancer'] == {'hits': 1, 'misses': 2}
+
+def test_invalidate_notifies_listeners_with_the_tags(cache):
+    seen = []
+    data_cache.add_listener(seen.append)
+    data_cache.invalidate('freelancer:7', 'stats')
+    assert seen == [('freelancer:7', 'stats')]
+
+def test_sqlite_writes_notify_listeners(cache, sqlite_db):
+    seen = []
+    data_cache.add_listener(seen.append)
+    freelancer_id = sqlite_db.add_freelancer({'nombre': 'Ana', 'telefono': '987654321'})
+    unavailability_id = sqlite_db.add_unavailability(freelancer_id, '2030-01-01', '2030-01-05')
+    sqlite_db.delete_unavailability(unavailability_id)
+    sqlite_db.delete_freelancer(freelancer_id)
+    assert seen == [('freelancers', 'stats', f'freelancer:{freelancer_id}'),
+                    ('availability', f'freelancer:{freelancer_id}'),
+                    ('availability', f'freelancer:{freelancer_id}'),
+                    ('freelancers', 'stats', f'freelancer:{freelancer_id}')]
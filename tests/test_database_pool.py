@@ -0,0 +1,52 @@
+"""database.py connection pool: leases per thread, returned when the thread ends"""
+import threading
+
+def in_thread(fn):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(fn()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+def test_finished_threads_return_their_connection(sqlite_db):
+    connections = {in_thread(lambda: id(sqlite_db.get_connection())) for _ in range(10)}
+    assert len(connections) == 1
+    assert len(sqlite_db._pool) == 1
+
+def test_same_thread_keeps_its_connection(sqlite_db):
+    assert sqlite_db.get_connection() is sqlite_db.get_connection()
+
+def test_thread_ending_mid_transaction_is_rolled_back(sqlite_db):
+    def write_without_commit():
+        conn = sqlite_db.get_connection()
+        conn.execute("BEGIN")
+        conn.execute("INSERT INTO projects (nombre) VALUES ('Sin confirmar')")
+    
+    in_thread(write_without_commit)
+    pooled = sqlite_db._pool[0][1]
+    assert not pooled.in_transaction
+    assert sqlite_db.get_connection().execute("SELECT COUNT(*) FROM projects").fetchone()[0] == 0
+
+def test_concurrent_threads_get_distinct_connections(sqlite_db):
+    barrier = threading.Barrier(4)
+    seen = []
+    
+    def lease():
+        seen.append(sqlite_db.get_connection())
+        barrier.wait()
+    
+    threads = [threading.Thread(target=lease) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len({id(conn) for conn in seen}) == 4
+    assert len(sqlite_db._pool) <= sqlite_db.POOL_SIZE
+
+def test_path_change_drops_pooled_connections(sqlite_db, tmp_path, monkeypatch):
+    in_thread(sqlite_db.get_connection)
+    old = sqlite_db._pool[0][1]
+    monkeypatch.setattr(sqlite_db, 'DB_PATH', str(tmp_path / 'other.db'))
+    conn = sqlite_db.get_connection()
+    assert conn is not old
+    assert sqlite_db._pool == []
@@ -0,0 +1,74 @@
+"""live_structure: builds racing writes, background reloads and the per-backend registry"""
+import threading
+import types
+
+import pytest
+
+import data_cache
+import live_structure
+
+class Counter(live_structure.LiveStructure):
+    """Counts its builds; on_load runs in the middle of each load"""
+    def __init__(self, on_load=lambda: None):
+        super().__init__()
+        self.on_load = on_load
+        self.builds = 0
+        self.reloaded = []
+        self.reloading = threading.Event()
+    
+    def _load(self):
+        self.on_load()
+        return self.builds + 1
+    
+    def _install(self, builds):
+        self.builds = builds
+    
+    def reload(self, freelancer_ids):
+        self.reloaded.append(freelancer_ids)
+        self.reloading.set()
+
+@pytest.fixture
+def listeners(monkeypatch):
+    monkeypatch.setattr(data_cache, '_listeners', [])
+    monkeypatch.setattr(live_structure, '_shared', {})
+
+def test_a_write_during_the_load_leaves_the_build_stale():
+    structure = Counter()
+    structure.on_load = lambda: structure.on_invalidate(('freelancers', 'stats'))
+    structure.build()
+    assert structure._stale
+    
+    structure.on_load = lambda: None
+    structure.build()
+    assert not structure._stale and structure.builds == 2
+
+def test_named_freelancers_are_reloaded_and_other_tags_ignored():
+    structure = Counter()
+    structure.build()
+    structure.on_invalidate(('availability', 'freelancer:3'))
+    structure.on_invalidate(('freelancers', 'stats', 'freelancer:7', 'freelancer:9'))
+    assert structure.reloading.wait(5)
+    assert structure.reloaded == [[7, 9]]
+    assert not structure._stale and structure._writes == 1
+
+def test_first_use_builds_and_stale_rebuilds_in_the_background():
+    structure = Counter()
+    structure._ensure_fresh()
+    assert structure.builds == 1
+    
+    structure.on_invalidate(('freelancers',))
+    structure._ensure_fresh()
+    for _ in range(500):
+        if structure.builds == 2:
+            break
+        threading.Event().wait(0.01)
+    assert structure.builds == 2 and not structure._stale
+
+def test_shared_keeps_one_subscribed_structure_per_backend(listeners):
+    local, remote = types.SimpleNamespace(__name__='database'), types.SimpleNamespace(__name__='database_supabase')
+    first = live_structure.shared(Counter, local, Counter)
+    assert live_structure.shared(Counter, local, Counter) is first
+    assert live_structure.shared(Counter, remote, Counter) is not first
+    
+    data_cache.invalidate('freelancers', 'freelancer:4')
+    assert first.reloading.wait(5) and first.reloaded == [[4]]
@@ -0,0 +1,108 @@
+"""matching: the snapshot's filters return the same freelancers as the SQL queries"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+import availability
+import matching
+from text_utils import parse_skills, skill_slug
+
+SKILLS = ['Epóxico', 'Poliuretano', 'Poliaspártico', 'Microcemento', 'Rodillo', 'Autonivelante']
+# Las Vegas is not in the geo table: those freelancers have no travel time
+DISTRITOS = ['Ate', 'Surco', 'Los Olivos', 'San Juan de Lurigancho', 'Callao', 'Miraflores', 'Las Vegas', None]
+
+def day(offset: int) -> str:
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+@pytest.fixture
+def directory(sqlite_db):
+    """300 freelancers with mixed skills, distritos, estados and bookings in the coming weeks"""
+    rnd = random.Random(21)
+    # Through upsert_freelancers so the skills index the SQL filter reads is filled
+    sqlite_db.upsert_freelancers([
+        {'dni': f"{i:08d}", 'nombre': f"Aplicador {i}", 'telefono': f"9{i:08d}", 'distrito': rnd.choice(DISTRITOS),
+         'skills': ", ".join(rnd.sample(SKILLS, rnd.randint(0, 3))), 'rating_promedio': round(rnd.uniform(0, 5), 1),
+         'estado': rnd.choice(['Activo'] * 4 + ['Inactivo']), 'disponible': rnd.random() < 0.7}
+        for i in range(300)
+    ])
+    conn = sqlite_db.get_connection()
+    with conn:
+        conn.execute("INSERT INTO projects (nombre, producto) VALUES ('Obra', 'Epóxico')")
+        for freelancer_id in rnd.sample(range(1, 301), 60):
+            start = rnd.randint(-5, 30)
+            conn.execute("INSERT INTO assignments (project_id, freelancer_id, fecha_inicio, fecha_fin) VALUES (1, ?, ?, ?)",
+                         (freelancer_id, day(start), day(start + rnd.randint(0, 10))))
+        for freelancer_id in rnd.sample(range(1, 301), 30):
+            start = rnd.randint(0, 30)
+            conn.execute("INSERT INTO unavailability (freelancer_id, fecha_inicio, fecha_fin) VALUES (?, ?, ?)",
+                         (freelancer_id, day(start), day(start + rnd.randint(0, 5))))
+    return sqlite_db
+
+@pytest.fixture
+def snapshot(directory):
+    snapshot = matching.MatchingSnapshot(directory.get_match_rows,
+                                         availability.AvailabilityCalendar(directory.get_busy_intervals))
+    snapshot.build()
+    return snapshot
+
+def sql_ids(db, skills=(), distrito="", disponible=None) -> set:
+    rows = db.query_freelancers(skill_filter=", ".join(skills), distrito_filter=distrito, disponible=disponible,
+                                estado='Activo', limit=None, columns=('id',))['items']
+    return {row['id'] for row in rows}
+
+def busy_ids(db, start: str, end: str) -> set:
+    return {row['freelancer_id'] for row in db.get_busy_intervals(start)
+            if row['fecha_inicio'] <= end and row['fecha_fin'] >= start}
+
+@pytest.mark.parametrize('skills, distrito, disponible', [
+    ((), "", None),
+    ((), "", True),
+    (('Epóxico',), "", True),
+    (('epoxico', 'Rodillo'), "", None),
+    ((), "Surco", False),
+    (('Microcemento',), "Las Vegas", None),
+    (('Pintura',), "", None),
+])
+def test_nearest_filters_like_sql(directory, snapshot, skills, distrito, disponible):
+    rows = snapshot.nearest('Miraflores', k=1000, skills=skills, distrito=distrito, disponible=disponible,
+                            include_unlocated=True)
+    assert {row['id'] for row in rows} == sql_ids(directory, skills, distrito, disponible)
+    
+    minutes = [row['minutos'] for row in rows]
+    located = [m for m in minutes if m is not None]
+    assert located == sorted(located)
+    assert minutes[:len(located)] == located   # unlocated freelancers come last
+
+def test_nearest_keeps_the_k_closest(directory, snapshot):
+    everyone = snapshot.nearest('Ate', k=1000, skills=('Epóxico',))
+    closest = snapshot.nearest('Ate', k=10, skills=('Epóxico',))
+    assert len(closest) == 10
+    assert max(row['minutos'] for row in closest) <= min(row['minutos'] for row in everyone[10:])
+    assert all(row['distrito'] not in ('Las Vegas', None) for row in everyone)
+
+def test_match_without_dates_filters_on_disponible(directory, snapshot):
+    candidates = snapshot.match({'producto': 'Epóxico', 'ubicacion': 'Av. Javier Prado, Surco'}, k=1000)
+    assert {row['id'] for row in candidates} == sql_ids(directory, disponible=True)
+    
+    scores = [row['score'] for row in candidates]
+    assert scores == sorted(scores, reverse=True)
+    for row in candidates:
+        has_skill = skill_slug('Epóxico') in {skill_slug(s) for s in parse_skills(row['skills'])}
+        assert row['componentes']['skills'] == (1.0 if has_skill else 0.0)
+
+def test_match_with_dates_filters_on_the_calendar(directory, snapshot):
+    project = {'producto': 'Epóxico, Rodillo', 'distrito': 'Ate', 'fecha_inicio': day(3), 'fecha_fin': day(9)}
+    busy = busy_ids(directory, day(3), day(9))
+    assert busy
+    candidates = snapshot.match(project, k=1000)
+    assert {row['id'] for row in candidates} == sql_ids(directory) - busy
+    
+    everyone = snapshot.match(project, k=1000, only_available=False)
+    assert {row['id'] for row in everyone} == sql_ids(directory)
+
+def test_pool_needs_every_skill_and_free_dates(directory, snapshot):
+    project = {'producto': 'Poliuretano', 'distrito': 'Callao', 'fecha_inicio': day(10), 'fecha_fin': day(12)}
+    pool = snapshot.pool(project, skills=('Rodillo',))
+    expected = sql_ids(directory, ('Poliuretano', 'Rodillo')) - busy_ids(directory, day(10), day(12))
+    assert expected and set(pool['ids'].tolist()) == expected
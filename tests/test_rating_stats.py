@@ -0,0 +1,55 @@
+"""Rating triggers: freelancer_rating_stats and rating_promedio follow every insert, update and delete"""
+import pytest
+
+@pytest.fixture
+def rated_db(sqlite_db):
+    """Two freelancers with one assignment each; Aplicador 2 keeps a hand-entered rating"""
+    conn = sqlite_db.get_connection()
+    with conn:
+        conn.execute("INSERT INTO freelancers (nombre, telefono) VALUES ('Aplicador 1', '900000001')")
+        conn.execute("INSERT INTO freelancers (nombre, telefono, rating_promedio) VALUES ('Aplicador 2', '900000002', 4.5)")
+        conn.execute("INSERT INTO projects (nombre) VALUES ('Obra')")
+        conn.executemany("INSERT INTO assignments (project_id, freelancer_id) VALUES (1, ?)", [(1,), (2,)])
+    return sqlite_db
+
+def scores(**overrides) -> dict:
+    return {**{d: 4 for d in ('calidad', 'puntualidad', 'instrucciones', 'seguridad', 'profesionalismo')}, **overrides}
+
+def ratings(db) -> dict:
+    return dict(db.get_connection().execute("SELECT id, rating_promedio FROM freelancers").fetchall())
+
+def test_ratings_update_the_average(rated_db):
+    rated_db.add_rating(1, scores())
+    rated_db.add_rating(1, scores(calidad=5, seguridad=2))
+    assert ratings(rated_db) == {1: 3.9, 2: 4.5}
+    assert rated_db.get_rating_summary(1)['ratings_count'] == 2
+    
+    with rated_db.get_connection() as conn:
+        conn.execute("UPDATE ratings SET rating_general = 5 WHERE id = 2")
+    assert ratings(rated_db) == {1: 4.5, 2: 4.5}
+
+def test_deleting_the_last_rating_resets_the_average(rated_db):
+    first = rated_db.add_rating(1, scores())
+    second = rated_db.add_rating(1, scores(calidad=5))
+    conn = rated_db.get_connection()
+    with conn:
+        conn.execute("DELETE FROM ratings WHERE id = ?", (second,))
+    assert ratings(rated_db) == {1: 4.0, 2: 4.5}
+    
+    with conn:
+        conn.execute("DELETE FROM ratings WHERE id = ?", (first,))
+    assert ratings(rated_db) == {1: 0, 2: 4.5}
+    assert rated_db.get_rating_summary(1) is None
+
+def test_rebuild_agrees_with_the_triggers(rated_db):
+    rated_db.add_rating(1, scores(calidad=5))
+    conn = rated_db.get_connection()
+    triggered = ratings(rated_db)
+    rated_db.rebuild_rating_stats()
+    assert ratings(rated_db) == triggered
+    
+    with conn:
+        conn.execute("DROP TRIGGER rating_stats_delete")
+        conn.execute("DELETE FROM ratings")
+    rated_db.rebuild_rating_stats()
+    assert ratings(rated_db) == {1: 0, 2: 4.5}
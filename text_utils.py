@@ -0,0 +1,29 @@
+"""
+Text normalization helpers shared by both FAMS database backends
+"""
+import re
+import unicodedata
+from functools import lru_cache
+from typing import List
+
+def fold_accents(text: str) -> str:
+    """Lowercase and strip accents: 'Epóxico' -> 'epoxico'"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+@lru_cache(maxsize=4096)
+def skill_slug(skill: str) -> str:
+    """Canonical key for a skill name, used to dedupe and match skills"""
+    return re.sub(r'\s+', ' ', fold_accents(skill)).strip()
+
+def parse_skills(skills: str) -> List[str]:
+    """Split a comma-separated skills column into distinct, trimmed names"""
+    names = []
+    seen = set()
+    for part in (skills or '').split(','):
+        name = re.sub(r'\s+', ' ', part).strip()
+        slug = skill_slug(name)
+        if slug and slug not in seen:
+            seen.add(slug)
+            names.append(name)
+    return names
@@ -0,0 +1,56 @@
+"""
+LuxPro theme shared by app.py and app_aplicador.py
+
+The stylesheets live in assets/css: base.css for both apps plus one file per
+app. They are read, concatenated and minified once per process, and injected
+as a single <style> element tagged with the content hash. Every rerun sends
+byte-identical markup, so Streamlit's ForwardMsg cache (see
+global.minCachedMessageSize in .streamlit/config.toml) sends the browser only
+a reference to it after the first run of a session.
+
+Streamlit's static file serving sends .css as text/plain with nosniff, which
+browsers refuse to apply, so the theme can't be a <link> to /app/static.
+"""
+import hashlib
+import os
+import re
+from functools import lru_cache
+from typing import Tuple
+
+import streamlit as st
+
+CSS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets', 'css')
+
+# Stylesheets of each app, in cascade order
+THEMES = {
+    'admin': ('base.css', 'admin.css'),
+    'aplicador': ('base.css', 'aplicador.css'),
+}
+
+def minify_css(css: str) -> str:
+    """Drop comments and the whitespace the browser ignores"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    css = re.sub(r'\s+!important', '!important', css)
+    return css.replace(';}', '}').strip()
+
+@lru_cache(maxsize=None)
+def stylesheet(app: str) -> Tuple[str, str]:
+    """(content hash, minified CSS) of an app's theme, built once per process"""
+    sources = []
+    for name in THEMES[app]:
+        with open(os.path.join(CSS_DIR, name), encoding='utf-8') as f:
+            sources.append(f.read())
+    css = minify_css("\n".join(sources))
+    return hashlib.sha256(css.encode('utf-8')).hexdigest()[:12], css
+
+def style_tag(app: str) -> str:
+    """The <style> element injected on every run"""
+    version, css = stylesheet(app)
+    return f'<style data-theme="{app}-{version}">{css}</style>'
+
+def apply(app: str):
+    """Inject the app's theme; call right after st.set_page_config"""
+    st.markdown(style_tag(app), unsafe_allow_html=True)